@@ -1,5 +1,6 @@
 from __future__ import annotations
 from typing import AsyncGenerator, Awaitable, Callable
+import asyncio
 import json
 from agent.events import AgentEvent, AgentEventType
 from agent.session import Session
@@ -46,7 +47,11 @@ class Agent:
             self.session.increment_turn()
             response_text = ""
 
-            # check for context overflow
+            # check for context overflow; evict low-value tool results first
+            # and only fall back to full compaction if that isn't enough
+            if self.session.context_manager.needs_compression():
+                self.session.context_manager.evict_low_value()
+
             if self.session.context_manager.needs_compression():
                 summary, usage = await self.session.chat_compactor.compress(
                     self.session.context_manager
@@ -111,6 +116,7 @@ class Agent:
                     self.session.context_manager.set_latest_usage(usage)
                     self.session.context_manager.add_usage(usage)
 
+                self.session.context_manager.dedupe_file_reads()
                 self.session.context_manager.prune_tool_outputs()
                 return
 
@@ -129,14 +135,27 @@ class Agent:
                     args=tool_call.arguments,
                 )
 
-                result = await self.session.tool_registry.invoke(
-                    tool_call.name,
-                    tool_call.arguments,
-                    self.config.cwd,
-                    self.session.hook_system,
-                    self.session.approval_manager,
-                    self.session.ask_user_callback,
+                progress: asyncio.Queue[AgentEvent] = asyncio.Queue()
+
+                def on_progress(output: str, call=tool_call) -> None:
+                    progress.put_nowait(
+                        AgentEvent.tool_call_progress(call.call_id, call.name, output)
+                    )
+
+                task = asyncio.create_task(
+                    self.session.tool_registry.invoke(
+                        tool_call.name,
+                        tool_call.arguments,
+                        self.config.cwd,
+                        self.session.hook_system,
+                        self.session.approval_manager,
+                        self.session.ask_user_callback,
+                        progress_callback=on_progress,
+                    )
                 )
+                async for event in self._progress_events(task, progress):
+                    yield event
+                result = task.result()
 
                 yield AgentEvent.tool_call_complete(
                     tool_call.call_id,
@@ -149,6 +168,8 @@ class Agent:
                         tool_call_id=tool_call.call_id,
                         content=result.to_model_output(),
                         is_error=not result.success,
+                        name=tool_call.name,
+                        metadata=result.metadata if result.success else {},
                     )
                 )
 
@@ -156,6 +177,9 @@ class Agent:
                 self.session.context_manager.add_tool_result(
                     tool_result.tool_call_id,
                     tool_result.content,
+                    tool_name=tool_result.name,
+                    metadata=tool_result.metadata,
+                    is_error=tool_result.is_error,
                 )
 
             loop_detection_error = self.session.loop_detector.check_for_loop()
@@ -167,9 +191,33 @@ class Agent:
                 self.session.context_manager.set_latest_usage(usage)
                 self.session.context_manager.add_usage(usage)
 
+            self.session.context_manager.dedupe_file_reads()
             self.session.context_manager.prune_tool_outputs()
         yield AgentEvent.agent_error(f"Maximum turns ({max_turns}) reached")
 
+    async def _progress_events(
+        self,
+        task: asyncio.Task,
+        queue: asyncio.Queue[AgentEvent],
+    ) -> AsyncGenerator[AgentEvent, None]:
+        """Yield progress events queued by a running tool until it finishes."""
+        getter: asyncio.Future | None = None
+        try:
+            while not task.done():
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                else:
+                    getter.cancel()
+            while not queue.empty():
+                yield queue.get_nowait()
+        finally:
+            if getter is not None and not getter.done():
+                getter.cancel()
+            if not task.done():
+                task.cancel()
+
     async def __aenter__(self) -> Agent:
         if self._owns_session and self.session:
             await self.session.initialize()
@@ -181,7 +229,6 @@ class Agent:
         exc_val,
         exc_tb,
     ) -> None:
-        if self._owns_session and self.session and self.session.client and self.session.mcp_manager:
-            await self.session.client.close()
-            await self.session.mcp_manager.shutdown()
+        if self._owns_session and self.session:
+            await self.session.close()
             self.session = None
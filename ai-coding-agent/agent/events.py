@@ -15,6 +15,7 @@ class AgentEventType(str, Enum):
 
     # Tool calls
     TOOL_CALL_START = "tool_call_start"
+    TOOL_CALL_PROGRESS = "tool_call_progress"
     TOOL_CALL_COMPLETE = "tool_call_complete"
 
     # Text streaming
@@ -84,6 +85,17 @@ class AgentEvent:
             },
         )
 
+    @classmethod
+    def tool_call_progress(cls, call_id: str, name: str, output: str):
+        return cls(
+            type=AgentEventType.TOOL_CALL_PROGRESS,
+            data={
+                "call_id": call_id,
+                "name": name,
+                "output": output,
+            },
+        )
+
     @classmethod
     def tool_call_complete(
         cls,
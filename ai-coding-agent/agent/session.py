@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 import json
 from typing import Any, Callable, Awaitable
@@ -13,6 +14,7 @@ from safety.approval import ApprovalManager
 from tools.discovery import ToolDiscoveryManager
 from tools.mcp.mcp_manager import MCPManager
 from tools.registry import create_default_registry
+from tools.symbols import RepoMap
 
 
 class Session:
@@ -42,6 +44,7 @@ class Session:
         self.updated_at = datetime.now()
 
         self.turn_count = 0
+        self._closed = False
 
     async def initialize(self) -> None:
         await self.mcp_manager.initialize()
@@ -52,8 +55,34 @@ class Session:
             config=self.config,
             user_memory=self._load_memory(),
             tools=self.tool_registry.get_tools(),
+            repo_map=await asyncio.to_thread(self._build_repo_map),
         )
 
+    async def close(self) -> None:
+        """
+        Release the LLM client, MCP servers and tools (the persistent shell
+        and any background jobs). Safe to call more than once.
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        await self.client.close()
+        await self.mcp_manager.shutdown()
+        await self.tool_registry.close()
+
+    def _build_repo_map(self) -> str | None:
+        if not self.config.repo_map.enabled:
+            return None
+
+        try:
+            return RepoMap.for_workspace(self.config).render(
+                self.tool_registry.workspace,
+                self.tool_registry.file_info,
+            )
+        except Exception:
+            return None
+
     def _load_memory(self) -> str | None:
         data_dir = get_data_dir()
         data_dir.mkdir(parents=True, exist_ok=True)
@@ -92,4 +121,10 @@ class Session:
             "token_usage": self.context_manager.total_usage,
             "tools_count": len(self.tool_registry.get_tools()),
             "mcp_servers": len(self.tool_registry.connected_mcp_servers),
+            "file_cache_hits": self.tool_registry.file_cache.hits,
+            "file_cache_misses": self.tool_registry.file_cache.misses,
+            **{
+                f"shell_cache_{key}": value
+                for key, value in self.tool_registry.command_cache.stats().items()
+            },
         }
@@ -12,6 +12,9 @@ from agent.session import Session
 
 logger = logging.getLogger(__name__)
 
+PROGRESS_EDIT_INTERVAL = 3.0
+PROGRESS_MAX_CHARS = 1000
+
 class TelegramChannel:
     def __init__(self, config: Config, session: Session):
         self.config = config
@@ -82,6 +85,7 @@ class TelegramChannel:
 
         async with Agent(self.config, session=self.session) as agent:
             assistant_response = ""
+            last_progress = 0.0
             
             async for event in agent.run(user_message):
                 if event.type == AgentEventType.TEXT_DELTA:
@@ -91,6 +95,19 @@ class TelegramChannel:
                 elif event.type == AgentEventType.TOOL_CALL_START:
                     tool_name = event.data.get("name", "unknown")
                     await status_msg.edit_text(f"🔧 *Running tool:* `{tool_name}`", parse_mode="Markdown")
+                elif event.type == AgentEventType.TOOL_CALL_PROGRESS:
+                    # Telegram rate-limits message edits; show the latest
+                    # output at most every few seconds.
+                    now = asyncio.get_running_loop().time()
+                    if now - last_progress < PROGRESS_EDIT_INTERVAL:
+                        continue
+                    last_progress = now
+                    tool_name = event.data.get("name", "unknown")
+                    output = event.data.get("output", "")[-PROGRESS_MAX_CHARS:]
+                    try:
+                        await status_msg.edit_text(f"🔧 Running tool: {tool_name}\n\n{output}")
+                    except Exception as e:
+                        logger.debug(f"Failed to update progress message: {e}")
                 elif event.type == AgentEventType.TOOL_CALL_COMPLETE:
                     tool_name = event.data.get("name", "unknown")
                     success = event.data.get("success", False)
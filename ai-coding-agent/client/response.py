@@ -1,5 +1,5 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any
 import json
@@ -69,6 +69,8 @@ class ToolResultMessage:
     tool_call_id: str
     content: str
     is_error: bool = False
+    name: str | None = None
+    metadata: dict[str, Any] = field(default_factory=dict)
 
     def to_openai_message(self) -> dict[str, Any]:
         return {
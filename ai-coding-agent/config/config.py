@@ -2,7 +2,7 @@ from __future__ import annotations
 from enum import Enum
 import os
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 from pydantic import BaseModel, Field, model_validator
 
 
@@ -18,6 +18,81 @@ class ShellEnvironmentPolicy(BaseModel):
         default_factory=lambda: ["*KEY*", "*TOKEN*", "*SECRET*"]
     )
     set_vars: dict[str, str] = Field(default_factory=dict)
+    # Run commands in one long-lived shell per session, so cd/export persist
+    persistent_session: bool = False
+    # Summarize output of known tools (pytest, compilers, package managers)
+    condense_output: bool = True
+    # Reuse results of read-only commands (git status, ls, cat, ...) while
+    # no write happened and the paths they name are unchanged; not used
+    # with persistent_session
+    cache_safe_commands: bool = False
+    cache_ttl: float = Field(default=300, gt=0)
+
+    # Resource limits for every command (None = unlimited). CPU time and
+    # open files are per process; memory and process count cover the whole
+    # command when cgroup v2 is available, otherwise they fall back to
+    # per-process address space and a per-user process count.
+    cpu_time_limit: int | None = Field(default=None, ge=1)
+    memory_limit_mb: int | None = Field(default=None, ge=64)
+    max_open_files: int | None = Field(default=None, ge=16)
+    max_processes: int | None = Field(default=None, ge=1)
+    nice: int = Field(default=0, ge=0, le=19)
+    io_priority: Literal["best-effort", "idle"] | None = None
+    # Run each command in its own cgroup v2 group when the agent's group is
+    # delegated and memory_limit_mb or max_processes is set; also gives
+    # exact CPU and peak memory figures. Setting up the groups moves the
+    # processes of the agent's group into a child group, which outlives
+    # the agent.
+    use_cgroups: bool = True
+
+
+class ContextConfig(BaseModel):
+    prune_protect_tokens: int = Field(default=40_000, ge=0)
+    prune_minimum_tokens: int = Field(default=20_000, ge=0)
+    # Tool name -> number of most recent results of that tool never pruned
+    protected_tools: dict[str, int] = Field(default_factory=dict)
+    keep_error_results: bool = False
+    # Scored eviction runs before falling back to full compaction
+    eviction_enabled: bool = True
+    eviction_target_ratio: float = Field(default=0.6, gt=0.0, lt=0.8)
+    eviction_protect_recent: int = Field(default=6, ge=0)
+    eviction_min_tokens: int = Field(default=200, ge=0)
+
+
+class ArtifactConfig(BaseModel):
+    enabled: bool = True
+    spill_threshold: int = Field(default=32 * 1024, ge=1024)
+    preview_chars: int = Field(default=4000, ge=200)
+    max_store_bytes: int = 512 * 1024 * 1024
+
+
+class SearchIndexConfig(BaseModel):
+    enabled: bool = False
+    max_file_bytes: int = Field(default=1024 * 1024, ge=1)
+    max_files: int = Field(default=200_000, ge=1)
+    max_index_bytes: int = Field(default=1024 * 1024 * 1024, ge=1)
+
+
+class FileCacheConfig(BaseModel):
+    enabled: bool = True
+    max_bytes: int = Field(default=64 * 1024 * 1024, ge=0)
+    max_file_bytes: int = Field(default=4 * 1024 * 1024, ge=0)
+    # Re-hash file contents on every hit instead of trusting size + mtime
+    verify_hash: bool = False
+    # fsync file and directory after each write made through the cache
+    fsync: bool = False
+
+
+class RepoMapConfig(BaseModel):
+    enabled: bool = True
+    max_tokens: int = Field(default=1500, ge=100)
+    # Directory levels listed in the map's layout section
+    max_depth: int = Field(default=2, ge=1)
+    max_dirs: int = Field(default=40, ge=1)
+    # Budget for building the map at session start; when either runs out a
+    # partial map is rendered and later sessions continue indexing
+    max_files: int = Field(default=20_000, ge=1)
+    time_budget: float = Field(default=5.0, gt=0)
 
 
 class MCPServerConfig(BaseModel):
@@ -89,6 +164,11 @@ class Config(BaseModel):
     shell_environment: ShellEnvironmentPolicy = Field(
         default_factory=ShellEnvironmentPolicy
     )
+    context: ContextConfig = Field(default_factory=ContextConfig)
+    artifacts: ArtifactConfig = Field(default_factory=ArtifactConfig)
+    search_index: SearchIndexConfig = Field(default_factory=SearchIndexConfig)
+    file_cache: FileCacheConfig = Field(default_factory=FileCacheConfig)
+    repo_map: RepoMapConfig = Field(default_factory=RepoMapConfig)
     hooks_enabled: bool = False
     hooks: list[HookConfig] = Field(default_factory=list)
     approval: ApprovalPolicy = ApprovalPolicy.ON_REQUEST
@@ -0,0 +1,196 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import json
+import os
+import re
+from typing import TYPE_CHECKING
+
+from config.config import ContextConfig
+
+if TYPE_CHECKING:
+    from context.manager import MessageItem
+
+
+EVICTED_CONTENT = "[evicted {name} result (~{tokens} tokens); re-run the tool if needed]"
+CONDENSED_MARKER = "\n... [condensed: {omitted} lines omitted] ...\n"
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]{3,}")
+_ARG_KEYS = ("path", "pattern", "url", "artifact_id", "cwd")
+
+
+@dataclass(slots=True)
+class EvictionCandidate:
+    item: MessageItem
+    position: int
+    tokens: int
+    keys: tuple[str, ...]
+    referenced: bool = False
+    is_error: bool = False
+    score: float = 0.0
+
+
+class ContextEvictor:
+    """
+    Ranks tool results by recency, whether the model referred to them later
+    (file paths, identifiers), error status and size, and picks the lowest
+    value ones to evict or condense until a token budget is met.
+    """
+
+    CONDENSE_HEAD_LINES = 20
+    CONDENSE_TAIL_LINES = 10
+
+    def __init__(self, config: ContextConfig) -> None:
+        self.config = config
+
+    def plan(
+        self,
+        messages: list[MessageItem],
+        tokens_needed: int,
+        count_tokens,
+    ) -> list[tuple[MessageItem, str]]:
+        candidates = self._collect_candidates(messages)
+        if not candidates or tokens_needed <= 0:
+            return []
+
+        self._mark_references(messages, candidates)
+
+        total = len(messages)
+        for candidate in candidates:
+            candidate.score = self._score(candidate, total)
+
+        replacements: list[tuple[MessageItem, str]] = []
+        freed = 0
+
+        for candidate in sorted(candidates, key=lambda c: c.score):
+            if freed >= tokens_needed:
+                break
+
+            if candidate.referenced or candidate.is_error:
+                content = self._condense(candidate.item.content)
+                if content is None:
+                    continue
+            else:
+                content = EVICTED_CONTENT.format(
+                    name=candidate.item.tool_name or "tool",
+                    tokens=candidate.tokens,
+                )
+
+            freed += candidate.tokens - count_tokens(content)
+            replacements.append((candidate.item, content))
+
+        return replacements
+
+    def _collect_candidates(
+        self, messages: list[MessageItem]
+    ) -> list[EvictionCandidate]:
+        args_by_call_id: dict[str, bytes] = {}
+        for msg in messages:
+            for tc in msg.tool_calls:
+                args_by_call_id[tc.call_id] = tc.arguments
+
+        protected_from = max(0, len(messages) - self.config.eviction_protect_recent)
+        candidates = []
+
+        for position, msg in enumerate(messages[:protected_from]):
+            if msg.role != "tool" or msg.pruned_at or not msg.tool_call_id:
+                continue
+
+            tokens = msg.token_count or 0
+            if tokens < self.config.eviction_min_tokens:
+                continue
+
+            candidates.append(
+                EvictionCandidate(
+                    item=msg,
+                    position=position,
+                    tokens=tokens,
+                    keys=self._reference_keys(args_by_call_id.get(msg.tool_call_id)),
+                    is_error=msg.content.startswith("Error:"),
+                )
+            )
+
+        return candidates
+
+    def _reference_keys(self, arguments: bytes | None) -> tuple[str, ...]:
+        if not arguments:
+            return ()
+
+        try:
+            args = json.loads(arguments)
+        except ValueError:
+            return ()
+
+        if not isinstance(args, dict):
+            return ()
+
+        keys: set[str] = set()
+        for name in _ARG_KEYS:
+            value = args.get(name)
+            if isinstance(value, str) and value.strip():
+                keys.add(value.strip())
+                base = os.path.basename(value.strip())
+                if len(base) > 3:
+                    keys.add(base)
+
+        command = args.get("command")
+        if isinstance(command, str):
+            keys.update(_IDENTIFIER.findall(command)[1:4])
+
+        return tuple(keys)
+
+    def _mark_references(
+        self,
+        messages: list[MessageItem],
+        candidates: list[EvictionCandidate],
+    ) -> None:
+        # Walk backwards so each candidate only sees what the model said or
+        # asked for after it was produced. Each piece of text is searched
+        # once, for the keys not yet found in the text after it.
+        unfound = {key for candidate in candidates for key in candidate.keys}
+        found: set[str] = set()
+        pending = sorted(candidates, key=lambda c: c.position, reverse=True)
+        index = 0
+
+        def scan(text: str) -> None:
+            hits = {key for key in unfound if key in text}
+            found.update(hits)
+            unfound.difference_update(hits)
+
+        for position in range(len(messages) - 1, -1, -1):
+            while index < len(pending) and pending[index].position == position:
+                candidate = pending[index]
+                candidate.referenced = any(key in found for key in candidate.keys)
+                index += 1
+
+            msg = messages[position]
+            if msg.role == "assistant":
+                if msg.content:
+                    scan(msg.content)
+                for tc in msg.tool_calls:
+                    scan(tc.arguments.decode("utf-8", errors="replace"))
+
+    def _score(self, candidate: EvictionCandidate, total: int) -> float:
+        recency = candidate.position / max(1, total)
+        size_penalty = min(1.0, candidate.tokens / 8000)
+
+        score = recency - 0.5 * size_penalty
+        if candidate.referenced:
+            score += 1.0
+        if candidate.is_error:
+            score += 0.5
+
+        return score
+
+    def _condense(self, content: str) -> str | None:
+        lines = content.splitlines()
+        keep = self.CONDENSE_HEAD_LINES + self.CONDENSE_TAIL_LINES
+
+        if len(lines) <= keep + 5:
+            return None
+
+        omitted = len(lines) - keep
+        return (
+            "\n".join(lines[: self.CONDENSE_HEAD_LINES])
+            + CONDENSED_MARKER.format(omitted=omitted)
+            + "\n".join(lines[-self.CONDENSE_TAIL_LINES :])
+        )
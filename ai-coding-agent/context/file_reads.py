@@ -0,0 +1,115 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from context.manager import MessageItem
+
+
+SUPERSEDED_READ_CONTENT = "[superseded by later read of {path}]"
+STALE_READ_CONTENT = "[stale read of {path}: file changed since, see later read]"
+
+
+@dataclass
+class FileReadRecord:
+    item: MessageItem
+    path: str
+    start: int
+    end: int
+    mtime_ns: int | None = None
+    size: int | None = None
+    truncated: bool = False
+    total_lines: int | None = None
+    # The content the item was recorded with; once pruning, eviction or
+    # dedupe replaces it, the read is no longer visible to the model.
+    content: str | None = None
+
+    def same_version(self, other: FileReadRecord) -> bool:
+        return self.mtime_ns == other.mtime_ns and self.size == other.size
+
+    def covers(self, other: FileReadRecord) -> bool:
+        return (
+            not self.truncated and self.start <= other.start and self.end >= other.end
+        )
+
+    def is_live_full_read(self) -> bool:
+        return (
+            not self.truncated
+            and self.start == 1
+            and self.end == self.total_lines
+            and self.item.content is self.content
+        )
+
+
+class FileReadTracker:
+    """
+    Tracks which tool results in the context hold which file version, so that
+    older copies can be replaced with a short pointer once a later read of
+    the same file makes them redundant (same lines) or stale (file changed).
+    The most recent read of every file is never touched.
+    """
+
+    def __init__(self) -> None:
+        self._reads: dict[str, list[FileReadRecord]] = {}
+
+    def record(self, item: MessageItem, metadata: dict[str, Any]) -> None:
+        path = metadata.get("path")
+        start = metadata.get("shown_start")
+        end = metadata.get("shown_end")
+
+        if not isinstance(path, str) or start is None or end is None:
+            return
+
+        self._reads.setdefault(path, []).append(
+            FileReadRecord(
+                item=item,
+                path=path,
+                start=start,
+                end=end,
+                mtime_ns=metadata.get("mtime_ns"),
+                size=metadata.get("size"),
+                truncated=bool(metadata.get("truncated")),
+                total_lines=metadata.get("total_lines"),
+                content=item.content,
+            )
+        )
+
+    def live_full_read(self, path: str) -> FileReadRecord | None:
+        """The latest read of `path` if it shows the whole file and is still in context."""
+        records = self._reads.get(path)
+        if not records or not records[-1].is_live_full_read():
+            return None
+
+        return records[-1]
+
+    def collect_superseded(self) -> list[tuple[MessageItem, str]]:
+        superseded: list[tuple[MessageItem, str]] = []
+
+        for path, records in self._reads.items():
+            if len(records) < 2:
+                continue
+
+            latest = records[-1]
+            kept: list[FileReadRecord] = []
+
+            for i, record in enumerate(records[:-1]):
+                later = records[i + 1 :]
+
+                if not record.same_version(latest):
+                    superseded.append(
+                        (record.item, STALE_READ_CONTENT.format(path=path))
+                    )
+                elif any(r.covers(record) for r in later):
+                    superseded.append(
+                        (record.item, SUPERSEDED_READ_CONTENT.format(path=path))
+                    )
+                else:
+                    kept.append(record)
+
+            kept.append(latest)
+            self._reads[path] = kept
+
+        return superseded
+
+    def clear(self) -> None:
+        self._reads.clear()
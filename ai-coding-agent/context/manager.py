@@ -1,22 +1,68 @@
-from datetime import datetime
+import json
+import sys
+import time
 from typing import Any
 from client.response import TokenUsage
 from config.config import Config
+from context.evictor import ContextEvictor
+from context.file_reads import FileReadRecord, FileReadTracker
+from context.token_index import ToolOutputEntry, ToolOutputIndex
 from prompts.system import get_system_prompt
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 
 from tools.base import Tool
 from utils.text import count_tokens
 
 
-@dataclass
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if value else value
+
+
+@dataclass(slots=True)
+class ToolCallRecord:
+    call_id: str
+    name: str
+    arguments: bytes
+
+    @classmethod
+    def from_dict(cls, tc: dict[str, Any]) -> "ToolCallRecord":
+        func = tc.get("function", {})
+        arguments = func.get("arguments", "")
+
+        if isinstance(arguments, dict):
+            arguments = json.dumps(arguments)
+
+        return cls(
+            call_id=tc.get("id", ""),
+            name=_intern(func.get("name", "")),
+            arguments=arguments.encode("utf-8"),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.call_id,
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "arguments": self.arguments.decode("utf-8"),
+            },
+        }
+
+
+@dataclass(slots=True)
 class MessageItem:
     role: str
     content: str
     tool_call_id: str | None = None
-    tool_calls: list[dict[str, Any]] = field(default_factory=list)
+    tool_name: str | None = None
+    # Arguments stay as raw JSON bytes until the message is serialized
+    tool_calls: tuple[ToolCallRecord, ...] = ()
     token_count: int | None = None
-    pruned_at: datetime | None = None
+    pruned_at: float | None = None
+
+    def __post_init__(self) -> None:
+        self.role = _intern(self.role)
+        self.tool_name = _intern(self.tool_name)
 
     def to_dict(self) -> dict[str, Any]:
         result: dict[str, Any] = {"role": self.role}
@@ -25,17 +71,7 @@ class MessageItem:
             result["tool_call_id"] = self.tool_call_id
 
         if self.tool_calls:
-            import json
-            formatted_calls = []
-            for tc in self.tool_calls:
-                # Create a shallow copy to avoid mutating the original
-                tc_copy = dict(tc)
-                if "function" in tc_copy and "arguments" in tc_copy["function"]:
-                    if isinstance(tc_copy["function"]["arguments"], dict):
-                        tc_copy["function"] = dict(tc_copy["function"])
-                        tc_copy["function"]["arguments"] = json.dumps(tc_copy["function"]["arguments"])
-                formatted_calls.append(tc_copy)
-            result["tool_calls"] = formatted_calls
+            result["tool_calls"] = [tc.to_dict() for tc in self.tool_calls]
 
         if self.content:
             result["content"] = self.content
@@ -46,21 +82,27 @@ class MessageItem:
 
 
 class ContextManager:
-    PRUNE_PROTECT_TOKENS = 40_000
-    PRUNE_MINIMUM_TOKENS = 20_000
+    PRUNED_CONTENT = "[Old tool result content cleared]"
 
     def __init__(
         self,
         config: Config,
         user_memory: str | None,
         tools: list[Tool] | None,
+        repo_map: str | None = None,
     ) -> None:
-        self._system_prompt = get_system_prompt(config, user_memory, tools)
+        self._system_prompt = get_system_prompt(config, user_memory, tools, repo_map)
         self.config = config
         self._model_name = self.config.model_name
         self._messages: list[MessageItem] = []
         self._latest_usage = TokenUsage()
         self.total_usage = TokenUsage()
+        self._file_reads = FileReadTracker()
+        self._tool_outputs = ToolOutputIndex()
+        self._deferred_outputs: list[ToolOutputEntry] = []
+        self._tool_result_counts: dict[str, int] = {}
+        self._user_message_count = 0
+        self._evictor = ContextEvictor(config.context)
 
     @property
     def message_count(self) -> int:
@@ -76,7 +118,7 @@ class ContextManager:
             ),
         )
 
-        self._messages.append(item)
+        self._append(item)
 
     def add_assistant_message(
         self,
@@ -90,21 +132,54 @@ class ContextManager:
                 content or "",
                 self._model_name,
             ),
-            tool_calls=tool_calls or [],
+            tool_calls=tuple(
+                ToolCallRecord.from_dict(tc) for tc in tool_calls or []
+            ),
         )
 
-        self._messages.append(item)
+        self._append(item)
 
-    def add_tool_result(self, tool_call_id: str, content: str) -> None:
+    def add_tool_result(
+        self,
+        tool_call_id: str,
+        content: str,
+        tool_name: str | None = None,
+        metadata: dict[str, Any] | None = None,
+        is_error: bool = False,
+    ) -> None:
         item = MessageItem(
             role="tool",
             content=content,
             tool_call_id=tool_call_id,
+            tool_name=tool_name,
             token_count=count_tokens(content, self._model_name),
         )
 
+        self._append(item, is_error=is_error)
+
+        if tool_name == "read_file" and metadata:
+            self._file_reads.record(item, metadata)
+
+    def _append(self, item: MessageItem, is_error: bool = False) -> None:
         self._messages.append(item)
 
+        if item.role == "user":
+            self._user_message_count += 1
+        elif item.role == "tool" and item.tool_call_id:
+            name = item.tool_name or ""
+            ordinal = self._tool_result_counts.get(name, 0) + 1
+            self._tool_result_counts[name] = ordinal
+            self._tool_outputs.append(
+                ToolOutputEntry(item=item, ordinal=ordinal, is_error=is_error)
+            )
+
+    def _reset_indexes(self) -> None:
+        self._file_reads.clear()
+        self._tool_outputs.clear()
+        self._deferred_outputs = []
+        self._tool_result_counts = {}
+        self._user_message_count = 0
+
     def get_messages(self) -> list[dict[str, Any]]:
         messages = []
 
@@ -127,6 +202,42 @@ class ContextManager:
 
         return current_tokens > (context_limit * 0.8)
 
+    def evict_low_value(self) -> int:
+        settings = self.config.context
+        if not settings.eviction_enabled:
+            return 0
+
+        current_tokens = self._latest_usage.total_tokens
+        target = int(self.config.model.context_window * settings.eviction_target_ratio)
+        if current_tokens <= target:
+            return 0
+
+        replacements = self._evictor.plan(
+            self._messages,
+            current_tokens - target,
+            lambda text: count_tokens(text, self._model_name),
+        )
+
+        freed = 0
+        evicted_at = time.time()
+        for msg, content in replacements:
+            old_tokens = msg.token_count or 0
+            msg.content = content
+            msg.token_count = count_tokens(content, self._model_name)
+            msg.pruned_at = evicted_at
+            self._tool_outputs.update(msg)
+            freed += old_tokens - msg.token_count
+
+        if freed > 0:
+            self._latest_usage = TokenUsage(
+                prompt_tokens=max(0, self._latest_usage.prompt_tokens - freed),
+                completion_tokens=self._latest_usage.completion_tokens,
+                total_tokens=max(0, current_tokens - freed),
+                cached_tokens=self._latest_usage.cached_tokens,
+            )
+
+        return freed
+
     def set_latest_usage(self, usage: TokenUsage):
         self._latest_usage = usage
 
@@ -135,6 +246,7 @@ class ContextManager:
 
     def replace_with_summary(self, summary: str) -> None:
         self._messages = []
+        self._reset_indexes()
 
         continuation_content = f"""# Context Restoration (Previous Session Compacted)
 
@@ -155,7 +267,7 @@ class ContextManager:
             content=continuation_content,
             token_count=count_tokens(continuation_content, self._model_name),
         )
-        self._messages.append(summary_item)
+        self._append(summary_item)
 
         ack_content = """I've reviewed the context from the previous session. I understand:
 - The original goal and what was requested
@@ -169,7 +281,7 @@ I'll continue with the REMAINING tasks only, starting from where we left off."""
             content=ack_content,
             token_count=count_tokens(ack_content, self._model_name),
         )
-        self._messages.append(ack_item)
+        self._append(ack_item)
 
         continue_content = (
             "Continue with the REMAINING work only. Do NOT repeat any completed actions. "
@@ -181,42 +293,66 @@ I'll continue with the REMAINING tasks only, starting from where we left off."""
             content=continue_content,
             token_count=count_tokens(continue_content, self._model_name),
         )
-        self._messages.append(continue_item)
+        self._append(continue_item)
 
     def prune_tool_outputs(self) -> int:
-        user_message_count = sum(1 for msg in self._messages if msg.role == "user")
-
-        if user_message_count < 2:
+        if self._user_message_count < 2:
             return 0
 
-        total_tokens = 0
+        settings = self.config.context
+        cut = self._tool_outputs.find_cut(settings.prune_protect_tokens)
+        candidates = self._deferred_outputs + self._tool_outputs.entries(cut)
+
         pruned_tokens = 0
         to_prune: list[MessageItem] = []
+        deferred: list[ToolOutputEntry] = []
 
-        for msg in reversed(self._messages):
-            if msg.role == "tool" and msg.tool_call_id:
-                if msg.pruned_at:
-                    break
+        for entry in candidates:
+            if settings.keep_error_results and entry.is_error:
+                continue
 
-                tokens = msg.token_count or count_tokens(msg.content, self._model_name)
-                total_tokens += tokens
+            if self._in_protection_window(entry):
+                deferred.append(entry)
+                continue
 
-                if total_tokens > self.PRUNE_PROTECT_TOKENS:
-                    pruned_tokens += tokens
-                    to_prune.append(msg)
+            pruned_tokens += entry.item.token_count or 0
+            to_prune.append(entry.item)
 
-        if pruned_tokens < self.PRUNE_MINIMUM_TOKENS:
+        if pruned_tokens < settings.prune_minimum_tokens:
             return 0
 
-        pruned_count = 0
+        pruned_tokens_count = count_tokens(self.PRUNED_CONTENT, self._model_name)
+        pruned_at = time.time()
 
         for msg in to_prune:
-            msg.content = "[Old tool result content cleared]"
+            msg.content = self.PRUNED_CONTENT
+            msg.token_count = pruned_tokens_count
+            msg.pruned_at = pruned_at
+
+        self._tool_outputs.advance(cut)
+        self._deferred_outputs = deferred
+
+        return len(to_prune)
+
+    def _in_protection_window(self, entry: ToolOutputEntry) -> bool:
+        name = entry.item.tool_name or ""
+        window = self.config.context.protected_tools.get(name, 0)
+
+        return self._tool_result_counts.get(name, 0) - entry.ordinal < window
+
+    def live_file_read(self, path: str) -> FileReadRecord | None:
+        return self._file_reads.live_full_read(path)
+
+    def dedupe_file_reads(self) -> int:
+        superseded = self._file_reads.collect_superseded()
+
+        for msg, pointer in superseded:
+            msg.content = pointer
             msg.token_count = count_tokens(msg.content, self._model_name)
-            msg.pruned_at = datetime.now()
-            pruned_count += 1
+            self._tool_outputs.update(msg)
 
-        return pruned_count
+        return len(superseded)
 
     def clear(self) -> None:
         self._messages = []
+        self._reset_indexes()
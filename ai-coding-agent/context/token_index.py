@@ -0,0 +1,104 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from context.manager import MessageItem
+
+
+@dataclass(slots=True)
+class ToolOutputEntry:
+    item: MessageItem
+    ordinal: int
+    is_error: bool = False
+
+
+class ToolOutputIndex:
+    """
+    Positions of prunable tool results with running token totals, kept in a
+    Fenwick tree so that appends, token count updates and "how far back is
+    the protection window" queries are all O(log n).
+    """
+
+    def __init__(self) -> None:
+        self._entries: list[ToolOutputEntry] = []
+        self._values: list[int] = []
+        self._tree: list[int] = [0]
+        self._positions: dict[int, int] = {}
+        self._start = 0
+
+    def __len__(self) -> int:
+        return len(self._entries) - self._start
+
+    def append(self, entry: ToolOutputEntry) -> None:
+        value = entry.item.token_count or 0
+        index = len(self._entries) + 1
+        lowbit = index & -index
+
+        self._positions[id(entry.item)] = len(self._entries)
+        self._entries.append(entry)
+        self._values.append(value)
+        self._tree.append(value + self._prefix(index - 1) - self._prefix(index - lowbit))
+
+    def update(self, item: MessageItem) -> None:
+        position = self._positions.get(id(item))
+        if position is None:
+            return
+
+        delta = (item.token_count or 0) - self._values[position]
+        if not delta:
+            return
+
+        self._values[position] += delta
+        index = position + 1
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def total(self) -> int:
+        return self._prefix(len(self._entries)) - self._prefix(self._start)
+
+    def find_cut(self, protect_tokens: int) -> int:
+        """
+        Return the position up to which entries fall outside the most recent
+        `protect_tokens` worth of tool output.
+        """
+        count = len(self._entries)
+        threshold = self._prefix(count) - protect_tokens
+        if threshold <= 0:
+            return self._start
+
+        # Smallest m with prefix(m) >= threshold; entries before it are outside
+        position = 0
+        remaining = threshold
+        step = 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            nxt = position + step
+            if nxt < len(self._tree) and self._tree[nxt] < remaining:
+                position = nxt
+                remaining -= self._tree[nxt]
+            step >>= 1
+
+        return max(self._start, min(position + 1, count))
+
+    def entries(self, cut: int) -> list[ToolOutputEntry]:
+        return self._entries[self._start : cut]
+
+    def advance(self, cut: int) -> None:
+        for entry in self._entries[self._start : cut]:
+            self._positions.pop(id(entry.item), None)
+        self._start = max(self._start, cut)
+
+    def clear(self) -> None:
+        self._entries = []
+        self._values = []
+        self._tree = [0]
+        self._positions = {}
+        self._start = 0
+
+    def _prefix(self, index: int) -> int:
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
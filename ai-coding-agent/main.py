@@ -14,6 +14,7 @@ from agent.persistence import PersistenceManager, SessionSnapshot
 from agent.session import Session
 from config.config import ApprovalPolicy, Config
 from config.loader import load_config
+from tools.search import TrigramIndex
 from ui.tui import TUI, get_console
 
 console = get_console()
@@ -60,6 +61,7 @@ class CLI:
                     "/stats": "Show session statistics",
                     "/tools": "List available tools",
                     "/mcp": "Show MCP server status",
+                    "/index": "Build, refresh or inspect the search index",
                     "/save": "Save current session",
                     "/checkpoint": "Create a checkpoint",
                     "/checkpoints": "List available checkpoints",
@@ -159,6 +161,12 @@ class CLI:
                     tool_kind,
                     event.data.get("arguments", {}),
                 )
+            elif event.type == AgentEventType.TOOL_CALL_PROGRESS:
+                self.tui.tool_call_progress(
+                    event.data.get("call_id", ""),
+                    event.data.get("name", "unknown"),
+                    event.data.get("output", ""),
+                )
             elif event.type == AgentEventType.TOOL_CALL_COMPLETE:
                 tool_name = event.data.get("name", "unknown")
                 tool_kind = self._get_tool_kind(tool_name)
@@ -261,6 +269,32 @@ class CLI:
                 console.print(
                     f"  • {server['name']}: [{status_color}]{status}[/{status_color}] ({server['tools']} tools)"
                 )
+        elif cmd_name == "/index":
+            index = TrigramIndex.for_workspace(self.config)
+            tree = self.agent.session.tool_registry.workspace
+            action = cmd_args or "status"
+            if action == "build":
+                console.print(f"[info]Building search index for {index.root}...[/info]")
+                stats = await asyncio.to_thread(index.build, tree)
+            elif action == "refresh":
+                stats = await asyncio.to_thread(index.refresh, tree)
+            elif action == "status":
+                if not index.exists():
+                    console.print("[info]No search index. Use /index build[/info]")
+                    return True
+                stats = None
+            else:
+                console.print("[error]Usage: /index \\[build|refresh|status][/error]")
+                return True
+
+            console.print("\n[bold]Search Index[/bold]")
+            console.print(f"   path: {index.db_path}")
+            console.print(f"   enabled for grep: {self.config.search_index.enabled}")
+            if stats:
+                for key, value in stats.__dict__.items():
+                    if isinstance(value, float):
+                        value = f"{value:.2f}"
+                    console.print(f"   {key}: {value}")
         elif cmd_name == "/save":
             persistence_manager = PersistenceManager()
             session_snapshot = SessionSnapshot(
@@ -318,8 +352,7 @@ class CLI:
                                 msg.get("tool_call_id", ""), msg.get("content", "")
                             )
 
-                    await self.agent.session.client.close()
-                    await self.agent.session.mcp_manager.shutdown()
+                    await self.agent.session.close()
 
                     self.agent.session = session
                     console.print(
@@ -372,8 +405,7 @@ class CLI:
                                 msg.get("tool_call_id", ""), msg.get("content", "")
                             )
 
-                    await self.agent.session.client.close()
-                    await self.agent.session.mcp_manager.shutdown()
+                    await self.agent.session.close()
 
                     self.agent.session = session
                     console.print(
@@ -446,10 +478,11 @@ def main(
         finally:
             if telegram_channel:
                 await telegram_channel.stop()
-            if shared_session.client:
-                await shared_session.client.close()
-            if shared_session.mcp_manager:
-                await shared_session.mcp_manager.shutdown()
+            # /resume and /restore replace the CLI's session with a new one
+            agent = cli_instance.agent
+            if agent is not None and agent.session is not None:
+                await agent.session.close()
+            await shared_session.close()
 
     try:
         asyncio.run(run_app())
@@ -8,6 +8,7 @@ def get_system_prompt(
     config: Config,
     user_memory: str | None = None,
     tools: list[Tool] | None = None,
+    repo_map: str | None = None,
 ) -> str:
     parts = []
 
@@ -36,6 +37,11 @@ def get_system_prompt(
     # Operational guidelines
     parts.append(_get_operational_section())
 
+    # Kept last: it is the part most likely to change between sessions, so
+    # the prefix before it stays byte-identical for prompt caching.
+    if repo_map:
+        parts.append(_get_repo_map_section(repo_map))
+
     return "\n\n".join(parts)
 
 
@@ -98,6 +104,15 @@ def _get_agents_md_section() -> str:
 - The contents of the AGENTS.md file at the root of the repo and any directories from the CWD up to the root are included with the developer message and don't need to be re-read. When working in a subdirectory of CWD, or a directory outside the CWD, check for any AGENTS.md files that may be applicable."""
 
 
+def _get_repo_map_section(repo_map: str) -> str:
+    """Generate the repository map section."""
+    return f"""# Repository Map
+
+An overview of the workspace generated at session start: layout, key files and the main top-level definitions per file. Use it to go straight to the relevant files instead of exploring with `list_dir`/`glob`; it may omit files and can be out of date once you edit.
+
+{repo_map}"""
+
+
 def _get_security_section() -> str:
     """Generate security guidelines."""
     return """# Security Guidelines
@@ -254,18 +269,25 @@ You have access to the following tools to accomplish your tasks:
 
 1. **File Operations**:
    - Use `read_file` before editing to understand current content
+   - When you need several files, read them in one `read_many` call instead of one `read_file` per turn
    - Use `edit` for surgical changes (search/replace)
+   - Use `multi_edit` to make several changes to one file in a single call
+   - Use `apply_patch` for changes spanning several files; it applies all of them or none
    - Use `write_file` for creating new files or complete rewrites
 
 2. **Search and Discovery**:
    - Use `grep` to find code by content
    - Use `glob` to find files by name pattern
    - Use `list_dir` to explore directory structure
+   - Use `find_symbol` to locate where a class or function is defined
+   - Use `read_file` with `outline=true` to see the structure of a large module before reading parts of it
 
 3. **Shell Commands**:
    - Use `shell` for running commands, tests, builds
+   - Start long test suites, builds and servers with `background=true` and keep working; check them with `job_status`/`job_output` and stop them with `job_kill`
    - Prefer read-only commands when just gathering information
    - Be cautious with commands that modify state
+   - Large tool outputs are stored as artifacts; use `read_artifact` to page through them
 
 4. **Task Management**:
    - Use `todos` to track multi-step tasks
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Compare bytes per context message for the legacy and slotted MessageItem."""
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context.manager import MessageItem, ToolCallRecord
+
+
+@dataclass
+class LegacyMessageItem:
+    role: str
+    content: str
+    tool_call_id: str | None = None
+    tool_calls: list[dict[str, Any]] = field(default_factory=list)
+    token_count: int | None = None
+    pruned_at: datetime | None = None
+
+
+def _sample_lines(count: int) -> list[str]:
+    lines = []
+
+    for i in range(count):
+        if i % 3 == 0:
+            msg = {"role": "user", "content": f"please look at module_{i}.py"}
+        elif i % 3 == 1:
+            msg = {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [
+                    {
+                        "id": f"call_{i}",
+                        "type": "function",
+                        "function": {
+                            "name": "read_file",
+                            "arguments": json.dumps({"path": f"module_{i}.py"}),
+                        },
+                    }
+                ],
+            }
+        else:
+            msg = {
+                "role": "tool",
+                "tool_call_id": f"call_{i - 1}",
+                "name": "read_file",
+                "content": f"     1|import os\n     2|print({i})",
+            }
+        lines.append(json.dumps(msg))
+
+    return lines
+
+
+def _build_legacy(raw: dict[str, Any]) -> LegacyMessageItem:
+    return LegacyMessageItem(
+        role=raw["role"],
+        content=raw.get("content", ""),
+        tool_call_id=raw.get("tool_call_id"),
+        tool_calls=raw.get("tool_calls") or [],
+        token_count=len(raw.get("content", "")) // 4,
+        pruned_at=datetime.now() if raw["role"] == "tool" else None,
+    )
+
+
+def _build_compact(raw: dict[str, Any]) -> MessageItem:
+    return MessageItem(
+        role=raw["role"],
+        content=raw.get("content", ""),
+        tool_call_id=raw.get("tool_call_id"),
+        tool_name=raw.get("name"),
+        tool_calls=tuple(
+            ToolCallRecord.from_dict(tc) for tc in raw.get("tool_calls") or []
+        ),
+        token_count=len(raw.get("content", "")) // 4,
+        pruned_at=1.0 if raw["role"] == "tool" else None,
+    )
+
+
+def measure(lines: list[str], build) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    items = [build(json.loads(line)) for line in lines]
+
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(items) == len(lines)
+    return (after - before) / len(lines)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    lines = _sample_lines(count)
+
+    legacy = measure(lines, _build_legacy)
+    compact = measure(lines, _build_compact)
+
+    print(f"messages:            {count}")
+    print(f"legacy bytes/msg:    {legacy:.1f}")
+    print(f"compact bytes/msg:   {compact:.1f}")
+    print(f"saved:               {(1 - compact / legacy) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Compare grep over a synthetic repository with and without the trigram index."""
+
+import os
+import random
+import re
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from tools.search import GrepEngine, TrigramIndex
+
+
+def _make_repo(root: Path, files: int) -> None:
+    rng = random.Random(0)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=8)) for _ in range(300)]
+
+    for i in range(files):
+        directory = root / f"pkg_{i // 200}"
+        directory.mkdir(exist_ok=True)
+        body = []
+        for _ in range(200):
+            body.append(" ".join(rng.choices(words, k=8)))
+        if i % 997 == 0:
+            body.append("def needle_function_marker():")
+        (directory / f"mod_{i}.py").write_text("\n".join(body))
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "repo"
+        root.mkdir()
+        _make_repo(root, count)
+
+        config = Config(cwd=root)
+        config.search_index.enabled = True
+        index = TrigramIndex(config, root, Path(tmp) / "index.sqlite")
+
+        stats, build_seconds = _timed(index.build)
+        _, refresh_seconds = _timed(index.refresh)
+
+        pattern = re.compile(r"needle_function_\w+")
+        engine = GrepEngine(pattern)
+
+        full, full_seconds = _timed(lambda: engine.search(root))
+        indexed, indexed_seconds = _timed(
+            lambda: engine.search(root, candidates=index.candidates(pattern, root))
+        )
+        assert full.matches == indexed.matches
+
+        print(f"files:               {count}")
+        print(f"index size:          {stats.db_bytes / 1024 / 1024:.1f} MB")
+        print(f"build:               {build_seconds:.2f}s")
+        print(f"no-op refresh:       {refresh_seconds:.2f}s")
+        print(f"full scan query:     {full_seconds * 1000:.0f} ms ({full.files_searched} files)")
+        print(f"indexed query:       {indexed_seconds * 1000:.0f} ms ({indexed.files_searched} files)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import hashlib
+import mmap
+import os
+from pathlib import Path
+import shutil
+
+from config.config import Config
+from config.loader import get_data_dir
+from tools.base import ToolResult
+
+ARTIFACT_ID_LENGTH = 16
+
+
+@dataclass
+class ArtifactPage:
+    artifact_id: str
+    content: str
+    offset: int
+    next_offset: int
+    total_bytes: int
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_offset < self.total_bytes
+
+
+class ArtifactStore:
+    """
+    Content-addressed on-disk store for large tool outputs. Outputs above the
+    configured threshold are written once, keyed by their hash, and only a
+    preview plus a handle is kept in memory. Pages are served through mmap.
+    """
+
+    def __init__(self, config: Config, root: Path | None = None) -> None:
+        self.config = config
+        self.root = root or get_data_dir() / "artifacts"
+
+    def _path_for(self, artifact_id: str) -> Path:
+        return self.root / f"{artifact_id}.txt"
+
+    def put(self, content: str) -> str:
+        data = content.encode("utf-8")
+        artifact_id = hashlib.sha256(data).hexdigest()[:ARTIFACT_ID_LENGTH]
+        path = self._path_for(artifact_id)
+
+        if path.exists():
+            os.utime(path)
+            return artifact_id
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp_path, path)
+
+        self._enforce_size_cap()
+        return artifact_id
+
+    def put_file(self, source: Path) -> str:
+        """Like `put` for content already on disk; `source` is moved into the store."""
+        digest = hashlib.sha256()
+        with open(source, "rb") as fp:
+            for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+                digest.update(chunk)
+        artifact_id = digest.hexdigest()[:ARTIFACT_ID_LENGTH]
+        path = self._path_for(artifact_id)
+
+        if path.exists():
+            os.utime(path)
+            source.unlink()
+            return artifact_id
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        shutil.move(source, tmp_path)
+        os.replace(tmp_path, path)
+
+        self._enforce_size_cap()
+        return artifact_id
+
+    def exists(self, artifact_id: str) -> bool:
+        return self._valid_id(artifact_id) and self._path_for(artifact_id).is_file()
+
+    def read(self, artifact_id: str, offset: int = 0, limit: int = 16384) -> ArtifactPage:
+        if not self._valid_id(artifact_id):
+            raise ValueError(f"Invalid artifact id: {artifact_id}")
+
+        path = self._path_for(artifact_id)
+        if not path.is_file():
+            raise FileNotFoundError(f"Artifact not found: {artifact_id}")
+
+        with open(path, "rb") as fp:
+            total = os.fstat(fp.fileno()).st_size
+            offset = min(max(0, offset), total)
+            end = min(offset + limit, total)
+
+            if total == 0 or offset == end:
+                chunk = b""
+            else:
+                with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # Do not cut a multi-byte UTF-8 sequence in half at the end
+                    while end < total and (mm[end] & 0xC0) == 0x80:
+                        end -= 1
+                    chunk = mm[offset:end]
+
+        return ArtifactPage(
+            artifact_id=artifact_id,
+            content=chunk.decode("utf-8", errors="replace"),
+            offset=offset,
+            next_offset=end,
+            total_bytes=total,
+        )
+
+    def spill(self, result: ToolResult) -> ToolResult:
+        settings = self.config.artifacts
+        output = result.output
+
+        if not settings.enabled:
+            return result
+        # spill_threshold is in bytes; a character is at most 4 of them.
+        if len(output) * 4 <= settings.spill_threshold:
+            return result
+        total_bytes = len(output.encode("utf-8"))
+        if total_bytes <= settings.spill_threshold:
+            return result
+
+        try:
+            artifact_id = self.put(output)
+        except OSError:
+            return result
+
+        total_lines = output.count("\n") + 1
+        head_chars = settings.preview_chars * 2 // 3
+        tail_chars = settings.preview_chars - head_chars
+
+        result.output = (
+            f"{output[:head_chars]}\n"
+            f"... [{total_bytes} bytes, {total_lines} lines; middle omitted] ...\n"
+            f"{output[-tail_chars:]}\n\n"
+            f"[Full output stored as artifact '{artifact_id}'. "
+            f"Use read_artifact with artifact_id='{artifact_id}' and an offset "
+            f"to page through it.]"
+        )
+        if result.error and len(result.error) > settings.preview_chars:
+            result.error = result.error[: settings.preview_chars] + "\n... [see artifact]"
+
+        result.truncated = True
+        result.metadata = {
+            **result.metadata,
+            "artifact_id": artifact_id,
+            "artifact_bytes": total_bytes,
+        }
+
+        return result
+
+    def _valid_id(self, artifact_id: str) -> bool:
+        return len(artifact_id) == ARTIFACT_ID_LENGTH and all(
+            c in "0123456789abcdef" for c in artifact_id
+        )
+
+    def _enforce_size_cap(self) -> None:
+        try:
+            entries = [
+                (entry.stat().st_mtime, entry.stat().st_size, Path(entry.path))
+                for entry in os.scandir(self.root)
+                if entry.is_file() and entry.name.endswith(".txt")
+            ]
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        if total <= self.config.artifacts.max_store_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            if total <= self.config.artifacts.max_store_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
@@ -3,11 +3,20 @@ import abc
 from pathlib import Path
 from pydantic import BaseModel, ValidationError
 from enum import Enum
-from typing import Any, Awaitable, Callable
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 from dataclasses import dataclass, field
 from pydantic.json_schema import model_json_schema
 
 from config.config import Config
+from utils.diff import DiffResult, unified_diff
+
+if TYPE_CHECKING:
+    from tools.files.content import FileContentCache
+    from tools.files.info import FileInfoCache
+    from tools.files.snapshots import ReadSnapshots
+    from tools.search.tree import WorkspaceTree
+    from tools.shell.jobs import JobManager
+    from tools.shell.memo import CommandCache
 
 
 class ToolKind(str, Enum):
@@ -28,28 +37,23 @@ class FileDiff:
     is_new_file: bool = False
     is_deletion: bool = False
 
-    def to_diff(self) -> str:
-        import difflib
-
-        old_lines = self.old_content.splitlines(keepends=True)
-        new_lines = self.new_content.splitlines(keepends=True)
-
-        if old_lines and not old_lines[-1].endswith("\n"):
-            old_lines[-1] += "\n"
-        if new_lines and not new_lines[-1].endswith("\n"):
-            new_lines[-1] += "\n"
-
-        old_name = "/dev/null" if self.is_new_file else str(self.path)
-        new_name = "/dev/null" if self.is_deletion else str(self.path)
+    _result: DiffResult | None = field(default=None, init=False, repr=False, compare=False)
+
+    def result(self) -> DiffResult:
+        """The diff, computed once per FileDiff and bounded in time and size."""
+        if self._result is None:
+            old_name = "/dev/null" if self.is_new_file else str(self.path)
+            new_name = "/dev/null" if self.is_deletion else str(self.path)
+            self._result = unified_diff(
+                self.old_content,
+                self.new_content,
+                fromfile=old_name,
+                tofile=new_name,
+            )
+        return self._result
 
-        diff = difflib.unified_diff(
-            old_lines,
-            new_lines,
-            fromfile=old_name,
-            tofile=new_name,
-        )
-
-        return "".join(diff)
+    def to_diff(self) -> str:
+        return self.result().text
 
 
 @dataclass
@@ -93,6 +97,16 @@ class ToolInvocation:
     params: dict[str, Any]
     cwd: Path
     ask_user_callback: Callable[[str], Awaitable[str]] | None = None
+    # Receives output produced while the tool runs, e.g. a command's output
+    progress_callback: Callable[[str], None] | None = None
+    workspace: WorkspaceTree | None = None
+    file_info: FileInfoCache | None = None
+    file_cache: FileContentCache | None = None
+    read_snapshots: ReadSnapshots | None = None
+    jobs: JobManager | None = None
+    command_cache: CommandCache | None = None
+    # Work done in get_confirmation that execute may reuse (e.g. an edit plan)
+    prepared: Any = None
 
 
 @dataclass
@@ -111,6 +125,7 @@ class Tool(abc.ABC):
     name: str = "base_tool"
     description: str = "Base tool"
     kind: ToolKind = ToolKind.READ
+    spill_output: bool = True
 
     def __init__(self, config: Config) -> None:
         self.config = config
@@ -123,6 +138,9 @@ class Tool(abc.ABC):
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         pass
 
+    async def close(self) -> None:
+        """Release resources held across calls (processes, connections)."""
+
     def validate_params(self, params: dict[str, Any]) -> list[str]:
         schema = self.schema
         if isinstance(schema, type) and issubclass(schema, BaseModel):
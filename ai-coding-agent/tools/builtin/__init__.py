@@ -1,10 +1,18 @@
+from tools.builtin.apply_patch import ApplyPatchTool
 from tools.builtin.edit_file import EditTool
+from tools.builtin.multi_edit import MultiEditTool
 from tools.builtin.glob import GlobTool
 from tools.builtin.grep import GrepTool
 from tools.builtin.list_dir import ListDirTool
 from tools.builtin.memory import MemoryTool
 from tools.builtin.read_file import ReadFileTool
+from tools.builtin.read_artifact import ReadArtifactTool
+from tools.builtin.read_many import ReadManyTool
+from tools.builtin.find_symbol import FindSymbolTool
 from tools.builtin.shell import ShellTool
+from tools.builtin.job_status import JobStatusTool
+from tools.builtin.job_output import JobOutputTool
+from tools.builtin.job_kill import JobKillTool
 from tools.builtin.todo import TodosTool
 from tools.builtin.web_search import WebSearchTool
 from tools.builtin.write_file import WriteFileTool
@@ -16,7 +24,12 @@ __all__ = [
     "ReadFileTool",
     "WriteFileTool",
     "EditTool",
+    "MultiEditTool",
+    "ApplyPatchTool",
     "ShellTool",
+    "JobStatusTool",
+    "JobOutputTool",
+    "JobKillTool",
     "ListDirTool",
     "GrepTool",
     "GlobTool",
@@ -26,6 +39,9 @@ __all__ = [
     "MemoryTool",
     "AskUserTool",
     "WhisperTool",
+    "ReadArtifactTool",
+    "ReadManyTool",
+    "FindSymbolTool",
 ]
 
 
@@ -34,7 +50,12 @@ def get_all_builtin_tools() -> list[type]:
         ReadFileTool,
         WriteFileTool,
         EditTool,
+        MultiEditTool,
+        ApplyPatchTool,
         ShellTool,
+        JobStatusTool,
+        JobOutputTool,
+        JobKillTool,
         ListDirTool,
         GrepTool,
         GlobTool,
@@ -44,4 +65,7 @@ def get_all_builtin_tools() -> list[type]:
         MemoryTool,
         AskUserTool,
         WhisperTool,
+        ReadArtifactTool,
+        ReadManyTool,
+        FindSymbolTool,
     ]
@@ -0,0 +1,504 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from tools.base import (
+    FileDiff,
+    ToolConfirmation,
+    ToolInvocation,
+    ToolKind,
+    ToolResult,
+    Tool,
+)
+from tools.files import (
+    EditError,
+    FileContentCache,
+    FileTransaction,
+    Replacement,
+    TransactionError,
+)
+from tools.files.matching import EXACT, closest_block
+from utils.paths import resolve_path
+
+
+class PatchAction(Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    RENAME = "rename"
+
+
+@dataclass
+class PatchOperation:
+    action: PatchAction
+    path: Path
+    new_path: Path | None = None  # For renames
+    content: str | None = None  # For create
+    move_path: Path | None = None  # Source for renames
+    hunks: list[tuple[str, str]] = field(default_factory=list)  # For update
+
+    def describe(self) -> str:
+        if self.action == PatchAction.RENAME:
+            return f"Rename: {self.move_path} -> {self.path}"
+        return f"{self.action.value.capitalize()}: {self.path}"
+
+
+@dataclass
+class ParsedPatch:
+    operations: list[PatchOperation]
+    errors: list[str]
+
+
+class ApplyPatchParams(BaseModel):
+    patch: str = Field(..., description="The patch content in the specified format")
+    dry_run: bool = Field(
+        False, description="Preview changes without applying them (default: false)"
+    )
+
+
+class ApplyPatchTool(Tool):
+    """
+    Supports a simple patch format:
+
+    ```
+    *** Begin Patch
+    *** Update File: path/to/file.py
+    <<<<<<< SEARCH
+    old content to find
+    =======
+    new content to replace with
+    >>>>>>> REPLACE
+    *** End Patch
+    ```
+
+    Also supports:
+    - *** Create File: path/to/new/file.py
+    - *** Delete File: path/to/file.py
+    - *** Rename File: old/path.py -> new/path.py
+
+    An Update may hold several SEARCH/REPLACE blocks. The whole patch is
+    validated in memory before anything is written, then committed as one
+    transaction that is rolled back if any file fails.
+    """
+
+    name = "apply_patch"
+    description = (
+        "Apply a multi-file patch. Supports creating, updating, deleting, and "
+        "renaming files in a single operation. **PREFERRED** when editing 2 or more files "
+        "instead of making multiple separate edit calls. The patch is applied all or "
+        "nothing: if any block fails to match, no file is changed.\n\n"
+        "Format:\n"
+        "*** Begin Patch\n"
+        "*** Update File: path/to/file.py\n"
+        "<<<<<<< SEARCH\n"
+        "old content\n"
+        "=======\n"
+        "new content\n"
+        ">>>>>>> REPLACE\n"
+        "*** End Patch\n\n"
+        "An Update File may contain several SEARCH/REPLACE blocks; each SEARCH must "
+        "match exactly one place in the file.\n"
+        "Also supports:\n"
+        "*** Create File: path - creates new file with content after it\n"
+        "*** Delete File: path - deletes the file\n"
+        "*** Rename File: old -> new - renames/moves a file"
+    )
+    kind = ToolKind.WRITE
+    schema = ApplyPatchParams
+
+    PATCH_START = re.compile(r"^\*\*\*\s*Begin\s+Patch\s*$", re.IGNORECASE)
+    PATCH_END = re.compile(r"^\*\*\*\s*End\s+Patch\s*$", re.IGNORECASE)
+    UPDATE_FILE = re.compile(r"^\*\*\*\s*Update\s+File:\s*(.+)$", re.IGNORECASE)
+    CREATE_FILE = re.compile(r"^\*\*\*\s*Create\s+File:\s*(.+)$", re.IGNORECASE)
+    DELETE_FILE = re.compile(r"^\*\*\*\s*Delete\s+File:\s*(.+)$", re.IGNORECASE)
+    RENAME_FILE = re.compile(r"^\*\*\*\s*Rename\s+File:\s*(.+)\s*->\s*(.+)$", re.IGNORECASE)
+
+    SEARCH_START = re.compile(r"^<{7}\s*SEARCH\s*$")
+    SEPARATOR = re.compile(r"^={7}\s*$")
+    REPLACE_END = re.compile(r"^>{7}\s*REPLACE\s*$")
+
+    def _parse_patch(self, patch_text: str, cwd: Path) -> ParsedPatch:
+        operations: list[PatchOperation] = []
+        errors: list[str] = []
+
+        lines = patch_text.splitlines()
+        i = 0
+
+        while i < len(lines):
+            if self.PATCH_START.match(lines[i].strip()):
+                i += 1
+                break
+            i += 1
+        else:
+            i = 0
+
+        while i < len(lines):
+            line = lines[i].strip()
+
+            if self.PATCH_END.match(line):
+                break
+
+            if not line:
+                i += 1
+                continue
+
+            if match := self.UPDATE_FILE.match(line):
+                path = resolve_path(cwd, match.group(1).strip())
+                i += 1
+                op, i, err = self._parse_update(lines, i, path)
+                if err:
+                    errors.append(err)
+                elif op:
+                    operations.append(op)
+
+            elif match := self.CREATE_FILE.match(line):
+                path = resolve_path(cwd, match.group(1).strip())
+                i += 1
+                content, i = self._read_until_next_operation(lines, i)
+                operations.append(
+                    PatchOperation(
+                        action=PatchAction.CREATE,
+                        path=path,
+                        content=content,
+                    )
+                )
+
+            elif match := self.DELETE_FILE.match(line):
+                path = resolve_path(cwd, match.group(1).strip())
+                operations.append(
+                    PatchOperation(
+                        action=PatchAction.DELETE,
+                        path=path,
+                    )
+                )
+                i += 1
+
+            elif match := self.RENAME_FILE.match(line):
+                old_path = resolve_path(cwd, match.group(1).strip())
+                new_path = resolve_path(cwd, match.group(2).strip())
+                operations.append(
+                    PatchOperation(
+                        action=PatchAction.RENAME,
+                        path=new_path,
+                        move_path=old_path,
+                    )
+                )
+                i += 1
+
+            else:
+                i += 1
+
+        return ParsedPatch(operations=operations, errors=errors)
+
+    def _parse_update(
+        self,
+        lines: list[str],
+        start: int,
+        path: Path,
+    ) -> tuple[PatchOperation | None, int, str | None]:
+        """Parse an update operation's search/replace blocks."""
+        i = start
+        hunks: list[tuple[str, str]] = []
+
+        while True:
+            while i < len(lines) and not self.SEARCH_START.match(lines[i].strip()):
+                if hunks and self._is_directive(lines[i].strip()):
+                    break
+                i += 1
+            if i >= len(lines) or not self.SEARCH_START.match(lines[i].strip()):
+                break
+            i += 1
+
+            search_lines = []
+            while i < len(lines) and not self.SEPARATOR.match(lines[i].strip()):
+                search_lines.append(lines[i])
+                i += 1
+            if i >= len(lines):
+                return None, i, f"Missing ======= separator for {path}"
+            i += 1
+
+            replace_lines = []
+            while i < len(lines) and not self.REPLACE_END.match(lines[i].strip()):
+                replace_lines.append(lines[i])
+                i += 1
+            if i >= len(lines):
+                return None, i, f"Missing >>>>>>> REPLACE for {path}"
+            i += 1
+
+            hunks.append(("\n".join(search_lines), "\n".join(replace_lines)))
+
+        if not hunks:
+            return None, i, f"Missing <<<<<<< SEARCH for {path}"
+
+        return PatchOperation(action=PatchAction.UPDATE, path=path, hunks=hunks), i, None
+
+    def _is_directive(self, line: str) -> bool:
+        return bool(
+            self.UPDATE_FILE.match(line)
+            or self.CREATE_FILE.match(line)
+            or self.DELETE_FILE.match(line)
+            or self.RENAME_FILE.match(line)
+            or self.PATCH_END.match(line)
+        )
+
+    def _read_until_next_operation(
+        self,
+        lines: list[str],
+        start: int,
+    ) -> tuple[str, int]:
+        """Read content until the next operation directive."""
+        content_lines = []
+        i = start
+
+        while i < len(lines):
+            line = lines[i]
+
+            if self._is_directive(line.strip()):
+                break
+
+            content_lines.append(line)
+            i += 1
+
+        while content_lines and not content_lines[-1].strip():
+            content_lines.pop()
+
+        return "\n".join(content_lines), i
+
+    def _parsed(self, invocation: ToolInvocation) -> ParsedPatch:
+        # Parsed once; execute reuses the result from get_confirmation.
+        if isinstance(invocation.prepared, ParsedPatch):
+            return invocation.prepared
+
+        params = ApplyPatchParams(**invocation.params)
+        parsed = self._parse_patch(params.patch, invocation.cwd)
+        invocation.prepared = parsed
+        return parsed
+
+    async def get_confirmation(
+        self,
+        invocation: ToolInvocation,
+    ) -> ToolConfirmation | None:
+        try:
+            parsed = self._parsed(invocation)
+        except Exception:
+            return None
+
+        if parsed.errors:
+            return None
+
+        affected_paths = []
+        descriptions = []
+
+        for op in parsed.operations:
+            affected_paths.append(op.path)
+            if op.move_path:
+                affected_paths.append(op.move_path)
+            descriptions.append(op.describe())
+
+        return ToolConfirmation(
+            tool_name=self.name,
+            params=invocation.params,
+            description="\n".join(descriptions) if descriptions else "Apply patch",
+            affected_paths=affected_paths,
+            is_dangerous=any(op.action == PatchAction.DELETE for op in parsed.operations),
+        )
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        try:
+            params = ApplyPatchParams(**invocation.params)
+            parsed = self._parsed(invocation)
+        except Exception as e:
+            return ToolResult.error_result(f"Invalid parameters: {e}")
+
+        if parsed.errors:
+            return ToolResult.error_result(
+                "Patch parsing errors:\n" + "\n".join(f"- {e}" for e in parsed.errors)
+            )
+
+        if not parsed.operations:
+            return ToolResult.error_result("No operations found in patch")
+
+        file_cache = invocation.file_cache or FileContentCache(self.config.file_cache)
+        groups = self._group(parsed.operations)
+
+        # Validate every group in memory, concurrently; nothing is written
+        # unless all of them succeed.
+        staged = await asyncio.gather(
+            *(asyncio.to_thread(self._stage, group, file_cache) for group in groups)
+        )
+
+        errors = [error for _, _, group_errors in staged for error in group_errors]
+        if errors:
+            return ToolResult.error_result(
+                "Patch not applied; no files were changed:\n"
+                + "\n".join(f"- {e}" for e in errors),
+                metadata={"operations": len(parsed.operations), "failed": len(errors)},
+            )
+
+        transactions = [tx for tx, _, _ in staged]
+        validate_ms = {}
+        match_notes = {}
+        for _, op_timings, _ in staged:
+            for op, seconds, notes in op_timings:
+                validate_ms[id(op)] = round(seconds * 1000, 2)
+                match_notes[id(op)] = notes
+
+        if not params.dry_run:
+            results = await asyncio.gather(
+                *(asyncio.to_thread(tx.commit) for tx in transactions),
+                return_exceptions=True,
+            )
+            failures = [r for r in results if isinstance(r, BaseException)]
+            if failures:
+                for tx, result in zip(transactions, results):
+                    if not isinstance(result, BaseException):
+                        tx.rollback()
+                return ToolResult.error_result(
+                    "Patch failed while writing and was rolled back; no files were changed:\n"
+                    + "\n".join(f"- {e}" for e in failures)
+                )
+
+            for tx in transactions:
+                tx.discard_backups()
+
+            commit_ms = {
+                path: round(seconds * 1000, 2)
+                for result in results
+                for path, seconds in result.items()
+            }
+        else:
+            commit_ms = {}
+
+        diffs = [
+            FileDiff(
+                path=staged_file.path,
+                old_content=tx.original_text(staged_file.path),
+                new_content=staged_file.content or "",
+                is_new_file=staged_file.info is None,
+                is_deletion=not staged_file.exists,
+            )
+            for tx in transactions
+            for staged_file in tx.files
+            if staged_file.changed and staged_file.source is None
+        ]
+
+        lines = []
+        timings = []
+        for op in parsed.operations:
+            lines.append(f"- {self._past_tense(op)} ({validate_ms[id(op)]} ms)")
+            lines.extend(f"  Note: {note}" for note in match_notes[id(op)])
+            timings.append(
+                {"operation": op.describe(), "validate_ms": validate_ms[id(op)]}
+            )
+
+        prefix = "[DRY RUN] " if params.dry_run else ""
+        return ToolResult.success_result(
+            f"{prefix}Applied patch with {len(parsed.operations)} operation(s):\n"
+            + "\n".join(lines),
+            diff=diffs[0] if len(diffs) == 1 else None,
+            metadata={
+                "operations": len(parsed.operations),
+                "dry_run": params.dry_run,
+                "groups": len(groups),
+                "timings": timings,
+                "commit_ms": commit_ms,
+            },
+        )
+
+    def _group(self, operations: list[PatchOperation]) -> list[list[PatchOperation]]:
+        """Split operations into groups that touch disjoint sets of files."""
+        parent: dict[Path, Path] = {}
+
+        def find(path: Path) -> Path:
+            parent.setdefault(path, path)
+            while parent[path] != path:
+                parent[path] = parent[parent[path]]
+                path = parent[path]
+            return path
+
+        for op in operations:
+            root = find(op.path)
+            if op.move_path is not None:
+                parent[find(op.move_path)] = root
+
+        groups: dict[Path, list[PatchOperation]] = {}
+        for op in operations:
+            groups.setdefault(find(op.path), []).append(op)
+
+        return list(groups.values())
+
+    def _stage(
+        self,
+        operations: list[PatchOperation],
+        file_cache: FileContentCache,
+    ) -> tuple[FileTransaction, list[tuple[PatchOperation, float, list[str]]], list[str]]:
+        tx = FileTransaction(file_cache)
+        timings: list[tuple[PatchOperation, float, list[str]]] = []
+        errors: list[str] = []
+
+        for op in operations:
+            start = time.perf_counter()
+            notes: list[str] = []
+            try:
+                if op.action == PatchAction.CREATE:
+                    tx.create(op.path, op.content or "")
+                elif op.action == PatchAction.UPDATE:
+                    matches = tx.update(
+                        op.path,
+                        [Replacement(search, replace) for search, replace in op.hunks],
+                    )
+                    notes = [m.describe() for m in matches if m.strategy != EXACT]
+                elif op.action == PatchAction.DELETE:
+                    tx.delete(op.path)
+                elif op.action == PatchAction.RENAME:
+                    tx.rename(op.move_path, op.path)
+            except EditError as e:
+                errors.append(self._hunk_error(op, e, tx))
+            except (TransactionError, OSError) as e:
+                errors.append(f"{op.describe()}: {e}")
+            timings.append((op, time.perf_counter() - start, notes))
+
+        return tx, timings, errors
+
+    def _hunk_error(
+        self,
+        op: PatchOperation,
+        error: EditError,
+        tx: FileTransaction,
+    ) -> str:
+        if error.index is None:
+            return f"{op.describe()}: {error.message}"
+
+        block = f"SEARCH block {error.index + 1}"
+        if error.occurrences == 0:
+            message = f"{op.describe()}: {block} not found in file"
+            closest = closest_block(tx.text(op.path), op.hunks[error.index][0])
+            if closest is not None:
+                first, last, similarity = closest
+                message += (
+                    f"; closest is lines {first}-{last} ({similarity:.0%} similar)"
+                )
+            return message
+        if error.occurrences:
+            return (
+                f"{op.describe()}: {block} matches {error.occurrences} places; "
+                "add surrounding lines to make it unique"
+            )
+        return f"{op.describe()}: {block} is empty"
+
+    def _past_tense(self, op: PatchOperation) -> str:
+        if op.action == PatchAction.RENAME:
+            return f"Renamed: {op.move_path} -> {op.path}"
+        verb = {
+            PatchAction.CREATE: "Created",
+            PatchAction.UPDATE: "Updated",
+            PatchAction.DELETE: "Deleted",
+        }[op.action]
+        return f"{verb}: {op.path}"
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Any
 from tools.base import (
     FileDiff,
     Tool,
@@ -9,6 +10,14 @@ from tools.base import (
 )
 from pydantic import BaseModel, Field
 
+from tools.files import (
+    EditError,
+    EditPlan,
+    FileContentCache,
+    Replacement,
+    apply_replacements,
+)
+from tools.files.matching import closest_block
 from utils.paths import ensure_parent_directory, resolve_path
 
 
@@ -19,7 +28,7 @@ class EditParams(BaseModel):
     )
     old_string: str = Field(
         "",
-        description="The exact text to find and replace. Must match exactly including all whitespace and indentation. For new files, leave this empty.",
+        description="The exact text to find and replace, including whitespace and indentation. For new files, leave this empty.",
     )
     new_string: str = Field(
         ...,
@@ -33,83 +42,114 @@ class EditParams(BaseModel):
 class EditTool(Tool):
     name = "edit"
     description = (
-        "Edit a file by replacing text. The old_string must match exactly "
-        "(including whitespace and indentation) and must be unique in the file "
-        "unless replace_all is true. Use this for precise, surgical edits. "
+        "Edit a file by replacing text. The old_string should match exactly "
+        "and must be unique in the file unless replace_all is true; small "
+        "whitespace or indentation differences are tolerated and reported. "
+        "Use this for precise, surgical edits. "
+        "For several changes to one file, use multi_edit instead. "
         "For creating new files or complete rewrites, use write_file instead."
     )
     kind = ToolKind.WRITE
     schema = EditParams
 
-    async def get_confirmation(
-        self,
-        invocation: ToolInvocation,
-    ) -> ToolConfirmation | None:
-        params = EditParams(**invocation.params)
-        path = resolve_path(invocation.cwd, params.path)
+    def _replacements(self, params: dict[str, Any]) -> list[Replacement]:
+        edit = EditParams(**params)
+        return [Replacement(edit.old_string, edit.new_string, edit.replace_all)]
 
-        is_new_file = not path.exists()
+    def _new_file_content(self, params: dict[str, Any]) -> str | None:
+        """Content for a file that does not exist yet, or None if not allowed."""
+        edit = EditParams(**params)
+        return None if edit.old_string else edit.new_string
 
-        if is_new_file:
-            diff = FileDiff(
-                path=path,
-                old_content="",
-                new_content=params.new_string,
-                is_new_file=True,
-            )
-
-            return ToolConfirmation(
-                tool_name=self.name,
-                params=invocation.params,
-                description=f"Create new file: {path}",
-                diff=diff,
-                affected_paths=[path],
-            )
+    def _plan(self, invocation: ToolInvocation) -> EditPlan:
+        """
+        Read the file once and apply every replacement in memory. The plan
+        made during confirmation is reused by execute while the file is
+        unchanged on disk.
+        """
+        prepared = invocation.prepared
+        if isinstance(prepared, EditPlan) and prepared.is_current():
+            return prepared
 
-        old_content = path.read_text(encoding="utf-8")
+        path = resolve_path(invocation.cwd, invocation.params["path"])
 
-        if params.replace_all:
-            new_content = old_content.replace(params.old_string, params.new_string)
+        if not path.exists():
+            content = self._new_file_content(invocation.params)
+            if content is None:
+                raise EditError(
+                    f"File does not exist: {path}. To create a new file, use an empty old_string."
+                )
+            plan = EditPlan(path=path, old_content="", new_content=content)
         else:
-            new_content = old_content.replace(params.old_string, params.new_string, 1)
+            file_cache = invocation.file_cache or FileContentCache(self.config.file_cache)
+            info, old_content = file_cache.read_text(path)
+            if old_content is None:
+                raise EditError(f"Cannot edit binary file: {path}")
+
+            replacements = self._replacements(invocation.params)
+            if len(replacements) == 1 and not replacements[0].old:
+                raise EditError(
+                    "old_string is empty but file exists. Provide old_string to edit, or use write_file to overwrite."
+                )
 
-        diff = FileDiff(
-            path=path,
-            old_content=old_content,
-            new_content=new_content,
-        )
+            new_content, matches = apply_replacements(old_content, replacements)
+            plan = EditPlan(
+                path=path,
+                old_content=old_content,
+                new_content=new_content,
+                matches=matches,
+                info=info,
+            )
+
+        invocation.prepared = plan
+        return plan
+
+    async def get_confirmation(
+        self,
+        invocation: ToolInvocation,
+    ) -> ToolConfirmation | None:
+        try:
+            plan = self._plan(invocation)
+        except (EditError, OSError):
+            # execute reports the error without touching the file
+            return None
 
         return ToolConfirmation(
             tool_name=self.name,
             params=invocation.params,
-            description=f"Edit file: {path}",
-            diff=diff,
-            affected_paths=[path],
+            description=(
+                f"Create new file: {plan.path}"
+                if plan.is_new_file
+                else f"Edit file: {plan.path}"
+            ),
+            diff=self._file_diff(plan),
+            affected_paths=[plan.path],
         )
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
-        params = EditParams(**invocation.params)
-        path = resolve_path(invocation.cwd, params.path)
+        file_cache = invocation.file_cache or FileContentCache(self.config.file_cache)
 
-        if not path.exists():
-            if params.old_string:
-                return ToolResult.error_result(
-                    f"File does not exist: {path}. To create a new file, use an empty old_string."
-                )
+        try:
+            plan = self._plan(invocation)
+        except EditError as e:
+            return self._edit_error(e, invocation)
+        except OSError as e:
+            return ToolResult.error_result(f"Failed to read file: {e}")
 
-            ensure_parent_directory(path)
-            path.write_text(params.new_string, encoding="utf-8")
+        path = plan.path
 
-            line_count = len(params.new_string.splitlines())
+        if plan.is_new_file:
+            try:
+                ensure_parent_directory(path)
+                file_cache.write_text(path, plan.new_content)
+            except OSError as e:
+                return ToolResult.error_result(f"failed to write file: {e}")
+
+            line_count = len(plan.new_content.splitlines())
 
             return ToolResult.success_result(
                 f"Created {path} {line_count} lines",
-                diff=FileDiff(
-                    path=path,
-                    old_content="",
-                    new_content=params.new_string,
-                    is_new_file=True,
-                ),
+                diff=self._file_diff(plan),
                 metadata={
                     "path": str(path),
                     "is_new_file": True,
@@ -117,48 +157,20 @@ class EditTool(Tool):
                 },
             )
 
-        old_content = path.read_text(encoding="utf-8")
-
-        if not params.old_string:
-            return ToolResult.error_result(
-                "old_string is empty but file exists. Provide old_string to edit, or use write_file to overwrite."
-            )
-
-        occurrence_count = old_content.count(params.old_string)
-
-        if occurrence_count == 0:
-            return self._no_match_error(params.old_string, old_content, path)
-
-        if occurrence_count > 1 and not params.replace_all:
-            return ToolResult.error_result(
-                f"old_string found {occurrence_count} times in {path}. "
-                f"Either: \n"
-                f"1. Provide more context to make the match unique or\n"
-                f"2. Set replace_all=true to replace all occurrences",
-                metadata={
-                    "occurence_count": occurrence_count,
-                },
-            )
-
-        if params.replace_all:
-            new_content = old_content.replace(params.old_string, params.new_string)
-            replace_count = occurrence_count
-        else:
-            new_content = old_content.replace(params.old_string, params.new_string, 1)
-            replace_count = 1
-
-        if new_content == old_content:
+        if plan.new_content == plan.old_content:
             return ToolResult.error_result(
                 "No change made - old_string equals new_string"
             )
 
         try:
-            path.write_text(new_content, encoding="utf-8")
-        except IOError as e:
+            file_cache.write_text(
+                path, plan.new_content, plan.info.encoding, plan.info.newline
+            )
+        except OSError as e:
             return ToolResult.error_result(f"failed to write file: {e}")
 
-        old_lines = len(old_content.splitlines())
-        new_lines = len(new_content.splitlines())
+        old_lines = len(plan.old_content.splitlines())
+        new_lines = len(plan.new_content.splitlines())
         line_diff = new_lines - old_lines
 
         diff_msg = ""
@@ -168,18 +180,85 @@ class EditTool(Tool):
         elif line_diff < 0:
             diff_msg = f" ({line_diff} lines)"
 
+        notes = "".join(f"\nNote: {match.describe()}" for match in plan.loose_matches)
+
         return ToolResult.success_result(
-            f"Edited {path}: replaced {replace_count} occurrence(s){diff_msg}",
-            diff=FileDiff(path=path, old_content=old_content, new_content=new_content),
+            f"Edited {path}: replaced {plan.replaced} occurrence(s){diff_msg}{notes}",
+            diff=self._file_diff(plan),
             metadata={
                 "path": str(path),
-                "replaced_count": replace_count,
+                "replaced_count": plan.replaced,
                 "line_diff": line_diff,
+                "matches": [
+                    {
+                        "strategy": match.strategy,
+                        "first_line": match.first_line,
+                        "last_line": match.last_line,
+                        "similarity": round(match.similarity, 3),
+                    }
+                    for match in plan.matches
+                ],
             },
         )
 
+    def _file_diff(self, plan: EditPlan) -> FileDiff:
+        if plan.diff is None:
+            plan.diff = FileDiff(
+                path=plan.path,
+                old_content=plan.old_content,
+                new_content=plan.new_content,
+                is_new_file=plan.is_new_file,
+            )
+        return plan.diff
+
+    def _edit_error(self, error: EditError, invocation: ToolInvocation) -> ToolResult:
+        path = resolve_path(invocation.cwd, invocation.params["path"])
+        replacements = self._replacements(invocation.params)
+        prefix = ""
+        if error.index is not None and len(replacements) > 1:
+            prefix = f"Edit {error.index + 1}: "
+
+        if error.occurrences == 0:
+            _, content = (
+                invocation.file_cache or FileContentCache(self.config.file_cache)
+            ).read_text(path)
+            result = self._no_match_error(
+                replacements[error.index].old, content or "", path
+            )
+            result.error = prefix + result.error
+            return result
+
+        if error.occurrences:
+            return ToolResult.error_result(
+                f"{prefix}old_string found {error.occurrences} times in {path}. "
+                f"Either: \n"
+                f"1. Provide more context to make the match unique or\n"
+                f"2. Set replace_all=true to replace all occurrences",
+                metadata={
+                    "occurence_count": error.occurrences,
+                    "edit_index": error.index,
+                },
+            )
+
+        return ToolResult.error_result(prefix + error.message)
+
     def _no_match_error(self, old_string: str, content: str, path: Path) -> ToolResult:
         lines = content.splitlines()
+        error_msg = f"old_string not found in {path}."
+
+        closest = closest_block(content, old_string)
+        if closest is not None:
+            first, last, similarity = closest
+            preview = "\n".join(
+                f"{i:6}|{line}"
+                for i, line in enumerate(lines[first - 1 : min(last, first + 9)], first)
+            )
+            error_msg += (
+                f"\n\nClosest match, lines {first}-{last} ({similarity:.0%} similar):\n"
+                f"{preview}\n\n"
+                "Copy the text from these lines into old_string."
+            )
+            return ToolResult.error_result(error_msg)
 
         partial_matches = []
         search_terms = old_string.split()[:5]
@@ -192,8 +271,6 @@ class EditTool(Tool):
                     if len(partial_matches) >= 3:
                         break
 
-        error_msg = f"old_string not found in {path}."
-
         if partial_matches:
             error_msg += "\n\nPossible similar lines:"
             for line_num, line_preview in partial_matches:
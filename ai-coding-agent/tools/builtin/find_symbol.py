@@ -0,0 +1,68 @@
+import asyncio
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
+from tools.symbols import SymbolIndex
+
+
+class FindSymbolParams(BaseModel):
+    name: str = Field(..., min_length=1, description="Symbol name (or part of it) to look up")
+    kind: str | None = Field(
+        None,
+        description="Only return this kind: class, function, method, variable, type, ...",
+    )
+    exact: bool = Field(
+        False,
+        description="Match the name exactly instead of by substring (default: false)",
+    )
+    limit: int = Field(50, ge=1, le=200, description="Maximum results (default: 50)")
+
+
+class FindSymbolTool(Tool):
+    name = "find_symbol"
+    description = (
+        "Find where classes, functions, methods and other definitions are declared "
+        "in the workspace, using a persistent symbol index. Faster and more precise "
+        "than grep for locating definitions."
+    )
+    kind = ToolKind.READ
+    schema = FindSymbolParams
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = FindSymbolParams(**invocation.params)
+        index = SymbolIndex.for_workspace(self.config)
+
+        try:
+            await asyncio.to_thread(
+                index.refresh, invocation.workspace, invocation.file_info
+            )
+            locations = await asyncio.to_thread(
+                index.find, params.name, params.kind, params.exact, params.limit
+            )
+        except Exception as e:
+            return ToolResult.error_result(f"Symbol index unavailable: {e}")
+
+        if not locations:
+            return ToolResult.success_result(
+                f"No definitions found for '{params.name}'",
+                metadata={"matches": 0},
+            )
+
+        lines = []
+        for location in locations:
+            symbol = location.symbol
+            try:
+                path = str(Path(location.path).relative_to(invocation.cwd))
+            except ValueError:
+                path = location.path
+
+            owner = f"  (in {symbol.parent})" if symbol.parent else ""
+            lines.append(f"{path}:{symbol.line}  {symbol.kind}  {symbol.signature}{owner}")
+
+        return ToolResult.success_result(
+            "\n".join(lines),
+            truncated=len(locations) >= params.limit,
+            metadata={"matches": len(locations)},
+        )
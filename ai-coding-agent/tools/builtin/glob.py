@@ -1,10 +1,12 @@
-import os
-from pathlib import Path
-import re
+import asyncio
+from itertools import islice
 from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from pydantic import BaseModel, Field
 
-from utils.paths import is_binary_file, resolve_path
+from tools.search import WorkspaceTree
+from utils.paths import resolve_path
+
+MAX_RESULTS = 1000
 
 
 class GlobParams(BaseModel):
@@ -17,7 +19,8 @@ class GlobParams(BaseModel):
 class GlobTool(Tool):
     name = "glob"
     description = (
-        "Find files matching a glob pattern. Supports ** for recursive matching."
+        "Find files matching a glob pattern. Supports ** for recursive matching. "
+        "Honors .gitignore and .ignore files."
     )
     kind = ToolKind.READ
     schema = GlobParams
@@ -30,15 +33,21 @@ class GlobTool(Tool):
         if not search_path.exists() or not search_path.is_dir():
             return ToolResult.error_result(f"Directory does not exist: {search_path}")
 
+        workspace = invocation.workspace or WorkspaceTree()
+
         try:
-            matches = list(search_path.glob(params.pattern))
-            matches = [p for p in matches if p.is_file()]
+            matches = await asyncio.to_thread(
+                lambda: list(
+                    islice(workspace.glob(search_path, params.pattern), MAX_RESULTS + 1)
+                )
+            )
         except Exception as e:
             return ToolResult.error_result(f"Error searching: {e}")
 
+        truncated = len(matches) > MAX_RESULTS
         output_lines = []
 
-        for file_path in matches[:1000]:
+        for file_path in matches[:MAX_RESULTS]:
             try:
                 rel_path = file_path.relative_to(invocation.cwd)
             except Exception:
@@ -46,35 +55,14 @@ class GlobTool(Tool):
 
             output_lines.append(str(rel_path))
 
-        if len(matches) > 1000:
-            output_lines.append(f"...(limited to 1000 results)")
+        if truncated:
+            output_lines.append(f"...(limited to {MAX_RESULTS} results)")
 
         return ToolResult.success_result(
             "\n".join(output_lines),
             metadata={
                 "path": str(search_path),
-                "matches": len(matches),
+                "matches": min(len(matches), MAX_RESULTS),
+                "truncated": truncated,
             },
         )
-
-    def _find_files(self, search_path: Path) -> list[Path]:
-        files = []
-
-        for root, dirs, filenames in os.walk(search_path):
-            dirs[:] = [
-                d
-                for d in dirs
-                if d not in {"node_modules", "__pycache__", ".git", ".venv", "venv"}
-            ]
-
-            for filename in filenames:
-                if filename.startswith("."):
-                    continue
-
-                file_path = Path(root) / filename
-                if not is_binary_file(file_path):
-                    files.append(file_path)
-                    if len(files) >= 500:
-                        return files
-
-        return files
@@ -1,10 +1,14 @@
-import os
+import asyncio
+import logging
 from pathlib import Path
 import re
 from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from pydantic import BaseModel, Field
 
-from utils.paths import is_binary_file, resolve_path
+from tools.search import GrepEngine, TrigramIndex, WorkspaceTree
+from utils.paths import resolve_path
+
+logger = logging.getLogger(__name__)
 
 
 class GrepParams(BaseModel):
@@ -16,11 +20,26 @@ class GrepParams(BaseModel):
         False,
         description="Case-insensitive search (default: false)",
     )
+    max_matches: int = Field(
+        500,
+        ge=1,
+        le=5000,
+        description="Stop after this many matching lines in total (default: 500)",
+    )
+    max_matches_per_file: int = Field(
+        50,
+        ge=1,
+        le=1000,
+        description="Maximum matching lines reported per file (default: 50)",
+    )
 
 
 class GrepTool(Tool):
     name = "grep"
-    description = "Search for a regex pattern in file contents. Returns matching lines with file paths and line numbers."
+    description = (
+        "Search for a regex pattern in file contents. Returns matching lines with "
+        "file paths and line numbers. Honors .gitignore and .ignore files."
+    )
     kind = ToolKind.READ
     schema = GrepParams
 
@@ -38,80 +57,82 @@ class GrepTool(Tool):
         except re.error as e:
             return ToolResult.error_result(f"Invalid regex pattern: {e}")
 
-        if search_path.is_dir():
-            files = self._find_files(search_path)
-        else:
-            files = [search_path]
+        engine = GrepEngine(
+            pattern,
+            max_matches=params.max_matches,
+            max_matches_per_file=params.max_matches_per_file,
+            file_info=invocation.file_info,
+        )
+        workspace = invocation.workspace or WorkspaceTree()
+        result = await asyncio.to_thread(
+            self._search, engine, pattern, search_path, workspace
+        )
 
-        output_lines = []
-        matches = 0
+        metadata = {
+            "path": str(search_path),
+            "matches": result.matches,
+            "files_searched": result.files_searched,
+            "truncated": result.truncated,
+        }
 
-        for file_path in files:
-            try:
-                content = file_path.read_text(encoding="utf-8")
-            except Exception:
-                continue
-
-            lines = content.splitlines()
-            file_matches = False
-
-            # === path.py ===
-            # 1: async def execute()
-            # 30: async def execute()
-
-            # === path2.py ===
-            # 1: async def execute()
-            # 30: async def execute()
-            for i, line in enumerate(lines, start=1):
-                if pattern.search(line):
-                    matches += 1
-                    if not file_matches:
-                        rel_path = file_path.relative_to(invocation.cwd)
-                        output_lines.append(f"=== {rel_path} ===")
-                        file_matches = True
-
-                    output_lines.append(f"{i}:{line}")
-
-            if file_matches:
-                output_lines.append("")
-
-        if not output_lines:
+        if not result.files:
             return ToolResult.success_result(
                 f"No matches found for pattern '{params.pattern}'",
-                metadata={
-                    "path": str(search_path),
-                    "matches": 0,
-                    "files_searched": len(files),
-                },
+                metadata=metadata,
+            )
+
+        # === path.py ===
+        # 1: async def execute()
+        # 30: async def execute()
+        output_lines = []
+        for file_matches in result.files:
+            try:
+                rel_path = file_matches.path.relative_to(invocation.cwd)
+            except ValueError:
+                rel_path = file_matches.path
+
+            output_lines.append(f"=== {rel_path} ===")
+            for line_number, line in file_matches.lines:
+                output_lines.append(f"{line_number}:{line}")
+            if file_matches.truncated:
+                output_lines.append(
+                    f"... (more matches in this file, limited to {params.max_matches_per_file})"
+                )
+            output_lines.append("")
+
+        if result.truncated:
+            output_lines.append(
+                f"...(stopped after {result.matches} matches; narrow the pattern or path)"
             )
 
         return ToolResult.success_result(
             "\n".join(output_lines),
-            metadata={
-                "path": str(search_path),
-                "matches": matches,
-                "files_searched": len(files),
-            },
+            truncated=result.truncated,
+            metadata=metadata,
         )
 
-    def _find_files(self, search_path: Path) -> list[Path]:
-        files = []
-
-        for root, dirs, filenames in os.walk(search_path):
-            dirs[:] = [
-                d
-                for d in dirs
-                if d not in {"node_modules", "__pycache__", ".git", ".venv", "venv"}
-            ]
-
-            for filename in filenames:
-                if filename.startswith("."):
-                    continue
-
-                file_path = Path(root) / filename
-                if not is_binary_file(file_path):
-                    files.append(file_path)
-                    if len(files) >= 500:
-                        return files
-
-        return files
+    def _search(
+        self,
+        engine: GrepEngine,
+        pattern: re.Pattern[str],
+        search_path: Path,
+        workspace: WorkspaceTree,
+    ):
+        if search_path.is_file():
+            return engine.search(search_path)
+
+        candidates = None
+
+        if self.config.search_index.enabled:
+            index = TrigramIndex.for_workspace(self.config)
+            if index.exists() and index.covers(search_path):
+                try:
+                    candidates = index.candidates(pattern, search_path, workspace)
+                except Exception:
+                    logger.warning("Search index unavailable, falling back to a full scan")
+                    candidates = None
+
+        if candidates is None:
+            candidates = workspace.iter_files(search_path)
+
+        return engine.search(search_path, candidates)
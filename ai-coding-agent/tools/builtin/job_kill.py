@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+
+from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
+from tools.shell import JobError
+
+
+class JobKillParams(BaseModel):
+    job_id: str = Field(..., description="Job id returned by shell with background=true")
+
+
+class JobKillTool(Tool):
+    name = "job_kill"
+    description = (
+        "Stop a background shell job and everything it started (SIGTERM, then "
+        "SIGKILL if it does not exit). Its output stays readable with job_output."
+    )
+    kind = ToolKind.SHELL
+    schema = JobKillParams
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = JobKillParams(**invocation.params)
+        if invocation.jobs is None:
+            return ToolResult.error_result("Background jobs are not available here")
+
+        try:
+            job = await invocation.jobs.kill(params.job_id)
+        except JobError as e:
+            return ToolResult.error_result(str(e))
+
+        return ToolResult.success_result(
+            job.describe(),
+            metadata={"job_id": job.id, "status": job.status},
+            exit_code=job.exit_code,
+        )
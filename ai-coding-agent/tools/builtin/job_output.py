@@ -0,0 +1,64 @@
+from pydantic import BaseModel, Field
+
+from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
+from tools.shell import JobError
+
+
+class JobOutputParams(BaseModel):
+    job_id: str = Field(..., description="Job id returned by shell with background=true")
+    offset: int | None = Field(
+        None,
+        ge=0,
+        description=(
+            "Byte offset to read from, e.g. the previous call's next offset to get "
+            "only new output (default: the end of the output)"
+        ),
+    )
+    limit: int = Field(
+        8192,
+        ge=256,
+        le=65536,
+        description="Maximum number of bytes to return (default: 8192)",
+    )
+
+
+class JobOutputTool(Tool):
+    name = "job_output"
+    description = (
+        "Read the combined stdout and stderr of a background shell job. Without "
+        "an offset returns the latest output; pass the reported next offset to "
+        "read only what was written since."
+    )
+    kind = ToolKind.READ
+    schema = JobOutputParams
+    spill_output = False
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = JobOutputParams(**invocation.params)
+        if invocation.jobs is None:
+            return ToolResult.error_result("Background jobs are not available here")
+
+        try:
+            job = invocation.jobs.get(params.job_id)
+            page = invocation.jobs.read(params.job_id, params.offset, params.limit)
+        except (JobError, OSError) as e:
+            return ToolResult.error_result(str(e))
+
+        header = (
+            f"{job.describe()}\n"
+            f"Output bytes {page.offset}-{page.next_offset} of {page.total_bytes}"
+            f" | next offset: {page.next_offset}"
+        )
+
+        return ToolResult.success_result(
+            f"{header}\n\n{page.text}" if page.text else f"{header}\n\n(no new output)",
+            truncated=page.has_more,
+            metadata={
+                "job_id": job.id,
+                "status": job.status,
+                "offset": page.offset,
+                "next_offset": page.next_offset,
+                "total_bytes": page.total_bytes,
+            },
+            exit_code=job.exit_code,
+        )
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+
+from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
+from tools.shell import JobError
+
+
+class JobStatusParams(BaseModel):
+    job_id: str | None = Field(
+        None,
+        description="Job id returned by shell with background=true (default: list all jobs)",
+    )
+
+
+class JobStatusTool(Tool):
+    name = "job_status"
+    description = (
+        "Show whether background shell jobs are still running, their exit "
+        "codes and how much output they have written."
+    )
+    kind = ToolKind.READ
+    schema = JobStatusParams
+    spill_output = False
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = JobStatusParams(**invocation.params)
+        if invocation.jobs is None:
+            return ToolResult.error_result("Background jobs are not available here")
+
+        try:
+            jobs = [invocation.jobs.get(params.job_id)] if params.job_id else invocation.jobs.jobs
+        except JobError as e:
+            return ToolResult.error_result(str(e))
+
+        if not jobs:
+            return ToolResult.success_result("No background jobs", metadata={"jobs": 0})
+
+        return ToolResult.success_result(
+            "\n".join(job.describe() for job in jobs),
+            metadata={
+                "jobs": len(jobs),
+                "running": sum(1 for job in jobs if job.running),
+            },
+            exit_code=jobs[0].exit_code if params.job_id else None,
+        )
@@ -1,6 +1,7 @@
 from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from pydantic import BaseModel, Field
 
+from tools.search import WorkspaceTree
 from utils.paths import resolve_path
 
 
@@ -28,12 +29,12 @@ class ListDirTool(Tool):
         if not dir_path.exists() or not dir_path.is_dir():
             return ToolResult.error_result(f"Directory does not exist: {dir_path}")
 
-        try:
-            items = sorted(
-                dir_path.iterdir(), key=lambda p: (not p.is_dir(), p.name.lower())
-            )
-        except Exception as e:
-            return ToolResult.error_result(f"Error listing directory: {e}")
+        workspace = invocation.workspace or WorkspaceTree()
+        entries = workspace.listdir(dir_path)
+        if entries is None:
+            return ToolResult.error_result(f"Error listing directory: {dir_path}")
+
+        items = sorted(entries, key=lambda e: (not e.is_dir, e.name.lower()))
 
         if not params.include_hidden:
             items = [item for item in items if not item.name.startswith(".")]
@@ -46,7 +47,7 @@ class ListDirTool(Tool):
         lines = []
 
         for item in items:
-            if item.is_dir():
+            if item.is_dir:
                 lines.append(f"{item.name}/")
             else:
                 lines.append(item.name)
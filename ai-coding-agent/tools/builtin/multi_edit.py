@@ -0,0 +1,59 @@
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from tools.builtin.edit_file import EditTool
+from tools.files import Replacement
+
+
+class MultiEditParams(BaseModel):
+    path: str = Field(
+        ...,
+        description="Path to the file to edit (relative to working directory or absolute path)",
+    )
+    edits: list[dict[str, Any]] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description=(
+            "Replacements to apply, each an object with 'old_string', 'new_string' "
+            "and optional 'replace_all' (default false). Every old_string is matched "
+            "against the file as it is before any of the edits, and matches must not overlap."
+        ),
+    )
+
+
+class MultiEditTool(EditTool):
+    name = "multi_edit"
+    description = (
+        "Apply several replacements to one file in a single call. All edits are "
+        "checked first and written together, so either every edit is applied or "
+        "none is. Each old_string follows the same rules as in edit."
+    )
+    schema = MultiEditParams
+
+    def validate_params(self, params: dict[str, Any]) -> list[str]:
+        errors = super().validate_params(params)
+        if errors:
+            return errors
+
+        for i, edit in enumerate(params.get("edits", []), 1):
+            if not isinstance(edit.get("old_string"), str) or not edit["old_string"]:
+                errors.append(f"Parameter 'edits.{i}.old_string': must be a non-empty string")
+            if not isinstance(edit.get("new_string"), str):
+                errors.append(f"Parameter 'edits.{i}.new_string': must be a string")
+
+        return errors
+
+    def _replacements(self, params: dict[str, Any]) -> list[Replacement]:
+        return [
+            Replacement(
+                edit["old_string"],
+                edit["new_string"],
+                bool(edit.get("replace_all", False)),
+            )
+            for edit in MultiEditParams(**params).edits
+        ]
+
+    def _new_file_content(self, params: dict[str, Any]) -> str | None:
+        return None
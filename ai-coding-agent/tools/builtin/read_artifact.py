@@ -0,0 +1,64 @@
+from pydantic import BaseModel, Field
+
+from config.config import Config
+from tools.artifacts import ArtifactStore
+from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
+
+
+class ReadArtifactParams(BaseModel):
+    artifact_id: str = Field(
+        ..., description="Artifact id reported in a previous tool output"
+    )
+    offset: int = Field(
+        0,
+        ge=0,
+        description="Byte offset to start reading from (default: 0)",
+    )
+    limit: int = Field(
+        16384,
+        ge=1024,
+        le=65536,
+        description="Maximum number of bytes to return (default: 16384)",
+    )
+
+
+class ReadArtifactTool(Tool):
+    name = "read_artifact"
+    description = (
+        "Page through the full content of a large tool output that was stored "
+        "as an artifact. Use the artifact_id from the truncated output and "
+        "increase offset to continue reading."
+    )
+    kind = ToolKind.READ
+    schema = ReadArtifactParams
+    spill_output = False
+
+    def __init__(self, config: Config) -> None:
+        super().__init__(config)
+        self._store = ArtifactStore(config)
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = ReadArtifactParams(**invocation.params)
+
+        try:
+            page = self._store.read(params.artifact_id, params.offset, params.limit)
+        except (ValueError, FileNotFoundError) as e:
+            return ToolResult.error_result(str(e))
+
+        header = (
+            f"Artifact {page.artifact_id}: bytes {page.offset}-{page.next_offset} "
+            f"of {page.total_bytes}"
+        )
+        if page.has_more:
+            header += f" | next offset: {page.next_offset}"
+
+        return ToolResult.success_result(
+            f"{header}\n\n{page.content}",
+            truncated=page.has_more,
+            metadata={
+                "artifact_id": page.artifact_id,
+                "offset": page.offset,
+                "next_offset": page.next_offset,
+                "total_bytes": page.total_bytes,
+            },
+        )
@@ -1,7 +1,19 @@
+import asyncio
+from pathlib import Path
 from pydantic import BaseModel, Field
 
-from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
-from utils.paths import is_binary_file, resolve_path
+from tools.base import FileDiff, Tool, ToolInvocation, ToolKind, ToolResult
+from tools.files import (
+    LINE_INDEX_ENCODINGS,
+    FileContentCache,
+    FileInfo,
+    FileInfoCache,
+    ReadSnapshot,
+    read_line_range,
+    split_lines,
+)
+from tools.symbols.outline import extract_symbols, format_outline, language_for
+from utils.paths import resolve_path
 from utils.text import count_tokens, truncate_text
 
 
@@ -21,7 +33,26 @@ class ReadFileParams(BaseModel):
     limit: int | None = Field(
         None,
         ge=1,
-        description="Maximum number of lines to read. If not specified, reads entire file.",
+        description=(
+            "Maximum number of lines to read. If not specified, reads entire file. "
+            "Required for files over 10MB."
+        ),
+    )
+
+    outline: bool = Field(
+        False,
+        description=(
+            "Return only the file's structure (classes, functions and signatures "
+            "with line numbers) instead of its content (default: false)"
+        ),
+    )
+
+    full: bool = Field(
+        False,
+        description=(
+            "Return the whole file even if the copy already in context is "
+            "unchanged or only slightly changed (default: false)"
+        ),
     )
 
 
@@ -30,14 +61,19 @@ class ReadFileTool(Tool):
     description = (
         "Read the contents of a text file. Returns the file content with line numbers. "
         "For large files, use offset and limit to read specific portions. "
+        "Use outline=true to get classes/functions with line numbers first. "
+        "Re-reading a file already in context returns a diff against that copy. "
         "Cannot read binary files (images, executables, etc.)."
     )
     kind = ToolKind.READ
+    spill_output = False
 
     schema = ReadFileParams
 
     MAX_FILE_SIZE = 1024 * 1024 * 10
     MAX_OUTPUT_TOKENS = 25000
+    INDEX_MIN_BYTES = 256 * 1024
+    MAX_RANGE_BYTES = MAX_OUTPUT_TOKENS * 4
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         params = ReadFileParams(**invocation.params)
@@ -49,15 +85,17 @@ class ReadFileTool(Tool):
         if not path.is_file():
             return ToolResult.error_result(f"Path is not a file: {path}")
 
-        file_size = path.stat().st_size
+        file_info = invocation.file_info or FileInfoCache()
+        # Disk I/O runs off the event loop, so concurrent reads (read_many)
+        # overlap.
+        info = await asyncio.to_thread(file_info.get, path)
 
-        if file_size > self.MAX_FILE_SIZE:
-            return ToolResult.error_result(
-                f"File too large ({file_size / (1024*1024):.1f}MB). "
-                f"Maximum is {self.MAX_FILE_SIZE / (1024*1024):.0f}MB."
-            )
+        if info is None:
+            return ToolResult.error_result(f"Failed to read file: {path}")
+
+        file_size = info.size
 
-        if is_binary_file(path):
+        if info.is_binary:
             file_size_mb = file_size / (1024 * 1024)
             size_str = (
                 f"{file_size_mb:.2f}MB" if file_size_mb >= 1 else f"{file_size} bytes"
@@ -67,14 +105,66 @@ class ReadFileTool(Tool):
                 f"This tool only reads text files."
             )
 
+        # Large files are served through a line-offset index so a page
+        # costs the same however deep into the file it is.
+        ranged = (
+            file_size >= self.INDEX_MIN_BYTES
+            and info.encoding in LINE_INDEX_ENCODINGS
+        )
+
+        if file_size > self.MAX_FILE_SIZE and not (ranged and params.limit):
+            hint = " Use offset and limit to read a range." if ranged else ""
+            return ToolResult.error_result(
+                f"File too large ({file_size / (1024*1024):.1f}MB). "
+                f"Maximum is {self.MAX_FILE_SIZE / (1024*1024):.0f}MB.{hint}"
+            )
+
+        if params.outline:
+            return self._outline(path, file_info, invocation)
+
         try:
-            try:
-                content = path.read_text(encoding="utf-8")
-            except UnicodeDecodeError:
-                content = path.read_text(encoding="latin-1")
+            start_idx = params.offset - 1
+            whole_file = start_idx == 0 and params.limit is None
+            range_truncated = False
+
+            if ranged:
+                page = await asyncio.to_thread(
+                    read_line_range,
+                    path,
+                    info,
+                    start_idx,
+                    params.limit,
+                    self.MAX_RANGE_BYTES,
+                )
+                selected_lines = page.lines
+                total_lines = page.total_lines
+                range_truncated = page.truncated
+            else:
+                file_cache = invocation.file_cache or FileContentCache(
+                    self.config.file_cache, file_info
+                )
+                info, content = await asyncio.to_thread(file_cache.read_text, path)
+                if content is None:
+                    return ToolResult.error_result(
+                        f"Cannot read binary file: {path.name}"
+                    )
 
-            lines = content.splitlines()
-            total_lines = len(lines)
+                if whole_file and not params.full:
+                    earlier = self._since_last_read(path, info, content, invocation)
+                    if earlier is not None:
+                        return earlier
+
+                # The same line numbers as the ranged path and grep
+                lines = split_lines(content)
+                total_lines = len(lines)
+                info.line_count = total_lines
+
+                if params.limit is not None:
+                    end_idx = min(start_idx + params.limit, total_lines)
+                else:
+                    end_idx = total_lines
+
+                selected_lines = lines[start_idx:end_idx]
 
             if total_lines == 0:
                 return ToolResult.success_result(
@@ -84,14 +174,7 @@ class ReadFileTool(Tool):
                     },
                 )
 
-            start_idx = max(0, params.offset - 1)
-
-            if params.limit is not None:
-                end_idx = min(start_idx + params.limit, total_lines)
-            else:
-                end_idx = total_lines
-
-            selected_lines = lines[start_idx:end_idx]
+            end_idx = min(start_idx + len(selected_lines), total_lines)
             formatted_lines = []
 
             for i, line in enumerate(selected_lines, start=start_idx + 1):
@@ -100,10 +183,11 @@ class ReadFileTool(Tool):
             output = "\n".join(formatted_lines)
             token_count = count_tokens(output)
 
-            truncated = False
+            truncated = range_truncated
             if token_count > self.MAX_OUTPUT_TOKENS:
                 output = truncate_text(
                     output,
+                    "",
                     self.MAX_OUTPUT_TOKENS,
                     suffix=f"\n... [truncated {total_lines} total lines]",
                 )
@@ -114,11 +198,28 @@ class ReadFileTool(Tool):
                 metadata_lines.append(
                     f"Showing lines {start_idx+1}-{end_idx} of {total_lines}"
                 )
+            if range_truncated:
+                metadata_lines.append(
+                    f"Output limited to {self.MAX_RANGE_BYTES} bytes; "
+                    f"continue with offset={end_idx + 1}"
+                )
 
             if metadata_lines:
                 header = " | ".join(metadata_lines) + "\n\n"
                 output = header + output
 
+            if not ranged and whole_file and not truncated and invocation.read_snapshots:
+                session = getattr(self, "session", None)
+                invocation.read_snapshots.put(
+                    str(path),
+                    ReadSnapshot(
+                        text=content,
+                        mtime_ns=info.mtime_ns,
+                        size=info.size,
+                        turn=session.turn_count if session else 0,
+                    ),
+                )
+
             return ToolResult.success_result(
                 output=output,
                 truncated=truncated,
@@ -127,7 +228,101 @@ class ReadFileTool(Tool):
                     "total_lines": total_lines,
                     "shown_start": start_idx + 1,
                     "shown_end": end_idx,
+                    "mtime_ns": info.mtime_ns,
+                    "size": info.size,
+                    "encoding": info.encoding,
+                    "truncated": truncated,
                 },
             )
         except Exception as e:
             return ToolResult.error_result(f"Failed to read file: {e}")
+
+    def _outline(
+        self,
+        path: Path,
+        file_info: FileInfoCache,
+        invocation: ToolInvocation,
+    ) -> ToolResult:
+        if language_for(str(path)) is None:
+            return ToolResult.error_result(
+                f"No outline available for {path.name}; read it with offset and limit instead"
+            )
+
+        file_cache = invocation.file_cache or FileContentCache(
+            self.config.file_cache, file_info
+        )
+        try:
+            info, content = file_cache.read_text(path)
+        except OSError as e:
+            return ToolResult.error_result(f"Failed to read file: {e}")
+
+        if content is None:
+            return ToolResult.error_result(f"Cannot read binary file: {path.name}")
+
+        if info.symbols is None:
+            info.symbols = extract_symbols(str(path), content)
+
+        total_lines = len(split_lines(content))
+        output = format_outline(info.symbols) or "No definitions found."
+
+        return ToolResult.success_result(
+            f"Outline of {path.name} ({total_lines} lines, {len(info.symbols)} symbols)\n\n"
+            + output,
+            metadata={
+                "path": str(path),
+                "outline": True,
+                "total_lines": total_lines,
+                "symbols": len(info.symbols),
+            },
+        )
+
+    def _since_last_read(
+        self,
+        path: Path,
+        info: FileInfo,
+        content: str,
+        invocation: ToolInvocation,
+    ) -> ToolResult | None:
+        """
+        If the whole file is still in context from an earlier read, answer
+        with "unchanged" or a diff against that copy instead of the full text.
+        """
+        session = getattr(self, "session", None)
+        snapshots = invocation.read_snapshots
+        if snapshots is None or session is None or session.context_manager is None:
+            return None
+
+        key = str(path)
+        snapshot = snapshots.get(key)
+        record = session.context_manager.live_file_read(key)
+        if snapshot is None or record is None:
+            return None
+        if (record.mtime_ns, record.size) != (snapshot.mtime_ns, snapshot.size):
+            return None
+
+        metadata = {
+            "path": key,
+            "since_turn": snapshot.turn,
+            "mtime_ns": info.mtime_ns,
+            "size": info.size,
+        }
+
+        if snapshot.text == content:
+            return ToolResult.success_result(
+                f"File unchanged since it was read in turn {snapshot.turn}; "
+                "that content is still in context. Pass full=true to read it again.",
+                metadata=metadata,
+            )
+
+        diff = FileDiff(path=path, old_content=snapshot.text, new_content=content)
+        result = diff.result()
+        diff_text = result.text
+        if not result.complete or count_tokens(diff_text) * 2 > count_tokens(content):
+            return None
+
+        return ToolResult.success_result(
+            f"File changed since it was read in turn {snapshot.turn}. "
+            f"Diff against that version:\n\n{diff_text}",
+            diff=diff,
+            metadata=metadata,
+        )
@@ -0,0 +1,234 @@
+import asyncio
+from itertools import islice
+from pathlib import Path
+import re
+
+from pydantic import BaseModel, Field
+
+from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
+from tools.builtin.read_file import ReadFileTool
+from tools.search import WorkspaceTree
+from tools.symbols.outline import language_for
+from utils.paths import resolve_path
+from utils.text import count_tokens
+
+_RANGE_SUFFIX = re.compile(r":(\d+)(?:-(\d+))?$")
+_GLOB_MAGIC = re.compile(r"[*?\[]")
+# Files read at once; each read is a worker thread
+MAX_CONCURRENT_READS = 8
+
+
+class ReadManyParams(BaseModel):
+    paths: list[str] = Field(
+        ...,
+        min_length=1,
+        description=(
+            "Files or glob patterns to read, relative to the working directory. "
+            "Append :START-END to read a line range, e.g. 'src/app.py:120-180'."
+        ),
+    )
+    max_files: int = Field(
+        20,
+        ge=1,
+        le=100,
+        description="Maximum number of files to read (default: 20)",
+    )
+    max_tokens: int = Field(
+        20000,
+        ge=1000,
+        le=ReadFileTool.MAX_OUTPUT_TOKENS,
+        description="Token budget shared by all files (default: 20000)",
+    )
+
+
+class ReadManyTool(Tool):
+    name = "read_many"
+    description = (
+        "Read several files (or glob matches) in one call. Supports per-file line "
+        "ranges with path:START-END. Output shares one token budget; files that "
+        "do not fit are shown as an outline or cut to their first lines."
+    )
+    kind = ToolKind.READ
+    spill_output = False
+    schema = ReadManyParams
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = ReadManyParams(**invocation.params)
+        workspace = invocation.workspace or WorkspaceTree()
+
+        try:
+            targets = await asyncio.to_thread(
+                self._expand, invocation.cwd, params.paths, params.max_files, workspace
+            )
+        except ValueError as e:
+            return ToolResult.error_result(f"Invalid path pattern: {e}")
+
+        if not targets:
+            return ToolResult.error_result("No files matched the given paths")
+
+        reader = ReadFileTool(self.config)
+        limit = asyncio.Semaphore(MAX_CONCURRENT_READS)
+
+        async def read(read_invocation: ToolInvocation) -> ToolResult:
+            async with limit:
+                return await reader.execute(read_invocation)
+
+        results = await asyncio.gather(
+            *(
+                read(
+                    ToolInvocation(
+                        params=self._read_params(path, start, end),
+                        cwd=invocation.cwd,
+                        workspace=invocation.workspace,
+                        file_info=invocation.file_info,
+                        file_cache=invocation.file_cache,
+                    )
+                )
+                for path, start, end in targets
+            )
+        )
+
+        sections = []
+        for (path, _, _), result in zip(targets, results):
+            body = result.output if result.success else f"Error: {result.error}"
+            sections.append((self._display_path(path, invocation.cwd), body))
+
+        sizes = [count_tokens(body) for _, body in sections]
+        budgets = self._allocate(sizes, params.max_tokens)
+
+        # Whole files that will not fit are shown as an outline when that
+        # fits, which says more about the file than its first few lines.
+        outlined = [
+            i
+            for i, ((path, start, _), result) in enumerate(zip(targets, results))
+            if result.success
+            and start is None
+            and sizes[i] > budgets[i]
+            and language_for(str(path)) is not None
+        ]
+        outlines = await asyncio.gather(
+            *(
+                read(
+                    ToolInvocation(
+                        params={"path": str(targets[i][0]), "outline": True},
+                        cwd=invocation.cwd,
+                        file_info=invocation.file_info,
+                        file_cache=invocation.file_cache,
+                    )
+                )
+                for i in outlined
+            )
+        )
+        outline_by_index = {
+            i: result.output for i, result in zip(outlined, outlines) if result.success
+        }
+
+        output = []
+        cut_files = []
+        for i, ((name, body), tokens, budget) in enumerate(
+            zip(sections, sizes, budgets)
+        ):
+            if tokens > budget:
+                outline = outline_by_index.get(i)
+                if outline and count_tokens(outline) <= budget:
+                    body = (
+                        outline
+                        + "\n... [file too large for the shared budget; "
+                        "use read_file with offset/limit for the bodies]"
+                    )
+                else:
+                    body = self._head(body, tokens, budget)
+                cut_files.append(name)
+            output.append(f"=== {name} ===\n{body}")
+
+        return ToolResult.success_result(
+            "\n\n".join(output),
+            truncated=bool(cut_files),
+            metadata={
+                "files": [name for name, _ in sections],
+                "failed": sum(1 for r in results if not r.success),
+                "cut_files": cut_files,
+            },
+        )
+
+    def _expand(
+        self,
+        cwd: Path,
+        entries: list[str],
+        max_files: int,
+        workspace: WorkspaceTree,
+    ) -> list[tuple[Path, int | None, int | None]]:
+        targets: list[tuple[Path, int | None, int | None]] = []
+        seen: set[tuple[Path, int | None, int | None]] = set()
+
+        for entry in entries:
+            start = end = None
+            match = _RANGE_SUFFIX.search(entry)
+            if match:
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else start
+                entry = entry[: match.start()]
+
+            if _GLOB_MAGIC.search(entry):
+                paths = list(islice(workspace.glob(cwd, entry), max_files))
+            else:
+                paths = [resolve_path(cwd, entry)]
+
+            for path in paths:
+                key = (path, start, end)
+                if key in seen:
+                    continue
+                seen.add(key)
+                targets.append(key)
+                if len(targets) >= max_files:
+                    return targets
+
+        return targets
+
+    def _read_params(self, path: Path, start: int | None, end: int | None) -> dict:
+        params: dict = {"path": str(path)}
+        if start is not None:
+            params["offset"] = max(1, start)
+            params["limit"] = max(1, (end or start) - start + 1)
+        return params
+
+    def _display_path(self, path: Path, cwd: Path) -> str:
+        try:
+            return str(path.relative_to(cwd))
+        except ValueError:
+            return str(path)
+
+    def _allocate(self, sizes: list[int], budget: int) -> list[int]:
+        # Water-filling: small files get what they need, the rest of the
+        # budget is split evenly among the larger ones.
+        allocation = [0] * len(sizes)
+        remaining = budget
+        pending = sorted(range(len(sizes)), key=lambda i: sizes[i])
+
+        while pending:
+            share = remaining // len(pending)
+            i = pending[0]
+            if sizes[i] <= share:
+                allocation[i] = sizes[i]
+                remaining -= sizes[i]
+                pending.pop(0)
+                continue
+
+            for i in pending:
+                allocation[i] = share
+            break
+
+        return allocation
+
+    def _head(self, body: str, tokens: int, budget: int) -> str:
+        lines = body.splitlines()
+        keep = max(1, int(len(lines) * budget / max(1, tokens)) - 1)
+
+        while keep > 1 and count_tokens("\n".join(lines[:keep])) > budget:
+            keep = keep * 3 // 4
+
+        return (
+            "\n".join(lines[:keep])
+            + f"\n... [cut to {keep} of {len(lines)} lines to fit the shared budget; "
+            "use read_file with offset/limit for the rest]"
+        )
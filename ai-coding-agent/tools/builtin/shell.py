@@ -1,12 +1,36 @@
 import asyncio
+import logging
 import os
 from pathlib import Path
 import signal
 import sys
+import tempfile
+from typing import Any, Callable
+from tools.artifacts import ArtifactStore
 from tools.base import Tool, ToolConfirmation, ToolInvocation, ToolKind, ToolResult
+from tools.shell import (
+    CommandCache,
+    CommandResult,
+    JobError,
+    JobManager,
+    OutputBuffer,
+    ProgressReporter,
+    ResourceLimiter,
+    ResourceUsage,
+    ShellSession,
+    condense_output,
+    pump,
+)
+from utils.text import count_tokens
+from config.config import Config
 from pydantic import BaseModel, Field
 import fnmatch
 
+logger = logging.getLogger(__name__)
+
+# Spilled output up to this size is read back in full for condensing
+MAX_CONDENSE_BYTES = 8 * 1024 * 1024
+
 BLOCKED_COMMANDS = {
     "rm -rf /",
     "rm -rf ~",
@@ -33,16 +57,43 @@ class ShellParams(BaseModel):
     timeout: int = Field(
         120, ge=1, le=600, description="Timeout in seconds (default: 120)"
     )
-    cwd: str | None = Field(None, description="Working directory for the command")
+    cwd: str | None = Field(
+        None,
+        description="Working directory for this command only (default: the current one)",
+    )
+    background: bool = Field(
+        False,
+        description=(
+            "Run in the background and return a job id at once, for test suites, "
+            "builds and servers. Check it with job_status and job_output, stop it "
+            "with job_kill. timeout does not apply."
+        ),
+    )
 
 
 class ShellTool(Tool):
     name = "shell"
     kind = ToolKind.SHELL
-    description = "Execute a shell command. Use this for running system commands, scripts and CLI tools."
-
     schema = ShellParams
 
+    def __init__(self, config: Config) -> None:
+        super().__init__(config)
+        self._session: ShellSession | None = None
+        self._environment: dict[str, str] | None = None
+        self._limiter = ResourceLimiter(config.shell_environment)
+        self._artifacts = ArtifactStore(config)
+
+    @property
+    def description(self) -> str:
+        description = "Execute a shell command. Use this for running system commands, scripts and CLI tools."
+        if self._persistent:
+            description += (
+                " Commands run in one persistent shell: the working directory, exported"
+                " variables and activated virtualenvs carry over between calls"
+                " (background jobs start a separate shell)."
+            )
+        return description
+
     async def get_confirmation(
         self, invocation: ToolInvocation
     ) -> ToolConfirmation | None:
@@ -87,60 +138,337 @@ class ShellTool(Tool):
         if not cwd.exists():
             return ToolResult.error_result(f"Working directory doesn't exist: {cwd}")
 
-        env = self._build_environment()
-        if sys.platform == "win32":
-            shell_cmd = ["cmd.exe", "/c", params.command]
+        cache = invocation.command_cache
+        state = None
+        if cache is not None and cache.enabled:
+            if not cache.read_only(params.command):
+                cache.invalidate()
+            elif (
+                cache.cacheable(params.command)
+                and not params.background
+                and not self._jobs_running(invocation.jobs)
+            ):
+                # Running jobs may change files at any moment.
+                state = cache.state(params.command, cwd)
+                hit = cache.get(params.command, cwd, state)
+                if hit is not None:
+                    return self._cached_result(hit.result, hit.age)
+
+        if params.background:
+            return await self._start_job(params.command, cwd, invocation.jobs)
+
+        progress = ProgressReporter(invocation.progress_callback)
+        if self._persistent:
+            session = self._get_session(invocation.cwd)
+            result = await session.run(
+                params.command,
+                params.timeout,
+                cwd=cwd if params.cwd else None,
+                progress=progress,
+                spill=self.config.artifacts.enabled,
+            )
         else:
-            shell_cmd = ["/bin/bash", "-c", params.command]
-
-        process = await asyncio.create_subprocess_exec(
-            *shell_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=cwd,
-            env=env,
-            start_new_session=True,
+            result = await self._run_process(params.command, params.timeout, cwd, progress)
+        progress.flush()
+
+        stdout, stderr = result.stdout, result.stderr
+        try:
+            output, metadata = await asyncio.to_thread(
+                self._condense, params.command, stdout, stderr, result.exit_code
+            )
+        finally:
+            stdout.discard()
+            stderr.discard()
+        metadata.update(stdout_bytes=stdout.total, stderr_bytes=stderr.total)
+        if self._persistent:
+            metadata["session_restarted"] = result.restarted
+        if result.usage is not None:
+            metadata.update(result.usage.to_metadata())
+
+        if result.timed_out:
+            error = f"Command timed out after {params.timeout}s"
+            if self._persistent:
+                error += " (the shell session was restarted; cwd and environment were reset)"
+            return ToolResult.error_result(
+                error,
+                output=output,
+                metadata={**metadata, "timed_out": True},
+                truncated=stdout.truncated or stderr.truncated,
+            )
+
+        exit_code = result.exit_code
+        error = None
+        if exit_code != 0:
+            error = stderr.text()
+            xcpu = getattr(signal, "SIGXCPU", None)
+            if xcpu is not None and exit_code in (-xcpu, 128 + xcpu):
+                limit = self.config.shell_environment.cpu_time_limit
+                error = error.rstrip() + "\n" if error.strip() else ""
+                error += f"Killed after exceeding the CPU time limit ({limit}s)"
+
+        tool_result = ToolResult(
+            success=exit_code == 0,
+            output=output,
+            error=error,
+            metadata=metadata,
+            truncated=stdout.truncated or stderr.truncated,
+            exit_code=exit_code,
+        )
+        if state is not None:
+            cache.put(params.command, cwd, state, tool_result)
+        return tool_result
+
+    @staticmethod
+    def _jobs_running(jobs: JobManager | None) -> bool:
+        return jobs is not None and any(job.running for job in jobs.jobs)
+
+    @staticmethod
+    def _cached_result(result: ToolResult, age: float) -> ToolResult:
+        note = (
+            f"[Cached result from {age:.0f}s ago: nothing the command reads has "
+            "changed since, so it was not run again.]"
+        )
+        return ToolResult(
+            success=result.success,
+            output=f"{result.output}\n\n{note}" if result.output else note,
+            error=result.error,
+            metadata={**result.metadata, "cached": True, "cache_age": round(age, 1)},
+            truncated=result.truncated,
+            exit_code=result.exit_code,
         )
 
+    def _condense(
+        self,
+        command: str,
+        stdout: OutputBuffer,
+        stderr: OutputBuffer,
+        exit_code: int | None,
+    ) -> tuple[str, dict[str, Any]]:
+        """
+        The output for the model, condensed when a known tool produced it.
+        The raw output is kept as an artifact whenever the model gets less
+        than all of it: when it was condensed or too large to return. Output
+        is only condensed when that artifact can be stored.
+        """
+        output = self._format_output(stdout, stderr, exit_code)
+        metadata: dict[str, Any] = {}
+        spilled = stdout.spill_path is not None or stderr.spill_path is not None
+
+        raw_path = self._raw_output_file(stdout, stderr) if spilled else None
         try:
-            stdout_data, stderr_data = await asyncio.wait_for(
-                process.communicate(),
-                timeout=params.timeout,
+            # Condensers get the command's output alone; the exit code is
+            # added back afterwards.
+            text = self._format_output(stdout, stderr, None)
+            if raw_path is not None and raw_path.stat().st_size <= MAX_CONDENSE_BYTES:
+                text = raw_path.read_text(encoding="utf-8", errors="replace")
+
+            condensed = None
+            if self.config.shell_environment.condense_output and self.config.artifacts.enabled:
+                condensed = condense_output(command, text)
+
+            artifact_id = None
+            if self.config.artifacts.enabled and (condensed or spilled):
+                try:
+                    if raw_path is not None:
+                        artifact_id = self._artifacts.put_file(raw_path)
+                        raw_path = None
+                    else:
+                        artifact_id = self._artifacts.put(output)
+                except OSError:
+                    logger.warning("Failed to store raw shell output", exc_info=True)
+                    # Without the raw output the summary would be all there is.
+                    condensed = None
+        finally:
+            if raw_path is not None:
+                raw_path.unlink(missing_ok=True)
+
+        if condensed is not None:
+            model = self.config.model_name
+            saved = count_tokens(output, model) - count_tokens(condensed.text, model)
+            output = condensed.text
+            if exit_code:
+                output += f"\nExit code: {exit_code}"
+            output += (
+                f"\n\n[{condensed.condenser} output condensed from "
+                f"{condensed.original_lines} to {condensed.lines} lines, ~{saved} tokens saved."
+            )
+            metadata.update(
+                condensed=condensed.condenser,
+                original_lines=condensed.original_lines,
+                tokens_saved=saved,
             )
+        elif artifact_id is not None:
+            output += "\n\n[Output was too large to return in full."
+
+        if artifact_id is not None:
+            output += (
+                f" Raw output stored as artifact '{artifact_id}'; use read_artifact "
+                f"with artifact_id='{artifact_id}' to page through it.]"
+            )
+            metadata["raw_artifact_id"] = artifact_id
+        elif condensed is not None:
+            output += "]"
+
+        return output, metadata
+
+    def _raw_output_file(self, stdout: OutputBuffer, stderr: OutputBuffer) -> Path:
+        fd, path = tempfile.mkstemp(prefix="agent-shell-", suffix=".raw")
+        with os.fdopen(fd, "wb") as fp:
+            stdout.copy_to(fp)
+            if stderr.total:
+                fp.write(b"\n--- stderr ---\n")
+                stderr.copy_to(fp)
+        return Path(path)
+
+    async def _start_job(
+        self,
+        command: str,
+        cwd: Path,
+        jobs: JobManager | None,
+    ) -> ToolResult:
+        if jobs is None or sys.platform == "win32":
+            return ToolResult.error_result("Background jobs are not available here")
+
+        try:
+            job = await jobs.start(command, cwd, self._build_environment(), self._limiter)
+        except JobError as e:
+            return ToolResult.error_result(str(e))
+
+        return ToolResult.success_result(
+            f"Started background job {job.id} (pid {job.process.pid}): {command}\n"
+            f"Use job_status or job_output with job_id='{job.id}' to follow it "
+            "and job_kill to stop it.",
+            metadata={"job_id": job.id, "pid": job.process.pid, "background": True},
+        )
+
+    @property
+    def _persistent(self) -> bool:
+        return self.config.shell_environment.persistent_session and sys.platform != "win32"
+
+    def _get_session(self, cwd: Path) -> ShellSession:
+        if self._session is None:
+            self._session = ShellSession(cwd, self._build_environment(), self._limiter)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _run_process(
+        self,
+        command: str,
+        timeout: int,
+        cwd: Path,
+        progress: ProgressReporter,
+    ) -> CommandResult:
+        if sys.platform == "win32":
+            shell_cmd = ["cmd.exe", "/c", command]
+        else:
+            shell_cmd = ["/bin/bash", "-c", command]
+
+        cgroup = self._limiter.cgroup()
+        measure = self._limiter.start(cgroup)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self._limiter.wrap(shell_cmd),
+                preexec_fn=self._limiter.preexec(cgroup),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd,
+                env=self._build_environment(),
+                start_new_session=True,
+            )
+        except BaseException:
+            if cgroup is not None:
+                cgroup.remove()
+            raise
+
+        try:
+            return await self._wait_process(process, timeout, progress, measure)
+        finally:
+            if cgroup is not None:
+                cgroup.remove()
+
+    async def _wait_process(
+        self,
+        process: asyncio.subprocess.Process,
+        timeout: int,
+        progress: ProgressReporter,
+        measure: Callable[[], ResourceUsage],
+    ) -> CommandResult:
+
+        spill = self.config.artifacts.enabled
+        stdout = OutputBuffer(spill=spill)
+        stderr = OutputBuffer(spill=spill)
+        readers = asyncio.gather(
+            pump(process.stdout, stdout, progress),
+            pump(process.stderr, stderr, progress),
+        )
+
+        async def finished() -> None:
+            # Shielded so a timeout leaves the readers running to collect
+            # the output written before the kill.
+            await asyncio.shield(readers)
+            await process.wait()
+
+        try:
+            await asyncio.wait_for(finished(), timeout=timeout)
         except asyncio.TimeoutError:
+            self._kill(process)
+            await process.wait()
+            # Whatever the killed command already wrote is still returned;
+            # don't wait on pipes held open by processes that escaped the group.
+            try:
+                await asyncio.wait_for(readers, timeout=1)
+            except asyncio.TimeoutError:
+                readers.cancel()
+            return CommandResult(stdout, stderr, None, timed_out=True, usage=measure())
+        except asyncio.CancelledError:
+            self._kill(process)
+            readers.cancel()
+            raise
+
+        return CommandResult(stdout, stderr, process.returncode, usage=measure())
+
+    def _kill(self, process: asyncio.subprocess.Process) -> None:
+        try:
             if sys.platform != "win32":
                 os.killpg(os.getpgid(process.pid), signal.SIGKILL)
             else:
                 process.kill()
-            await process.wait()
-            return ToolResult.error_result(f"Command timed out after {params.timeout}s")
+        except ProcessLookupError:
+            pass
 
-        stdout = stdout_data.decode("utf-8", errors="replace")
-        stderr = stderr_data.decode("utf-8", errors="replace")
-        exit_code = process.returncode
+    def _format_output(
+        self,
+        stdout: OutputBuffer,
+        stderr: OutputBuffer,
+        exit_code: int | None,
+    ) -> str:
+        out_text = stdout.text()
+        err_text = stderr.text()
 
         output = ""
-        if stdout.strip():
-            output += stdout.rstrip()
+        if out_text.strip():
+            output += out_text.rstrip()
 
-        if stderr.strip():
+        if err_text.strip():
             output += "\n--- stderr ---\n"
-            output += stderr.rstrip()
+            output += err_text.rstrip()
 
-        if exit_code != 0:
+        if exit_code:
             output += f"\nExit code: {exit_code}"
 
-        if len(output) > 100 * 1024:
-            output = output[: 100 * 1024] + "\n... [output truncated]"
-
-        return ToolResult(
-            success=exit_code == 0,
-            output=output,
-            error=stderr if exit_code != 0 else None,
-            exit_code=exit_code,
-        )
+        return output
 
     def _build_environment(self) -> dict[str, str]:
+        # Built once per tool: the process environment and the policy don't
+        # change while the agent runs, and matching every variable against
+        # every pattern on each call is wasted work.
+        if self._environment is not None:
+            return self._environment
+
         env = os.environ.copy()
 
         shell_environment = self.config.shell_environment
@@ -157,4 +485,5 @@ class ShellTool(Tool):
         if shell_environment.set_vars:
             env.update(shell_environment.set_vars)
 
+        self._environment = env
         return env
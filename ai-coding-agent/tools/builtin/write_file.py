@@ -8,6 +8,7 @@ from tools.base import (
 )
 from pydantic import BaseModel, Field
 
+from tools.files import FileContentCache
 from utils.paths import ensure_parent_directory, resolve_path
 
 
@@ -41,11 +42,13 @@ class WriteFileTool(Tool):
 
         is_new_file = not path.exists()
 
+        file_cache = invocation.file_cache or FileContentCache(self.config.file_cache)
+
         old_content = ""
         if not is_new_file:
             try:
-                old_content = path.read_text(encoding="utf-8")
-            except:
+                old_content = file_cache.read_text(path)[1] or ""
+            except OSError:
                 pass
 
         diff = FileDiff(
@@ -54,6 +57,7 @@ class WriteFileTool(Tool):
             new_content=params.content,
             is_new_file=is_new_file,
         )
+        invocation.prepared = diff
 
         action = "Created" if is_new_file else "Updated"
 
@@ -70,13 +74,15 @@ class WriteFileTool(Tool):
         params = WriteFileParams(**invocation.params)
         path = resolve_path(invocation.cwd, params.path)
 
+        file_cache = invocation.file_cache or FileContentCache(self.config.file_cache)
+
         is_new_file = not path.exists()
         old_content = ""
 
         if not is_new_file:
             try:
-                old_content = path.read_text(encoding="utf-8")
-            except:
+                old_content = file_cache.read_text(path)[1] or ""
+            except OSError:
                 pass
 
         try:
@@ -87,19 +93,29 @@ class WriteFileTool(Tool):
                     f"Parent directory does not exist: {path.parent}"
                 )
 
-            path.write_text(params.content, encoding="utf-8")
+            file_cache.write_text(path, params.content)
 
             action = "Created" if is_new_file else "Updated"
             line_count = len(params.content.splitlines())
 
-            return ToolResult.success_result(
-                f"{action} {path} {line_count} lines",
-                diff=FileDiff(
+            # Reuse the confirmation's diff (and its computed text) if the
+            # file was not touched in between.
+            diff = invocation.prepared
+            if not (
+                isinstance(diff, FileDiff)
+                and diff.is_new_file == is_new_file
+                and diff.old_content == old_content
+            ):
+                diff = FileDiff(
                     path=path,
                     old_content=old_content,
                     new_content=params.content,
                     is_new_file=is_new_file,
-                ),
+                )
+
+            return ToolResult.success_result(
+                f"{action} {path} {line_count} lines",
+                diff=diff,
                 metadata={
                     "path": str(path),
                     "is_new_file": is_new_file,
@@ -0,0 +1,37 @@
+from tools.files.atomic import atomic_write
+from tools.files.content import CachedContent, FileContentCache
+from tools.files.edits import EditError, EditPlan, Replacement, apply_replacements
+from tools.files.info import BINARY_SNIFF_BYTES, FileInfo, FileInfoCache, sniff_encoding
+from tools.files.lines import (
+    LINE_INDEX_ENCODINGS,
+    LineIndex,
+    LineRange,
+    read_line_range,
+    split_lines,
+)
+from tools.files.snapshots import ReadSnapshot, ReadSnapshots
+from tools.files.transaction import FileTransaction, StagedFile, TransactionError
+
+__all__ = [
+    "atomic_write",
+    "EditError",
+    "EditPlan",
+    "Replacement",
+    "apply_replacements",
+    "CachedContent",
+    "FileContentCache",
+    "BINARY_SNIFF_BYTES",
+    "FileInfo",
+    "FileInfoCache",
+    "sniff_encoding",
+    "LINE_INDEX_ENCODINGS",
+    "LineIndex",
+    "LineRange",
+    "read_line_range",
+    "split_lines",
+    "ReadSnapshot",
+    "ReadSnapshots",
+    "FileTransaction",
+    "StagedFile",
+    "TransactionError",
+]
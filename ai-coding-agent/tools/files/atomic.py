@@ -0,0 +1,51 @@
+from __future__ import annotations
+import os
+from pathlib import Path
+import tempfile
+
+
+def atomic_write(path: Path, data: bytes, fsync: bool = False) -> os.stat_result:
+    """
+    Replace `path` with `data` via a temp file in the same directory and a
+    rename, so readers (and a crash) see either the old or the new file,
+    never a partial one. Existing permissions are kept and symlinks are
+    written through. With `fsync` the data and the directory entry are
+    flushed to disk before returning.
+    """
+    path = Path(os.path.realpath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+            fp.flush()
+            if fsync:
+                os.fsync(fp.fileno())
+
+        if mode is not None:
+            os.chmod(tmp, mode)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp, 0o666 & ~umask)
+
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+    if fsync and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    return os.stat(path)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import os
+from pathlib import Path
+import threading
+import time
+
+from config.config import FileCacheConfig
+from tools.files.atomic import atomic_write
+from tools.files.info import FileInfo, FileInfoCache
+from tools.files.lines import split_lines
+
+# Like git's "racy clean" check: a file modified within this window of
+# being cached could change again without its mtime moving (filesystem
+# timestamps are only as fine as the kernel clock tick), so its content
+# hash is checked instead of trusting size and mtime.
+RACY_WINDOW_NS = 100_000_000
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+@dataclass(slots=True)
+class CachedContent:
+    info: FileInfo
+    text: str
+    cached_at_ns: int
+    digest: bytes
+
+
+class FileContentCache:
+    """
+    Read-through cache of decoded file contents shared by the file tools.
+    Entries are validated against size and mtime_ns (and optionally a
+    content hash) on every read; writes made through the cache update it
+    in place, so an edit cycle reads each file from disk once. Safe to use
+    from worker threads; disk I/O happens outside the lock.
+    """
+
+    def __init__(
+        self,
+        config: FileCacheConfig,
+        file_info: FileInfoCache | None = None,
+    ) -> None:
+        self.config = config
+        self.file_info = file_info or FileInfoCache()
+        self._entries: OrderedDict[str, CachedContent] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: str) -> CachedContent | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        try:
+            st = os.stat(key)
+        except OSError:
+            self.invalidate(key)
+            return None
+
+        if not entry.info.matches(st):
+            return None
+
+        racy = entry.info.mtime_ns + RACY_WINDOW_NS > entry.cached_at_ns
+        if racy or self.config.verify_hash:
+            try:
+                with open(key, "rb") as fp:
+                    if _digest(fp.read()) != entry.digest:
+                        return None
+            except OSError:
+                return None
+            if racy:
+                entry.cached_at_ns = time.time_ns()
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def read_text(self, path: Path) -> tuple[FileInfo, str | None]:
+        """Same contract as `FileInfoCache.read_text`, served from memory when fresh."""
+        key = str(path)
+
+        if self.config.enabled:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    self.hits += 1
+                    return entry.info, entry.text
+
+        self.misses += 1
+        info, data, text = self.file_info.read(path)
+        if text is not None:
+            self._store(key, info, text, data)
+
+        return info, text
+
+    def write_text(
+        self,
+        path: Path,
+        text: str,
+        encoding: str | None = None,
+        newline: str = "\n",
+    ) -> FileInfo:
+        """
+        Atomically write `text` to `path` (in `encoding` when it can
+        represent the text, UTF-8 otherwise; with "\n" line endings turned
+        into `newline`) and cache the result as the new version.
+        """
+        raw = text.replace("\n", newline) if newline != "\n" else text
+        encoding = encoding or "utf-8"
+        try:
+            data = raw.encode(encoding)
+        except (UnicodeEncodeError, LookupError):
+            encoding = "utf-8"
+            data = raw.encode(encoding)
+
+        st = atomic_write(path, data, fsync=self.config.fsync)
+
+        key = str(path)
+        info = self.file_info.record(
+            key,
+            st,
+            is_binary=False,
+            encoding=encoding,
+            line_count=len(split_lines(text)),
+            newline=newline,
+        )
+        self._store(key, info, text, data)
+        return info
+
+    def invalidate(self, path: Path | str) -> None:
+        with self._lock:
+            entry = self._entries.pop(str(path), None)
+            if entry is not None:
+                self._bytes -= len(entry.text)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _store(self, key: str, info: FileInfo, text: str, data: bytes) -> None:
+        digest = _digest(data)
+
+        with self._lock:
+            self.invalidate(key)
+
+            if not self.config.enabled or len(text) > self.config.max_file_bytes:
+                return
+
+            self._entries[key] = CachedContent(
+                info=info,
+                text=text,
+                cached_at_ns=time.time_ns(),
+                digest=digest,
+            )
+            self._bytes += len(text)
+
+            while self._bytes > self.config.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.text)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "files": len(self._entries),
+            "bytes": self._bytes,
+        }
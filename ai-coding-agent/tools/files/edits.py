@@ -0,0 +1,125 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from tools.files.info import FileInfo
+from tools.files.matching import EXACT, Match, find_matches
+
+if TYPE_CHECKING:
+    from tools.base import FileDiff
+
+
+@dataclass(slots=True)
+class Replacement:
+    old: str
+    new: str
+    replace_all: bool = False
+
+
+class EditError(Exception):
+    """An edit that cannot be applied; `index` is the failing replacement, if any."""
+
+    def __init__(
+        self,
+        message: str,
+        index: int | None = None,
+        occurrences: int | None = None,
+    ) -> None:
+        super().__init__(message)
+        self.message = message
+        self.index = index
+        self.occurrences = occurrences
+
+
+@dataclass(slots=True)
+class EditPlan:
+    """The result of applying edits in memory, ready to be written."""
+
+    path: Path
+    old_content: str
+    new_content: str
+    matches: list[Match] = field(default_factory=list)
+    info: FileInfo | None = None
+    # Shared by the confirmation and the result so the diff is computed once
+    diff: FileDiff | None = None
+
+    @property
+    def replaced(self) -> int:
+        return len(self.matches)
+
+    @property
+    def loose_matches(self) -> list[Match]:
+        """Replacements whose old string did not match the file exactly."""
+        return [match for match in self.matches if match.strategy != EXACT]
+
+    @property
+    def is_new_file(self) -> bool:
+        return self.info is None
+
+    def is_current(self) -> bool:
+        """True while the file on disk is still the version the plan was made from."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return self.info is None
+        except OSError:
+            return False
+        return self.info is not None and self.info.matches(st)
+
+
+def apply_replacements(
+    content: str,
+    replacements: list[Replacement],
+) -> tuple[str, list[Match]]:
+    """
+    Apply all replacements in a single pass over `content`. Every old
+    string is located in the original content (see `find_matches`), so
+    edits cannot see each other's output and must not overlap. Returns the
+    new content and the applied matches in file order; raises EditError
+    otherwise.
+    """
+    spans: list[tuple[Match, int]] = []
+
+    for i, replacement in enumerate(replacements):
+        if not replacement.old:
+            raise EditError("old_string is empty", index=i)
+
+        matches = find_matches(content, replacement.old, replacement.new)
+        if not matches:
+            raise EditError("old_string not found", index=i, occurrences=0)
+
+        if len(matches) > 1 and not replacement.replace_all:
+            raise EditError(
+                f"old_string found {len(matches)} times",
+                index=i,
+                occurrences=len(matches),
+            )
+
+        if not replacement.replace_all:
+            matches = matches[:1]
+
+        spans.extend((match, i) for match in matches)
+
+    spans.sort(key=lambda span: span[0].start)
+    for (previous, a), (current, b) in zip(spans, spans[1:]):
+        if current.start < previous.end:
+            raise EditError(
+                f"Edits {a + 1} and {b + 1} overlap; merge them into one edit"
+            )
+
+    pieces = []
+    cursor = 0
+    line = 1
+    for match, _ in spans:
+        line += content.count("\n", cursor, match.start)
+        match.first_line = line
+        match.last_line = line + content.count("\n", match.start, max(match.start, match.end - 1))
+        line += content.count("\n", match.start, match.end)
+        pieces.append(content[cursor : match.start])
+        pieces.append(match.replacement)
+        cursor = match.end
+    pieces.append(content[cursor:])
+
+    return "".join(pieces), [match for match, _ in spans]
@@ -0,0 +1,177 @@
+from __future__ import annotations
+import codecs
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tools.files.lines import LineIndex
+    from tools.symbols.outline import Symbol
+
+BINARY_SNIFF_BYTES = 8192
+
+# Longest BOMs first: the UTF-32 LE BOM starts with the UTF-16 LE one.
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+@dataclass(slots=True)
+class FileInfo:
+    path: str
+    size: int
+    mtime_ns: int
+    is_binary: bool
+    encoding: str | None = None
+    # "\r\n" when read text was converted from CRLF line endings
+    newline: str = "\n"
+    line_count: int | None = None
+    line_index: LineIndex | None = None
+    symbols: list[Symbol] | None = None
+
+    def matches(self, st: os.stat_result) -> bool:
+        return self.size == st.st_size and self.mtime_ns == st.st_mtime_ns
+
+
+def sniff_encoding(head: bytes, complete: bool = False) -> tuple[bool, str | None]:
+    """
+    Classify a file from its first bytes (or all of them if `complete`).
+    Returns (is_binary, encoding); the encoding of a partial sniff is a
+    best guess that `FileInfoCache.read_text` corrects if decoding fails.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return False, encoding
+
+    if b"\x00" in head[:BINARY_SNIFF_BYTES]:
+        return True, None
+
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sniffed chunk.
+        if not complete and e.start >= len(head) - 3 and e.end == len(head):
+            return False, "utf-8"
+        return False, "latin-1"
+
+    return False, "utf-8"
+
+
+def normalize_newlines(text: str) -> tuple[str, str]:
+    """
+    Return (text with "\n" line endings, the file's newline). Only files
+    whose every line ends in "\r\n" are converted, so that writing the
+    text back with that newline restores the file exactly; files with
+    mixed endings are left as they are.
+    """
+    crlf = text.count("\r\n")
+    if crlf and crlf == text.count("\n"):
+        return text.replace("\r\n", "\n"), "\r\n"
+    return text, "\n"
+
+
+class FileInfoCache:
+    """
+    Binary/encoding/line-count metadata keyed by (path, size, mtime_ns), so
+    repeated reads and searches over an unchanged tree skip the sniffing
+    and decode-retry I/O. Safe to use from worker threads.
+    """
+
+    MAX_ENTRIES = 50_000
+
+    def __init__(self) -> None:
+        self._entries: dict[str, FileInfo] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, path: str, st: os.stat_result) -> FileInfo | None:
+        info = self._entries.get(path)
+        if info is not None and info.matches(st):
+            self.hits += 1
+            return info
+
+        self.misses += 1
+        return None
+
+    def record(
+        self,
+        path: str,
+        st: os.stat_result,
+        is_binary: bool,
+        encoding: str | None = None,
+        line_count: int | None = None,
+        newline: str = "\n",
+    ) -> FileInfo:
+        info = FileInfo(
+            path=path,
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            is_binary=is_binary,
+            encoding=encoding,
+            newline=newline,
+            line_count=line_count,
+        )
+
+        with self._lock:
+            self._entries.pop(path, None)
+            if len(self._entries) >= self.MAX_ENTRIES:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[path] = info
+        return info
+
+    def get(self, path: Path) -> FileInfo | None:
+        """Return cached metadata, sniffing the head of the file on a miss."""
+        key = str(path)
+
+        try:
+            with open(key, "rb") as fp:
+                st = os.fstat(fp.fileno())
+                info = self.lookup(key, st)
+                if info is not None:
+                    return info
+                head = fp.read(BINARY_SNIFF_BYTES)
+        except OSError:
+            return None
+
+        is_binary, encoding = sniff_encoding(head, complete=len(head) == st.st_size)
+        return self.record(key, st, is_binary, encoding)
+
+    def read_text(self, path: Path) -> tuple[FileInfo, str | None]:
+        """
+        Read and decode a file in a single pass. Returns None for the text
+        of binary files. CRLF text comes back with "\n" line endings (see
+        `normalize_newlines`); `info.newline` records the original.
+        """
+        info, _, text = self.read(path)
+        return info, text
+
+    def read(self, path: Path) -> tuple[FileInfo, bytes, str | None]:
+        key = str(path)
+
+        with open(key, "rb") as fp:
+            st = os.fstat(fp.fileno())
+            data = fp.read()
+
+        info = self.lookup(key, st)
+        if info is None:
+            is_binary, encoding = sniff_encoding(data, complete=True)
+            info = self.record(key, st, is_binary, encoding)
+
+        if info.is_binary:
+            return info, data, None
+
+        try:
+            text = data.decode(info.encoding or "utf-8")
+        except UnicodeDecodeError:
+            info.encoding = "latin-1"
+            text = data.decode("latin-1")
+
+        text, info.newline = normalize_newlines(text)
+        return info, data, text
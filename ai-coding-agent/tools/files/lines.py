@@ -0,0 +1,143 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_right
+import codecs
+from dataclasses import dataclass, field
+import mmap
+import os
+from pathlib import Path
+
+from tools.files.info import FileInfo
+
+# Encodings in which b"\n" always marks a line break.
+LINE_INDEX_ENCODINGS = ("utf-8", "utf-8-sig", "latin-1")
+
+CHECKPOINT_BYTES = 64 * 1024
+
+
+def split_lines(text: str) -> list[str]:
+    """
+    Lines as LineIndex, grep and edit matching count them: broken on "\n"
+    only (not form feeds, lone "\r" or Unicode separators, unlike
+    str.splitlines), with the "\r" of a "\r\n" dropped.
+    """
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return [line[:-1] if line.endswith("\r") else line for line in lines]
+
+
+@dataclass(slots=True)
+class LineIndex:
+    """
+    Sparse line-offset index: the byte offset of the first line starting
+    after every CHECKPOINT_BYTES boundary. Locating any line costs a bisect
+    plus reading at most one block.
+    """
+
+    line_count: int
+    lines: array = field(default_factory=lambda: array("Q", [0]))
+    offsets: array = field(default_factory=lambda: array("Q", [0]))
+
+    @classmethod
+    def build(cls, fp, size: int) -> LineIndex:
+        index = cls(line_count=0)
+        if size == 0:
+            return index
+
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            newlines = 0
+            pos = 0
+
+            while pos < size:
+                end = min(pos + CHECKPOINT_BYTES, size)
+                newlines += mm[pos:end].count(b"\n")
+
+                if end < size:
+                    nl = mm.find(b"\n", end - 1)
+                    if nl != -1 and nl + 1 < size:
+                        start = nl + 1
+                        line = newlines + mm[end:start].count(b"\n")
+                        if start > index.offsets[-1]:
+                            index.lines.append(line)
+                            index.offsets.append(start)
+
+                pos = end
+
+            last_byte = mm[size - 1]
+
+        index.line_count = newlines + (0 if last_byte == ord("\n") else 1)
+        return index
+
+    def locate(self, line: int) -> tuple[int, int]:
+        """Return (byte offset, lines to skip) for a 0-based line number."""
+        i = bisect_right(self.lines, line) - 1
+        return self.offsets[i], line - self.lines[i]
+
+
+@dataclass
+class LineRange:
+    lines: list[str]
+    start: int
+    total_lines: int
+    truncated: bool = False
+
+
+def read_line_range(
+    path: Path,
+    info: FileInfo,
+    start: int,
+    limit: int | None,
+    max_bytes: int,
+) -> LineRange:
+    """
+    Return up to `limit` lines from 0-based line `start` by seeking through
+    the file's line index, reading no more than `max_bytes` of line data.
+    The index is built on first use and cached on `info`.
+    """
+    encoding = "utf-8" if info.encoding == "utf-8-sig" else info.encoding or "utf-8"
+
+    with open(path, "rb") as fp:
+        st = os.fstat(fp.fileno())
+        if not info.matches(st):
+            raise OSError(f"File changed while reading: {path}")
+
+        index = info.line_index
+        if index is None:
+            index = LineIndex.build(fp, st.st_size)
+            info.line_index = index
+            info.line_count = index.line_count
+
+        result = LineRange(lines=[], start=start, total_lines=index.line_count)
+        if start >= index.line_count:
+            return result
+
+        offset, skip = index.locate(start)
+        fp.seek(offset)
+        for _ in range(skip):
+            fp.readline()
+
+        remaining = max_bytes
+        wanted = index.line_count - start if limit is None else limit
+
+        while len(result.lines) < wanted:
+            raw = fp.readline(remaining + 1)
+            if not raw:
+                break
+
+            if len(raw) > remaining:
+                result.truncated = True
+                if not result.lines:
+                    result.lines.append(
+                        raw[:remaining].decode(encoding, errors="replace")
+                    )
+                break
+
+            remaining -= len(raw)
+            if info.encoding == "utf-8-sig" and start + len(result.lines) == 0:
+                raw = raw.removeprefix(codecs.BOM_UTF8)
+            result.lines.append(
+                raw.rstrip(b"\n").rstrip(b"\r").decode(encoding, errors="replace")
+            )
+
+    return result
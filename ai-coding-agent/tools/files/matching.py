@@ -0,0 +1,263 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+import re
+
+# Line-based strategies are skipped above this size; exact matching is not.
+MAX_LINE_MATCH_BYTES = 4 * 1024 * 1024
+# Fuzzy matching compares every window of the file against the old text,
+# so it is bounded both by file size and by the total characters compared.
+MAX_FUZZY_BYTES = 512 * 1024
+MAX_FUZZY_LINES = 300
+MAX_FUZZY_WORK = 5_000_000
+FUZZY_THRESHOLD = 0.85
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+EXACT = "exact"
+TRAILING_WHITESPACE = "trailing_whitespace"
+INDENTATION = "indentation"
+FUZZY = "fuzzy"
+
+
+@dataclass(slots=True)
+class Match:
+    start: int
+    end: int
+    replacement: str
+    strategy: str = EXACT
+    similarity: float = 1.0
+    # 1-based lines of the matched span, filled in when the edit is applied
+    first_line: int = 0
+    last_line: int = 0
+
+    def describe(self) -> str:
+        how = {
+            TRAILING_WHITESPACE: "ignoring trailing whitespace",
+            INDENTATION: "ignoring indentation (replacement re-indented)",
+            FUZZY: f"approximately ({self.similarity:.0%} similar)",
+        }.get(self.strategy, "exactly")
+        return f"lines {self.first_line}-{self.last_line} matched {how}"
+
+
+@dataclass(slots=True)
+class _Lines:
+    lines: list[str]
+    offsets: list[int]
+    content_length: int
+
+    @classmethod
+    def of(cls, content: str) -> _Lines:
+        lines = content.split("\n")
+        offsets = []
+        pos = 0
+        for line in lines:
+            offsets.append(pos)
+            pos += len(line) + 1
+        return cls(lines, offsets, len(content))
+
+    def span(self, first: int, last: int, with_newline: bool) -> tuple[int, int]:
+        start = self.offsets[first]
+        end = self.offsets[last] + len(self.lines[last])
+        if with_newline and last + 1 < len(self.lines):
+            end += 1
+        return start, end
+
+
+def _indent(line: str) -> str:
+    return line[: len(line) - len(line.lstrip())]
+
+
+def _reindent(new: str, old_indent: str, file_indent: str) -> str:
+    if old_indent == file_indent:
+        return new
+
+    lines = []
+    for line in new.split("\n"):
+        if line.strip() and line.startswith(old_indent):
+            line = file_indent + line[len(old_indent) :]
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _first_content_line(lines: list[str]) -> int:
+    for i, line in enumerate(lines):
+        if line.strip():
+            return i
+    return 0
+
+
+def find_matches(content: str, old: str, new: str) -> list[Match]:
+    """
+    Locate `old` in `content`, trying progressively looser strategies:
+    exact text, lines equal up to trailing whitespace, lines equal up to
+    indentation (re-indenting `new` to the file's indentation), and
+    finally, for blocks of several lines, the single most similar block
+    above FUZZY_THRESHOLD that differs only in punctuation. Returns every
+    match of the first strategy that finds any, so callers can reject
+    ambiguous edits.
+    """
+    if not old:
+        return []
+
+    matches = []
+    pos = content.find(old)
+    while pos != -1:
+        matches.append(Match(pos, pos + len(old), new))
+        pos = content.find(old, pos + len(old))
+    if matches or len(content) > MAX_LINE_MATCH_BYTES:
+        return matches
+
+    with_newline = old.endswith("\n")
+    old_lines = (old[:-1] if with_newline else old).split("\n")
+    if not any(line.strip() for line in old_lines):
+        return []
+
+    file_lines = _Lines.of(content)
+
+    for strategy, key in (
+        (TRAILING_WHITESPACE, str.rstrip),
+        (INDENTATION, str.strip),
+    ):
+        matches = _match_lines(file_lines, old_lines, new, with_newline, strategy, key)
+        if matches:
+            return matches
+
+    match = _fuzzy_match(file_lines, old_lines, new, with_newline)
+    return [match] if match else []
+
+
+def _match_lines(
+    file_lines: _Lines,
+    old_lines: list[str],
+    new: str,
+    with_newline: bool,
+    strategy: str,
+    key,
+) -> list[Match]:
+    lines = file_lines.lines
+    old_keys = [key(line) for line in old_lines]
+    size = len(old_keys)
+    anchor = _first_content_line(old_lines)
+
+    matches = []
+    i = 0
+    while i + size <= len(lines):
+        if key(lines[i + anchor]) != old_keys[anchor] or any(
+            key(lines[i + j]) != old_keys[j] for j in range(size)
+        ):
+            i += 1
+            continue
+
+        start, end = file_lines.span(i, i + size - 1, with_newline)
+        replacement = new
+        if strategy == INDENTATION:
+            replacement = _reindent(
+                new, _indent(old_lines[anchor]), _indent(lines[i + anchor])
+            )
+        matches.append(Match(start, end, replacement, strategy))
+        i += size
+
+    return matches
+
+
+def _fuzzy_match(
+    file_lines: _Lines,
+    old_lines: list[str],
+    new: str,
+    with_newline: bool,
+) -> Match | None:
+    # A near miss on one line is usually a different line (`timeout = 30`
+    # vs `timeout = 31`), not a typo; those get a hint instead.
+    if sum(1 for line in old_lines if line.strip()) < 2:
+        return None
+
+    candidates = _fuzzy_candidates(file_lines, old_lines)
+    if not candidates:
+        return None
+
+    best_score, best = max(candidates)
+    if best_score < FUZZY_THRESHOLD:
+        return None
+
+    size = len(old_lines)
+    for score, i in candidates:
+        if score >= FUZZY_THRESHOLD and abs(i - best) >= size:
+            # Another, separate block is just as plausible.
+            return None
+
+    if _words_differ(old_lines, file_lines.lines[best : best + size]):
+        return None
+
+    start, end = file_lines.span(best, best + size - 1, with_newline)
+    anchor = _first_content_line(old_lines)
+    replacement = _reindent(
+        new, _indent(old_lines[anchor]), _indent(file_lines.lines[best + anchor])
+    )
+    return Match(start, end, replacement, FUZZY, best_score)
+
+
+def _words_differ(old_lines: list[str], block: list[str]) -> bool:
+    """Whether the blocks differ in any identifier, keyword or number."""
+    old_tokens = _TOKEN.findall("\n".join(old_lines))
+    block_tokens = _TOKEN.findall("\n".join(block))
+    matcher = SequenceMatcher(None, old_tokens, block_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        changed = old_tokens[i1:i2] + block_tokens[j1:j2]
+        if any(token[0].isalnum() or token[0] == "_" for token in changed):
+            return True
+    return False
+
+
+def _fuzzy_candidates(
+    file_lines: _Lines,
+    old_lines: list[str],
+    threshold: float = FUZZY_THRESHOLD,
+) -> list[tuple[float, int]]:
+    lines = file_lines.lines
+    size = len(old_lines)
+    windows = len(lines) - size + 1
+    target = "\n".join(line.strip() for line in old_lines)
+
+    if (
+        windows <= 0
+        or size > MAX_FUZZY_LINES
+        or file_lines.content_length > MAX_FUZZY_BYTES
+        or windows * len(target) > MAX_FUZZY_WORK
+    ):
+        return []
+
+    stripped = [line.strip() for line in lines]
+    matcher = SequenceMatcher(None, autojunk=False)
+    matcher.set_seq2(target)
+
+    candidates = []
+    for i in range(windows):
+        matcher.set_seq1("\n".join(stripped[i : i + size]))
+        if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+            continue
+        score = matcher.ratio()
+        if score >= threshold:
+            candidates.append((score, i))
+
+    return candidates
+
+
+def closest_block(content: str, old: str) -> tuple[int, int, float] | None:
+    """
+    The (first line, last line, similarity) of the block most similar to
+    `old`, 1-based, for error hints; None when nothing comes close or the
+    file is too large to compare.
+    """
+    old_lines = old.rstrip("\n").split("\n")
+    if not any(line.strip() for line in old_lines):
+        return None
+
+    candidates = _fuzzy_candidates(_Lines.of(content), old_lines, threshold=0.6)
+    if not candidates:
+        return None
+
+    score, i = max(candidates)
+    return i + 1, i + len(old_lines), score
@@ -0,0 +1,52 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class ReadSnapshot:
+    text: str
+    mtime_ns: int
+    size: int
+    turn: int
+
+
+class ReadSnapshots:
+    """
+    The version of each file last shown to the model in full, so a re-read
+    can be answered with a diff against it. Bounded by total text size.
+    """
+
+    MAX_BYTES = 32 * 1024 * 1024
+
+    def __init__(self) -> None:
+        self._snapshots: OrderedDict[str, ReadSnapshot] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, path: str) -> ReadSnapshot | None:
+        snapshot = self._snapshots.get(path)
+        if snapshot is not None:
+            self._snapshots.move_to_end(path)
+        return snapshot
+
+    def put(self, path: str, snapshot: ReadSnapshot) -> None:
+        self.discard(path)
+
+        if len(snapshot.text) > self.MAX_BYTES:
+            return
+
+        self._snapshots[path] = snapshot
+        self._bytes += len(snapshot.text)
+
+        while self._bytes > self.MAX_BYTES:
+            _, evicted = self._snapshots.popitem(last=False)
+            self._bytes -= len(evicted.text)
+
+    def discard(self, path: str) -> None:
+        snapshot = self._snapshots.pop(path, None)
+        if snapshot is not None:
+            self._bytes -= len(snapshot.text)
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+        self._bytes = 0
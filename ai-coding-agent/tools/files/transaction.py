@@ -0,0 +1,288 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import logging
+import os
+from pathlib import Path
+import shutil
+import time
+import uuid
+
+from tools.files.content import FileContentCache
+from tools.files.edits import Replacement, apply_replacements
+from tools.files.info import FileInfo
+from tools.files.matching import Match
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionError(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class StagedFile:
+    path: Path
+    # Disk state when first touched: None if the file did not exist
+    info: FileInfo | None
+    text: str | None = None
+    encoding: str | None = None
+    newline: str = "\n"
+    # New text to write, or None to keep/copy the bytes as they are
+    content: str | None = None
+    # Unmodified bytes to place here, for renamed files
+    source: Path | None = None
+    exists: bool = False
+
+    @property
+    def changed(self) -> bool:
+        if self.info is None:
+            return self.exists
+        return not self.exists or self.content is not None or self.source is not None
+
+
+@dataclass(slots=True)
+class _Undo:
+    path: Path
+    backup: Path | None
+
+
+class FileTransaction:
+    """
+    Creates, updates, deletes and renames staged in memory against a view
+    of the files as the transaction sees them, then committed together.
+    Each touched file is read at most once. Commit backs up every file it
+    replaces or removes (as a hard link next to it when possible) and
+    restores them all if any step fails.
+    """
+
+    def __init__(self, file_cache: FileContentCache) -> None:
+        self.file_cache = file_cache
+        self._files: dict[Path, StagedFile] = {}
+        self._undo: list[_Undo] = []
+        self._token = uuid.uuid4().hex[:8]
+
+    @property
+    def files(self) -> list[StagedFile]:
+        return list(self._files.values())
+
+    def _get(self, path: Path) -> StagedFile:
+        staged = self._files.get(path)
+        if staged is not None:
+            return staged
+
+        if path.is_dir():
+            raise TransactionError(f"{path} is a directory")
+
+        if path.exists():
+            info = self.file_cache.file_info.get(path)
+            if info is None:
+                raise TransactionError(f"Failed to read {path}")
+            staged = StagedFile(
+                path=path,
+                info=info,
+                encoding=info.encoding,
+                newline=info.newline,
+                exists=True,
+            )
+        else:
+            staged = StagedFile(path=path, info=None)
+
+        self._files[path] = staged
+        return staged
+
+    def _text(self, staged: StagedFile) -> str:
+        if staged.content is not None:
+            return staged.content
+        if staged.text is None:
+            origin = staged.source or staged.path
+            info, text = self.file_cache.read_text(origin)
+            if text is None:
+                raise TransactionError(f"Cannot patch binary file: {origin}")
+            staged.text = text
+            staged.encoding = info.encoding
+            staged.newline = info.newline
+            if staged.source is None:
+                staged.info = info
+        return staged.text
+
+    def text(self, path: Path) -> str:
+        """The file's content as the transaction currently sees it."""
+        staged = self._get(path)
+        if not staged.exists:
+            return ""
+        return self._text(staged)
+
+    def original_text(self, path: Path) -> str:
+        staged = self._files.get(path)
+        if staged is None or staged.info is None:
+            return ""
+        if staged.text is None and staged.source is None and staged.exists:
+            self._text(staged)
+        return staged.text or ""
+
+    def create(self, path: Path, content: str) -> None:
+        staged = self._get(path)
+        if staged.exists:
+            raise TransactionError(f"{path} already exists")
+        staged.exists = True
+        staged.content = content
+        staged.source = None
+
+    def update(self, path: Path, replacements: list[Replacement]) -> list[Match]:
+        staged = self._get(path)
+        if not staged.exists:
+            raise TransactionError(f"{path} does not exist")
+
+        new_content, matches = apply_replacements(self._text(staged), replacements)
+        staged.content = new_content
+        return matches
+
+    def delete(self, path: Path) -> None:
+        staged = self._get(path)
+        if not staged.exists:
+            raise TransactionError(f"{path} does not exist")
+        staged.exists = False
+        staged.content = None
+        staged.source = None
+
+    def rename(self, source: Path, target: Path) -> None:
+        src = self._get(source)
+        dst = self._get(target)
+        if not src.exists:
+            raise TransactionError(f"Source file {source} does not exist")
+        if dst.exists:
+            raise TransactionError(f"Target file {target} already exists")
+
+        dst.exists = True
+        dst.encoding = src.encoding
+        dst.newline = src.newline
+        if src.content is not None:
+            dst.content = src.content
+        else:
+            dst.source = src.source or source
+            dst.text = src.text
+        src.exists = False
+        src.content = None
+        src.source = None
+
+    def commit(self) -> dict[str, float]:
+        """
+        Apply every staged change. Files are first checked against the
+        versions that were staged; on any failure, completed steps are
+        undone and the error is re-raised. Returns seconds spent per path.
+        """
+        changed = [staged for staged in self._files.values() if staged.changed]
+
+        for staged in changed:
+            self._check_unchanged(staged)
+
+        timings: dict[str, float] = {}
+        # Writes (including copies out of renamed sources) before removals,
+        # so a rename source is still on disk when its target is written.
+        ordered = [s for s in changed if s.exists] + [s for s in changed if not s.exists]
+
+        try:
+            for staged in ordered:
+                start = time.perf_counter()
+                if staged.exists:
+                    self._write(staged)
+                else:
+                    self._remove(staged)
+                timings[str(staged.path)] = time.perf_counter() - start
+        except BaseException:
+            self.rollback()
+            raise
+
+        return timings
+
+    def _check_unchanged(self, staged: StagedFile) -> None:
+        try:
+            st = os.stat(staged.path)
+        except FileNotFoundError:
+            if staged.info is None:
+                return
+            raise TransactionError(f"{staged.path} was removed while the patch was applied")
+
+        if staged.info is None or not staged.info.matches(st):
+            raise TransactionError(f"{staged.path} changed on disk while the patch was applied")
+
+    def _backup(self, path: Path) -> Path:
+        backup = path.with_name(f".{path.name}.{self._token}.bak")
+        try:
+            os.link(path, backup)
+        except OSError:
+            try:
+                shutil.copy2(path, backup)
+            except BaseException:
+                backup.unlink(missing_ok=True)
+                raise
+        return backup
+
+    def _write(self, staged: StagedFile) -> None:
+        # Write through a symlink to its target, so the link stays a link.
+        path = Path(os.path.realpath(staged.path))
+        backup = self._backup(path) if staged.info is not None else None
+        self._undo.append(_Undo(path, backup))
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if staged.content is not None:
+            self.file_cache.write_text(path, staged.content, staged.encoding, staged.newline)
+        else:
+            shutil.copy2(staged.source, path)
+            self.file_cache.invalidate(path)
+        if path != staged.path:
+            self.file_cache.invalidate(staged.path)
+
+    def _remove(self, staged: StagedFile) -> None:
+        # A symlink itself is removed (and restored), not its target.
+        path = staged.path
+        backup = path.with_name(f".{path.name}.{self._token}.bak")
+        os.replace(path, backup)
+        self._undo.append(_Undo(path, backup))
+        self.file_cache.invalidate(path)
+
+    def rollback(self) -> None:
+        """
+        Undo committed steps, newest first, restoring backed-up files. A
+        backup is only left behind when it is the sole remaining copy of a
+        file that could not be restored.
+        """
+        while self._undo:
+            undo = self._undo.pop()
+            try:
+                if undo.backup is not None:
+                    self._restore(undo.path, undo.backup)
+                elif undo.path.exists():
+                    os.unlink(undo.path)
+            except OSError:
+                logger.warning(f"Could not undo the change to {undo.path}", exc_info=True)
+            self.file_cache.invalidate(undo.path)
+
+    def _restore(self, path: Path, backup: Path) -> None:
+        try:
+            untouched = os.path.samefile(backup, path)
+        except OSError:
+            untouched = False
+
+        if untouched:
+            # The write failed before replacing the file: the hard link
+            # still names the live inode, and renaming one name of an
+            # inode onto another is a no-op.
+            os.unlink(backup)
+            return
+
+        try:
+            os.replace(backup, path)
+        except OSError:
+            shutil.copy2(backup, path)
+            os.unlink(backup)
+
+    def discard_backups(self) -> None:
+        """Forget the undo log once the whole patch has succeeded."""
+        while self._undo:
+            undo = self._undo.pop()
+            if undo.backup is not None:
+                try:
+                    os.unlink(undo.backup)
+                except OSError:
+                    pass
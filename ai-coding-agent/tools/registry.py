@@ -2,8 +2,12 @@ from pathlib import Path
 from typing import Any, Callable, Awaitable
 from config.config import Config
 from hooks.hook_system import HookSystem
+from tools.artifacts import ArtifactStore
+from tools.files import FileContentCache, FileInfoCache, ReadSnapshots
+from tools.search import WorkspaceTree
+from tools.shell import CommandCache, JobManager
 from safety.approval import ApprovalContext, ApprovalDecision, ApprovalManager
-from tools.base import Tool, ToolInvocation, ToolResult
+from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 import logging
 from tools.builtin import ReadFileTool, get_all_builtin_tools
 from tools.subagents import SubagentTool, get_default_subagent_definitions
@@ -16,6 +20,13 @@ class ToolRegistry:
         self._tools: dict[str, Tool] = {}
         self._mcp_tools: dict[str, Tool] = {}
         self.config = config
+        self._artifact_store = ArtifactStore(config)
+        self.workspace = WorkspaceTree()
+        self.file_info = FileInfoCache()
+        self.file_cache = FileContentCache(config.file_cache, self.file_info)
+        self.read_snapshots = ReadSnapshots()
+        self.jobs = JobManager()
+        self.command_cache = CommandCache(config.shell_environment)
 
     @property
     def connected_mcp_servers(self) -> list[Tool]:
@@ -73,6 +84,7 @@ class ToolRegistry:
         hook_system: HookSystem,
         approval_manager: ApprovalManager | None = None,
         ask_user_callback: Callable[[str], Awaitable[str]] | None = None,
+        progress_callback: Callable[[str], None] | None = None,
     ) -> ToolResult:
         tool = self.get(name)
         if tool is None:
@@ -102,6 +114,13 @@ class ToolRegistry:
             params=params,
             cwd=cwd,
             ask_user_callback=ask_user_callback,
+            progress_callback=progress_callback,
+            workspace=self.workspace,
+            file_info=self.file_info,
+            file_cache=self.file_cache,
+            read_snapshots=self.read_snapshots,
+            jobs=self.jobs,
+            command_cache=self.command_cache,
         )
         if approval_manager:
             confirmation = await tool.get_confirmation(invocation)
@@ -142,9 +161,27 @@ class ToolRegistry:
                 },
             )
 
+        # The shell tool tells read-only commands from others itself; web
+        # and memory tools don't touch the workspace.
+        workspace_neutral = {ToolKind.SHELL, ToolKind.NETWORK, ToolKind.MEMORY}
+        if tool.kind not in workspace_neutral and tool.is_mutating(params):
+            self.command_cache.invalidate()
+
+        if tool.spill_output:
+            result = self._artifact_store.spill(result)
+
         await hook_system.trigger_after_tool(name, params, result)
         return result
 
+    async def close(self) -> None:
+        for tool in self._tools.values():
+            try:
+                await tool.close()
+            except Exception:
+                logger.exception(f"Failed to close tool {tool.name}")
+
+        await self.jobs.close()
+
 
 def create_default_registry(config: Config) -> ToolRegistry:
     registry = ToolRegistry(config)
@@ -0,0 +1,23 @@
+from tools.search.engine import (
+    GrepEngine,
+    SearchResult,
+    iter_files,
+    required_literal,
+    required_literals,
+)
+from tools.search.ignore import IgnoreRules
+from tools.search.tree import TreeEntry, WorkspaceTree
+from tools.search.trigram import IndexStats, TrigramIndex
+
+__all__ = [
+    "GrepEngine",
+    "SearchResult",
+    "IgnoreRules",
+    "iter_files",
+    "required_literal",
+    "required_literals",
+    "TrigramIndex",
+    "IndexStats",
+    "TreeEntry",
+    "WorkspaceTree",
+]
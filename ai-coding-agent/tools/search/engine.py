@@ -0,0 +1,209 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import mmap
+import os
+from pathlib import Path
+import re
+from typing import Iterable, Iterator
+
+from tools.files.info import BINARY_SNIFF_BYTES, FileInfoCache
+from tools.search.ignore import DEFAULT_EXCLUDED_DIRS
+from tools.search.tree import WorkspaceTree
+
+try:
+    import re._parser as sre_parse
+    from re._constants import LITERAL, SUBPATTERN
+except ImportError:  # Python < 3.11
+    import sre_parse
+    from sre_constants import LITERAL, SUBPATTERN
+
+
+_UTF8_ENCODINGS = ("utf-8", "utf-8-sig")
+
+
+def required_literals(pattern: str, flags: int = 0) -> list[str]:
+    """
+    Return literal substrings that every match of `pattern` must contain,
+    longest first.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return []
+
+    runs: list[str] = []
+
+    def visit(items) -> None:
+        run: list[str] = []
+
+        for op, arg in items:
+            if op is LITERAL:
+                run.append(chr(arg))
+                continue
+
+            if run:
+                runs.append("".join(run))
+            run = []
+
+            if op is SUBPATTERN and not arg[1] & re.IGNORECASE:
+                visit(arg[-1])
+
+        if run:
+            runs.append("".join(run))
+
+    visit(parsed)
+
+    return sorted(runs, key=len, reverse=True)
+
+
+def required_literal(pattern: str, flags: int = 0) -> str | None:
+    """
+    Return the longest literal substring every match of `pattern` must
+    contain, or None if no useful literal can be extracted.
+    """
+    literals = required_literals(pattern, flags)
+    if literals and len(literals[0]) >= 2:
+        return literals[0]
+
+    return None
+
+
+@dataclass
+class FileMatches:
+    path: Path
+    lines: list[tuple[int, str]] = field(default_factory=list)
+    truncated: bool = False
+
+
+@dataclass
+class SearchResult:
+    files: list[FileMatches] = field(default_factory=list)
+    files_searched: int = 0
+    matches: int = 0
+    truncated: bool = False
+
+
+class GrepEngine:
+    """
+    Gitignore-aware, parallel regex search. Files are read once through
+    mmap; a required-literal prefilter skips files (and lines) that cannot
+    match before the regex runs.
+    """
+
+    BATCH_SIZE = 256
+
+    def __init__(
+        self,
+        pattern: re.Pattern[str],
+        max_matches: int = 500,
+        max_matches_per_file: int = 50,
+        max_workers: int | None = None,
+        file_info: FileInfoCache | None = None,
+    ) -> None:
+        self.pattern = pattern
+        self.file_info = file_info
+        self.max_matches = max_matches
+        self.max_matches_per_file = max_matches_per_file
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+
+        literal = required_literal(pattern.pattern, pattern.flags)
+        if literal and pattern.flags & re.IGNORECASE and literal.lower() != literal.upper():
+            literal = None
+
+        self._literal = literal
+        self._literal_bytes = literal.encode("utf-8") if literal else None
+
+    def search(self, root: Path, candidates: Iterable[Path] | None = None) -> SearchResult:
+        if candidates is not None:
+            files: Iterator[Path] = iter(candidates)
+        elif root.is_file():
+            files = iter([root])
+        else:
+            files = iter_files(root)
+
+        result = SearchResult()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                batch = [path for _, path in zip(range(self.BATCH_SIZE), files)]
+                if not batch:
+                    break
+
+                for file_matches in executor.map(self._scan_file, batch):
+                    result.files_searched += 1
+                    if file_matches is None:
+                        continue
+
+                    remaining = self.max_matches - result.matches
+                    if len(file_matches.lines) > remaining:
+                        file_matches.lines = file_matches.lines[:remaining]
+                        result.truncated = True
+
+                    result.files.append(file_matches)
+                    result.matches += len(file_matches.lines)
+
+                    if result.matches >= self.max_matches:
+                        result.truncated = True
+                        return result
+
+        return result
+
+    def _scan_file(self, path: Path) -> FileMatches | None:
+        key = str(path)
+        file_info = self.file_info
+
+        try:
+            with open(key, "rb") as fp:
+                st = os.fstat(fp.fileno())
+                if st.st_size == 0:
+                    return None
+
+                if file_info is not None:
+                    info = file_info.lookup(key, st)
+                    if info is not None and (info.is_binary or info.encoding not in _UTF8_ENCODINGS):
+                        return None
+
+                with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if mm.find(b"\x00", 0, min(st.st_size, BINARY_SNIFF_BYTES)) != -1:
+                        if file_info is not None:
+                            file_info.record(key, st, is_binary=True)
+                        return None
+
+                    if self._literal_bytes and mm.find(self._literal_bytes) == -1:
+                        return None
+
+                    data = mm[:]
+        except (OSError, ValueError):
+            return None
+
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            if file_info is not None:
+                file_info.record(key, st, is_binary=False, encoding="latin-1")
+            return None
+
+        matches = FileMatches(path=path)
+        literal = self._literal
+
+        for i, line in enumerate(text.splitlines(), start=1):
+            if literal and literal not in line:
+                continue
+
+            if self.pattern.search(line):
+                if len(matches.lines) >= self.max_matches_per_file:
+                    matches.truncated = True
+                    break
+                matches.lines.append((i, line))
+
+        return matches if matches.lines else None
+
+
+def iter_files(
+    root: Path,
+    excluded_dirs: frozenset[str] = DEFAULT_EXCLUDED_DIRS,
+    include_hidden: bool = False,
+) -> Iterator[Path]:
+    """Walk `root` depth-first honoring .gitignore/.ignore files."""
+    return WorkspaceTree(excluded_dirs).iter_files(root, include_hidden)
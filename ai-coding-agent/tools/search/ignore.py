@@ -0,0 +1,173 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import re
+
+IGNORE_FILE_NAMES = (".gitignore", ".ignore")
+
+DEFAULT_EXCLUDED_DIRS = frozenset(
+    {"node_modules", "__pycache__", ".git", ".venv", "venv"}
+)
+
+
+@dataclass(frozen=True)
+class IgnoreRule:
+    regex: re.Pattern[str]
+    base: str
+    negate: bool = False
+    dir_only: bool = False
+
+
+def glob_to_regex(pattern: str) -> str:
+    out = []
+    i = 0
+    n = len(pattern)
+
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+
+    return "".join(out)
+
+
+def parse_ignore_line(line: str, base: str) -> IgnoreRule | None:
+    line = line.rstrip("\n").rstrip("\r")
+    if not line.endswith("\\ "):
+        line = line.rstrip()
+
+    if not line or line.startswith("#"):
+        return None
+
+    negate = False
+    if line.startswith("!"):
+        negate = True
+        line = line[1:]
+    elif line.startswith("\\!") or line.startswith("\\#"):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    anchored = "/" in line
+    line = line.lstrip("/")
+
+    body = glob_to_regex(line)
+    if not anchored:
+        body = "(?:.*/)?" + body
+
+    return IgnoreRule(
+        regex=re.compile(f"^{body}$"),
+        base=base,
+        negate=negate,
+        dir_only=dir_only,
+    )
+
+
+def load_directory_rules(directory: str) -> tuple[IgnoreRule, ...]:
+    rules: list[IgnoreRule] = []
+
+    for name in IGNORE_FILE_NAMES:
+        path = os.path.join(directory, name)
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as fp:
+                for line in fp:
+                    rule = parse_ignore_line(line, directory)
+                    if rule:
+                        rules.append(rule)
+        except OSError:
+            continue
+
+    return tuple(rules)
+
+
+class IgnoreRules:
+    """
+    Stack of .gitignore/.ignore rules. Each directory level returns a new
+    instance extended with that directory's ignore files, so sibling
+    directories never see each other's rules.
+    """
+
+    def __init__(self, rules: tuple[IgnoreRule, ...] = ()) -> None:
+        self._rules = rules
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    @classmethod
+    def for_ancestors(cls, root: Path) -> IgnoreRules:
+        """
+        Load ignore files from the enclosing repository root down to, but
+        not including, `root`; the walk itself picks up `root`'s own files.
+        """
+        root = root.resolve()
+        chain: list[Path] = []
+
+        if not (root / ".git").exists():
+            for parent in root.parents:
+                chain.append(parent)
+                if (parent / ".git").exists():
+                    break
+            else:
+                chain = []
+
+        rules = cls()
+        for directory in reversed(chain):
+            rules = rules.with_directory(str(directory))
+
+        return rules
+
+    def with_directory(self, directory: str) -> IgnoreRules:
+        return self.extend(load_directory_rules(directory))
+
+    def extend(self, rules: tuple[IgnoreRule, ...]) -> IgnoreRules:
+        if not rules:
+            return self
+
+        return IgnoreRules(self._rules + rules)
+
+    def is_ignored(self, path: str, is_dir: bool) -> bool:
+        ignored = False
+
+        for rule in self._rules:
+            if rule.dir_only and not is_dir:
+                continue
+
+            prefix = rule.base.rstrip(os.sep) + os.sep
+            if not path.startswith(prefix):
+                continue
+
+            rel = path[len(prefix) :].replace(os.sep, "/")
+            if rule.regex.match(rel):
+                ignored = not rule.negate
+
+        return ignored
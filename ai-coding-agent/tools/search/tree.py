@@ -0,0 +1,236 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import re
+from typing import Iterator
+
+from tools.search.ignore import (
+    DEFAULT_EXCLUDED_DIRS,
+    IGNORE_FILE_NAMES,
+    IgnoreRule,
+    IgnoreRules,
+    glob_to_regex,
+    load_directory_rules,
+)
+
+_GLOB_MAGIC = re.compile(r"[*?\[]")
+_NO_RULES = IgnoreRules()
+
+
+@dataclass(slots=True, frozen=True)
+class TreeEntry:
+    name: str
+    path: str
+    is_dir: bool
+
+
+@dataclass(slots=True)
+class _DirNode:
+    mtime_ns: int
+    # (st_dev, st_ino): the same directory reached through a symlink
+    identity: tuple[int, int]
+    entries: tuple[TreeEntry, ...]
+    ignore_sig: tuple[tuple[str, int, int], ...]
+    rules: tuple[IgnoreRule, ...]
+    # Ignore filtering is cached for the parent rules it was computed with.
+    parent_rules: IgnoreRules | None = None
+    merged_rules: IgnoreRules | None = None
+    kept: tuple[TreeEntry, ...] = ()
+
+
+def _ignore_signature(directory: str, names: list[str]) -> tuple[tuple[str, int, int], ...]:
+    sig = []
+    for name in names:
+        try:
+            st = os.stat(os.path.join(directory, name))
+        except OSError:
+            continue
+        sig.append((name, st.st_size, st.st_mtime_ns))
+    return tuple(sig)
+
+
+class WorkspaceTree:
+    """
+    In-memory directory listing cache shared by glob, grep and list_dir.
+    Directories are listed lazily with os.scandir and re-listed only when
+    their mtime changes, so repeated walks cost one stat per directory.
+    """
+
+    def __init__(self, excluded_dirs: frozenset[str] = DEFAULT_EXCLUDED_DIRS) -> None:
+        self.excluded_dirs = excluded_dirs
+        self._dirs: dict[str, _DirNode] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        self._dirs.clear()
+
+    def _node(self, directory: str) -> _DirNode | None:
+        try:
+            st = os.stat(directory)
+            mtime_ns = st.st_mtime_ns
+        except OSError:
+            self._dirs.pop(directory, None)
+            return None
+
+        node = self._dirs.get(directory)
+        if node is not None and node.mtime_ns == mtime_ns:
+            self.hits += 1
+            if node.ignore_sig:
+                # Editing an ignore file in place does not touch the
+                # directory's mtime.
+                names = [name for name, _, _ in node.ignore_sig]
+                sig = _ignore_signature(directory, names)
+                if sig != node.ignore_sig:
+                    node.ignore_sig = sig
+                    node.rules = load_directory_rules(directory)
+                    node.parent_rules = node.merged_rules = None
+            return node
+
+        self.misses += 1
+        entries: list[TreeEntry] = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        # Symlinked directories are walked too; iter_files
+                        # skips any directory it has already been through.
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    entries.append(TreeEntry(entry.name, entry.path, is_dir))
+        except OSError:
+            self._dirs.pop(directory, None)
+            return None
+
+        entries.sort(key=lambda e: e.name)
+        ignore_names = [e.name for e in entries if e.name in IGNORE_FILE_NAMES]
+
+        node = _DirNode(
+            mtime_ns=mtime_ns,
+            identity=(st.st_dev, st.st_ino),
+            entries=tuple(entries),
+            ignore_sig=_ignore_signature(directory, ignore_names),
+            rules=load_directory_rules(directory) if ignore_names else (),
+        )
+        self._dirs[directory] = node
+        return node
+
+    def listdir(self, path: Path) -> list[TreeEntry] | None:
+        node = self._node(str(path.resolve()))
+        return list(node.entries) if node else None
+
+    def _filter(
+        self, node: _DirNode, parent_rules: IgnoreRules
+    ) -> tuple[IgnoreRules, tuple[TreeEntry, ...]]:
+        if node.parent_rules is parent_rules and node.merged_rules is not None:
+            return node.merged_rules, node.kept
+
+        rules = parent_rules.extend(node.rules)
+        kept = []
+
+        for entry in node.entries:
+            if entry.is_dir and entry.name in self.excluded_dirs:
+                continue
+            if rules and rules.is_ignored(entry.path, entry.is_dir):
+                continue
+            kept.append(entry)
+
+        node.parent_rules = parent_rules
+        node.merged_rules = rules
+        node.kept = tuple(kept)
+        return rules, node.kept
+
+    def _ancestor_rules(self, root: Path) -> IgnoreRules:
+        chain: list[Path] = []
+
+        if not (root / ".git").exists():
+            for parent in root.parents:
+                chain.append(parent)
+                if (parent / ".git").exists():
+                    break
+            else:
+                chain = []
+
+        rules = _NO_RULES
+        for directory in reversed(chain):
+            node = self._node(str(directory))
+            if node is not None:
+                rules, _ = self._filter(node, rules)
+
+        return rules
+
+    def iter_files(
+        self,
+        root: Path,
+        include_hidden: bool = False,
+        max_depth: int | None = None,
+    ) -> Iterator[Path]:
+        """Walk `root` depth-first honoring .gitignore/.ignore files."""
+        root = root.resolve()
+        stack: list[tuple[str, IgnoreRules, int]] = [
+            (str(root), self._ancestor_rules(root), 0)
+        ]
+        visited: set[tuple[int, int]] = set()
+
+        while stack:
+            directory, parent_rules, depth = stack.pop()
+            node = self._node(directory)
+            # A symlink back up the tree would otherwise loop forever.
+            if node is None or node.identity in visited:
+                continue
+            visited.add(node.identity)
+
+            rules, kept = self._filter(node, parent_rules)
+            subdirs: list[tuple[str, IgnoreRules, int]] = []
+
+            for entry in kept:
+                if entry.is_dir:
+                    if max_depth is None or depth < max_depth:
+                        subdirs.append((entry.path, rules, depth + 1))
+                    continue
+
+                if not include_hidden and entry.name.startswith("."):
+                    continue
+
+                yield Path(entry.path)
+
+            stack.extend(reversed(subdirs))
+
+    def glob(self, root: Path, pattern: str) -> Iterator[Path]:
+        """
+        Yield files under `root` matching `pattern` as they are found, so
+        callers can stop at a result cap without expanding the whole tree.
+        """
+        if pattern.startswith("/"):
+            raise ValueError("Non-relative patterns are unsupported")
+
+        root = root.resolve()
+        segments = [s for s in pattern.split("/") if s and s != "."]
+        if not segments:
+            return
+
+        base: list[str] = []
+        while len(segments) > 1 and not _GLOB_MAGIC.search(segments[0]):
+            if segments[0] == "..":
+                root = root.parent
+            else:
+                base.append(segments[0])
+            segments.pop(0)
+
+        walk_root = root.joinpath(*base)
+        if not walk_root.is_dir():
+            return
+
+        recursive = any("**" in s for s in segments)
+        max_depth = None if recursive else len(segments) - 1
+        regex = re.compile(f"^{glob_to_regex('/'.join(segments))}$")
+        # iter_files walks the resolved path; a base reached through a
+        # symlinked directory keeps its name in the results.
+        prefix = str(walk_root.resolve()).rstrip(os.sep) + os.sep
+
+        for path in self.iter_files(walk_root, include_hidden=True, max_depth=max_depth):
+            rel = str(path)[len(prefix) :].replace(os.sep, "/")
+            if regex.match(rel):
+                yield walk_root / rel
@@ -0,0 +1,330 @@
+from __future__ import annotations
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+import hashlib
+import os
+from pathlib import Path
+import re
+import sqlite3
+import time
+
+from config.config import Config
+from config.loader import get_data_dir
+from tools.files import BINARY_SNIFF_BYTES
+from tools.search.engine import required_literals
+from tools.search.tree import WorkspaceTree
+
+# files.kind
+KIND_UNINDEXED = 0  # too large or over the cap: always a candidate
+KIND_INDEXED = 1
+KIND_SKIPPED = 2  # binary or not UTF-8: never a grep match
+
+FLUSH_EVERY_FILES = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    kind INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram BLOB PRIMARY KEY,
+    ids BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class IndexStats:
+    files: int = 0
+    indexed: int = 0
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    dead_ids: int = 0
+    db_bytes: int = 0
+    seconds: float = 0.0
+
+
+def _trigrams(data: bytes) -> set[tuple[int, int, int]]:
+    # grep matches line by line, so trigrams spanning a newline never help;
+    # repeated lines are common in source and only need to be scanned once.
+    grams: set[tuple[int, int, int]] = set()
+    for line in set(data.lower().split(b"\n")):
+        grams.update(zip(line, line[1:], line[2:]))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Optional on-disk trigram index of a workspace, stored in SQLite. Posting
+    lists are append-only arrays of file ids; changed or deleted files get a
+    new id and their old id is simply dropped from `files`, so refreshes only
+    touch changed files. The index is rebuilt once dead ids outnumber live
+    ones.
+    """
+
+    def __init__(self, config: Config, root: Path, db_path: Path) -> None:
+        self.config = config
+        self.root = root.resolve()
+        self.db_path = db_path
+
+    @classmethod
+    def for_workspace(cls, config: Config) -> TrigramIndex:
+        root = config.cwd.resolve()
+        key = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+        return cls(config, root, get_data_dir() / "search-index" / f"{key}.sqlite")
+
+    def exists(self) -> bool:
+        return self.db_path.is_file()
+
+    def covers(self, path: Path) -> bool:
+        return path.resolve().is_relative_to(self.root)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def build(self, tree: WorkspaceTree | None = None) -> IndexStats:
+        if self.db_path.exists():
+            self.db_path.unlink()
+        return self.refresh(tree)
+
+    def refresh(self, tree: WorkspaceTree | None = None) -> IndexStats:
+        """
+        Bring the index up to date with the files on disk. With a shared
+        `tree`, directories whose mtime has not changed are not listed or
+        matched against ignore rules again, so a refresh costs one stat per
+        directory and file. Files are still stat'ed: an in-place edit does
+        not change its directory's mtime.
+        """
+        started = time.perf_counter()
+        settings = self.config.search_index
+        stats = IndexStats()
+
+        conn = self._connect()
+        try:
+            known = {
+                path: (file_id, size, mtime_ns)
+                for file_id, path, size, mtime_ns in conn.execute(
+                    "SELECT id, path, size, mtime_ns FROM files"
+                )
+            }
+            dead_ids = int(self._get_meta(conn, "dead_ids", "0"))
+
+            changed: list[tuple[str, int, int]] = []
+            seen: set[str] = set()
+
+            for path in (tree or WorkspaceTree()).iter_files(self.root):
+                key = str(path)
+                seen.add(key)
+                try:
+                    st = os.stat(key)
+                except OSError:
+                    continue
+
+                previous = known.get(key)
+                if previous and previous[1:] == (st.st_size, st.st_mtime_ns):
+                    continue
+
+                changed.append((key, st.st_size, st.st_mtime_ns))
+                if previous:
+                    stats.updated += 1
+                else:
+                    stats.added += 1
+
+            stale = [known[p][0] for p in known.keys() - seen]
+            stale += [known[p][0] for p, _, _ in changed if p in known]
+            stats.removed = len(known.keys() - seen)
+
+            for i in range(0, len(stale), 500):
+                chunk = stale[i : i + 500]
+                conn.execute(
+                    f"DELETE FROM files WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+            dead_ids += len(stale)
+
+            live = len(known) - len(stale) + len(changed)
+            needs_rebuild = dead_ids > max(1000, live)
+
+            if not needs_rebuild:
+                self._index_files(conn, changed, live - len(changed), settings)
+                self._set_meta(conn, "dead_ids", str(dead_ids))
+                conn.commit()
+
+                stats.files = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+                stats.indexed = conn.execute(
+                    "SELECT COUNT(*) FROM files WHERE kind = ?", (KIND_INDEXED,)
+                ).fetchone()[0]
+                stats.dead_ids = dead_ids
+        finally:
+            conn.close()
+
+        if needs_rebuild:
+            return self.build(tree)
+
+        stats.db_bytes = self.db_path.stat().st_size
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def _index_files(
+        self,
+        conn: sqlite3.Connection,
+        files: list[tuple[str, int, int]],
+        existing: int,
+        settings,
+    ) -> None:
+        pending: defaultdict[tuple[int, int, int], list[int]] = defaultdict(list)
+        over_cap = existing >= settings.max_files
+
+        for count, (path, size, mtime_ns) in enumerate(files, start=1):
+            kind = KIND_UNINDEXED
+            grams: set[tuple[int, int, int]] = set()
+
+            if not over_cap and size <= settings.max_file_bytes:
+                kind, grams = self._read_trigrams(path)
+
+            cursor = conn.execute(
+                "INSERT INTO files (path, size, mtime_ns, kind) VALUES (?, ?, ?, ?)",
+                (path, size, mtime_ns, kind),
+            )
+            file_id = cursor.lastrowid
+
+            for gram in grams:
+                pending[gram].append(file_id)
+
+            if count % FLUSH_EVERY_FILES == 0:
+                self._flush(conn, pending)
+                pending = defaultdict(list)
+                over_cap = over_cap or (
+                    existing + count >= settings.max_files
+                    or self.db_path.stat().st_size >= settings.max_index_bytes
+                )
+
+        self._flush(conn, pending)
+
+    def _read_trigrams(self, path: str) -> tuple[int, set[tuple[int, int, int]]]:
+        try:
+            with open(path, "rb") as fp:
+                data = fp.read()
+        except OSError:
+            return KIND_SKIPPED, set()
+
+        if b"\x00" in data[:BINARY_SNIFF_BYTES]:
+            return KIND_SKIPPED, set()
+
+        try:
+            data.decode("utf-8")
+        except UnicodeDecodeError:
+            return KIND_SKIPPED, set()
+
+        return KIND_INDEXED, _trigrams(data)
+
+    def _flush(
+        self,
+        conn: sqlite3.Connection,
+        pending: dict[tuple[int, int, int], list[int]],
+    ) -> None:
+        for gram, ids in pending.items():
+            gram = bytes(gram)
+            row = conn.execute(
+                "SELECT ids FROM postings WHERE trigram = ?", (gram,)
+            ).fetchone()
+            blob = (row[0] if row else b"") + array("I", ids).tobytes()
+            conn.execute(
+                "INSERT OR REPLACE INTO postings (trigram, ids) VALUES (?, ?)",
+                (gram, blob),
+            )
+        conn.commit()
+
+    def candidates(
+        self,
+        pattern: re.Pattern[str],
+        under: Path,
+        tree: WorkspaceTree | None = None,
+    ) -> list[Path] | None:
+        """
+        Refresh the index and return the files under `under` that may match
+        `pattern`, or None when the index cannot answer: the pattern has no
+        literal to narrow on, or nothing under `under` is indexed (an
+        ignored or excluded directory such as build/ or node_modules/).
+        """
+        grams: set[tuple[int, int, int]] = set()
+        for literal in required_literals(pattern.pattern, pattern.flags):
+            if pattern.flags & re.IGNORECASE and not literal.isascii():
+                continue
+            data = literal.encode("utf-8")
+            if len(data) >= 3:
+                grams |= _trigrams(data)
+
+        if not grams:
+            return None
+
+        self.refresh(tree)
+
+        prefix = str(under.resolve())
+        conn = self._connect()
+        try:
+            # '0' sorts right after os.sep, so this range is "under prefix/".
+            dir_prefix = prefix.rstrip(os.sep) + os.sep
+            row = conn.execute(
+                "SELECT 1 FROM files WHERE path = ? OR (path >= ? AND path < ?) LIMIT 1",
+                (prefix, dir_prefix, dir_prefix[:-1] + chr(ord(os.sep) + 1)),
+            ).fetchone()
+            if row is None:
+                return None
+
+            ids: set[int] | None = None
+            for gram in grams:
+                row = conn.execute(
+                    "SELECT ids FROM postings WHERE trigram = ?", (bytes(gram),)
+                ).fetchone()
+                posting = set(array("I", row[0])) if row else set()
+                ids = posting if ids is None else ids & posting
+                if not ids:
+                    break
+
+            paths = [
+                path
+                for (path,) in conn.execute(
+                    "SELECT path FROM files WHERE kind = ?", (KIND_UNINDEXED,)
+                )
+            ]
+            id_list = sorted(ids or ())
+            for i in range(0, len(id_list), 500):
+                chunk = id_list[i : i + 500]
+                paths.extend(
+                    path
+                    for (path,) in conn.execute(
+                        f"SELECT path FROM files WHERE id IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                )
+        finally:
+            conn.close()
+
+        return [
+            Path(p)
+            for p in sorted(paths)
+            if p == prefix or p.startswith(prefix.rstrip(os.sep) + os.sep)
+        ]
+
+    def _get_meta(self, conn: sqlite3.Connection, key: str, default: str) -> str:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: str) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
@@ -0,0 +1,28 @@
+from tools.shell.condense import CONDENSERS, Condensed, Condenser, condense_output
+from tools.shell.jobs import Job, JobError, JobManager, JobOutput
+from tools.shell.limits import Cgroup, ResourceLimiter, ResourceUsage
+from tools.shell.memo import CachedCommand, CommandCache, CommandState
+from tools.shell.output import OutputBuffer, ProgressReporter, pump
+from tools.shell.session import CommandResult, ShellSession
+
+__all__ = [
+    "CONDENSERS",
+    "Condensed",
+    "Condenser",
+    "condense_output",
+    "Job",
+    "JobError",
+    "JobManager",
+    "JobOutput",
+    "Cgroup",
+    "ResourceLimiter",
+    "ResourceUsage",
+    "CachedCommand",
+    "CommandCache",
+    "CommandState",
+    "OutputBuffer",
+    "ProgressReporter",
+    "pump",
+    "CommandResult",
+    "ShellSession",
+]
@@ -0,0 +1,490 @@
+from __future__ import annotations
+import abc
+from collections import Counter
+from dataclasses import dataclass
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Outputs smaller than this are passed through as they are
+MIN_CONDENSE_LINES = 40
+# A condensed output must be at most this fraction of the original
+MAX_CONDENSED_RATIO = 0.75
+MAX_ERRORS = 30
+MAX_WARNINGS = 15
+
+_ANSI = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+# Quoted names in diagnostics, so "unused variable 'a'" and "... 'b'" group
+_QUOTED = re.compile(r"‘[^’]*’|'[^']*'|`[^`]*`|\"[^\"]*\"")
+
+
+@dataclass(slots=True)
+class Condensed:
+    condenser: str
+    text: str
+    original_lines: int
+
+    @property
+    def lines(self) -> int:
+        return self.text.count("\n") + 1
+
+
+def clean_lines(text: str) -> list[str]:
+    """
+    Lines as a terminal would show them: colour codes removed, and for
+    progress bars redrawn with carriage returns, only the final state.
+    """
+    lines = []
+    for line in _ANSI.sub("", text).split("\n"):
+        line = line.rstrip("\r")
+        if "\r" in line:
+            line = line.rsplit("\r", 1)[1]
+        lines.append(line)
+    return lines
+
+
+def _grouped(lines: list[str], limit: int) -> list[str]:
+    """Distinct lines in first-seen order, repeats shown as a count."""
+    counts = Counter(lines)
+    out = []
+    for line, count in counts.items():
+        if len(out) == limit:
+            out.append(f"... and {len(counts) - limit} more distinct lines")
+            break
+        out.append(f"{line} (x{count})" if count > 1 else line)
+    return out
+
+
+def _warning_key(message: str) -> str:
+    return _QUOTED.sub("'…'", message)
+
+
+class Condenser(abc.ABC):
+    """
+    Recognises one tool's output and reduces it to what matters to the
+    model: failures and errors with their file:line references, distinct
+    warnings, and the final summary. Everything else (progress, passing
+    tests, download logs) is dropped.
+    """
+
+    name = "base"
+    command_pattern: re.Pattern | None = None
+    output_pattern: re.Pattern | None = None
+
+    def detect(self, command: str, text: str) -> bool:
+        if self.command_pattern is not None and self.command_pattern.search(command):
+            return True
+        return self.output_pattern is not None and bool(self.output_pattern.search(text))
+
+    @abc.abstractmethod
+    def condense(self, lines: list[str]) -> str | None:
+        pass
+
+
+class PytestCondenser(Condenser):
+    name = "pytest"
+    command_pattern = re.compile(r"\bpy\.?test\b")
+    output_pattern = re.compile(r"^=+ test session starts =+$", re.M)
+
+    _section = re.compile(r"^=+ (.+?) =+$")
+    _block = re.compile(r"^_{3,} (.+?) _{3,}$")
+    _location = re.compile(r"^(\S+\.py):(\d+): (\w+)")
+    _summary = re.compile(
+        r"^=*\s*(no tests ran|(\d+ (passed|failed|errors?|skipped|xfailed|xpassed|"
+        r"deselected|warnings?|rerun)(, )?)+)( in [\d.]+s.*)?\s*=*$"
+    )
+
+    def condense(self, lines: list[str]) -> str | None:
+        out: list[str] = []
+        failures: list[str] = []
+        short_summary: list[str] = []
+        warnings: list[str] = []
+        summary = None
+
+        section = ""
+        block_title = None
+        block: list[str] = []
+
+        def finish_block() -> None:
+            if block_title is None:
+                return
+            location = None
+            errors = []
+            for line in block:
+                match = self._location.match(line)
+                if match:
+                    location = f"{match.group(1)}:{match.group(2)}"
+                elif line.startswith("E "):
+                    errors.append("    " + line[1:].strip())
+            header = f"- {block_title}" + (f" ({location})" if location else "")
+            failures.append(header)
+            failures.extend(errors[:10])
+            if len(errors) > 10:
+                failures.append(f"    ... {len(errors) - 10} more lines")
+
+        for line in lines:
+            if self._summary.match(line.strip()):
+                summary = line.strip("= ")
+                continue
+
+            match = self._section.match(line)
+            if match:
+                finish_block()
+                block_title, block = None, []
+                section = match.group(1).lower()
+                continue
+
+            if section in ("failures", "errors"):
+                match = self._block.match(line)
+                if match:
+                    finish_block()
+                    block_title, block = match.group(1), []
+                else:
+                    block.append(line)
+            elif section == "short test summary info":
+                if line.strip():
+                    short_summary.append(line)
+            elif section == "warnings summary":
+                if re.search(r"\w+Warning\b", line):
+                    warnings.append(line.strip())
+            elif line.startswith(("collected ", "collecting ", "ERROR ")):
+                out.append(line.strip())
+        finish_block()
+
+        if summary is None and not failures:
+            return None
+
+        if failures:
+            out.append("")
+            out.append("Failures:")
+            out.extend(failures)
+        if warnings:
+            out.append("")
+            out.append("Warnings:")
+            out.extend(_grouped(warnings, MAX_WARNINGS))
+        if short_summary:
+            out.append("")
+            out.extend(short_summary[:50])
+            if len(short_summary) > 50:
+                out.append(f"... {len(short_summary) - 50} more")
+        if summary:
+            out.append("")
+            out.append(summary)
+        return "\n".join(out).strip()
+
+
+class UnittestCondenser(Condenser):
+    name = "unittest"
+    command_pattern = re.compile(r"\bunittest\b")
+    output_pattern = re.compile(r"^Ran \d+ tests? in ", re.M)
+
+    _title = re.compile(r"^(FAIL|ERROR): (.+)$")
+    _frame = re.compile(r'^\s*File "(.+?)", line (\d+)')
+    _verbose = re.compile(r" \.\.\. (FAIL|ERROR|unexpected success)$")
+
+    def condense(self, lines: list[str]) -> str | None:
+        out: list[str] = []
+        failures: list[str] = []
+        tail: list[str] = []
+
+        title = None
+        block: list[str] = []
+
+        def finish_block() -> None:
+            if title is None:
+                return
+            location = None
+            message = []
+            for line in block:
+                match = self._frame.match(line)
+                if match:
+                    location = f"{match.group(1)}:{match.group(2)}"
+                    message = []
+                elif line.strip() and not line.startswith(" ") and not line.startswith("Traceback"):
+                    message.append("    " + line)
+            failures.append(f"- {title}" + (f" ({location})" if location else ""))
+            failures.extend(message[:8])
+
+        for i, line in enumerate(lines):
+            match = self._title.match(line)
+            if match:
+                finish_block()
+                title, block = f"{match.group(1)}: {match.group(2)}", []
+            elif line.startswith("Ran ") or (
+                line.startswith("-" * 20) and i + 1 < len(lines) and lines[i + 1].startswith("Ran ")
+            ):
+                finish_block()
+                title = None
+                if line.startswith("Ran "):
+                    tail.append(line)
+            elif title is not None:
+                if not line.startswith(("=" * 20, "-" * 20)):
+                    block.append(line)
+            elif tail and line.strip():
+                tail.append(line)
+            elif self._verbose.search(line):
+                out.append(line)
+        finish_block()
+
+        if not tail:
+            return None
+
+        if failures:
+            out.append("Failures:")
+            out.extend(failures)
+            out.append("")
+        out.extend(tail)
+        return "\n".join(out).strip()
+
+
+class CompilerCondenser(Condenser):
+    name = "compiler"
+    command_pattern = re.compile(r"(^|[\s/;&|])(gcc|g\+\+|clang\+?\+?|cc|c\+\+|make|cmake|ninja)\b")
+    output_pattern = re.compile(r"^[^\s:][^:\n]*:\d+:\d+: (fatal error|error|warning): ", re.M)
+
+    _diagnostic = re.compile(
+        r"^(?P<loc>[^\s:][^:]*:\d+(?::\d+)?): (?P<sev>fatal error|error|warning): (?P<msg>.*)$"
+    )
+    _keep = re.compile(
+        r"(undefined reference to|ld: |collect2: |make(\[\d+\])?: \*\*\*|"
+        r"^\d+ (errors?|warnings?)( and \d+ warnings?)? generated)"
+    )
+
+    def condense(self, lines: list[str]) -> str | None:
+        errors: list[str] = []
+        warnings: dict[str, list[str]] = {}
+        other: list[str] = []
+
+        for line in lines:
+            match = self._diagnostic.match(line)
+            if match:
+                if match.group("sev") == "warning":
+                    message = match.group("msg")
+                    warnings.setdefault(_warning_key(message), []).append(
+                        f"{match.group('loc')}: {message}"
+                    )
+                else:
+                    errors.append(f"{match.group('loc')}: {match.group('sev')}: {match.group('msg')}")
+            elif self._keep.search(line):
+                other.append(line.strip())
+
+        if not errors and not warnings and not other:
+            return None
+
+        out = [f"{len(errors)} errors, {sum(map(len, warnings.values()))} warnings"]
+        if errors:
+            out.append("")
+            out.append("Errors:")
+            unique = list(dict.fromkeys(errors))
+            out.extend(unique[:MAX_ERRORS])
+            if len(unique) > MAX_ERRORS:
+                out.append(f"... {len(unique) - MAX_ERRORS} more errors")
+        if warnings:
+            out.append("")
+            out.append("Warnings:")
+            for first, *rest in list(warnings.values())[:MAX_WARNINGS]:
+                out.append(f"{first} (and {len(rest)} more like it)" if rest else first)
+            if len(warnings) > MAX_WARNINGS:
+                out.append(f"... {len(warnings) - MAX_WARNINGS} more distinct warnings")
+        if other:
+            out.append("")
+            out.extend(_grouped(other, MAX_ERRORS))
+        return "\n".join(out)
+
+
+class TscCondenser(Condenser):
+    name = "tsc"
+    command_pattern = re.compile(r"\btsc\b")
+    output_pattern = re.compile(r"error TS\d+:")
+
+    _diagnostic = re.compile(
+        r"^(?P<file>\S.*?)(?:\((?P<line>\d+),(?P<col>\d+)\)|:(?P<line2>\d+):(?P<col2>\d+))"
+        r"\s*[:-]\s*error (?P<code>TS\d+): (?P<msg>.*)$"
+    )
+    _found = re.compile(r"^Found \d+ errors?")
+
+    def condense(self, lines: list[str]) -> str | None:
+        errors = []
+        footer = []
+        for line in lines:
+            match = self._diagnostic.match(line)
+            if match:
+                where = f"{match.group('file')}:{match.group('line') or match.group('line2')}"
+                errors.append(f"{where}: {match.group('code')}: {match.group('msg')}")
+            elif self._found.match(line):
+                footer.append(line)
+
+        if not errors:
+            return None
+
+        unique = list(dict.fromkeys(errors))
+        out = unique[:MAX_ERRORS]
+        if len(unique) > MAX_ERRORS:
+            out.append(f"... {len(unique) - MAX_ERRORS} more errors")
+        out.extend(footer or [f"{len(errors)} errors"])
+        return "\n".join(out)
+
+
+class CargoCondenser(Condenser):
+    name = "cargo"
+    command_pattern = re.compile(r"\bcargo\b")
+    output_pattern = re.compile(r"^error\[E\d+\]:", re.M)
+
+    _diagnostic = re.compile(r"^(?P<sev>error|warning)(?P<code>\[\w+\])?: (?P<msg>.*)$")
+    _arrow = re.compile(r"^\s*--> (\S+)")
+    _progress = re.compile(r"^\s*(Compiling|Checking|Downloaded|Downloading|Fresh|Updating|Locking|Adding|Blocking)\b")
+    _keep = re.compile(r"^(test result:|test .* \.\.\. FAILED|thread '.*' panicked at|failures:$|\s+Finished )")
+
+    def condense(self, lines: list[str]) -> str | None:
+        errors: list[str] = []
+        warnings: dict[str, list[str]] = {}
+        keep: list[str] = []
+        progress = 0
+        pending = None
+
+        for line in lines:
+            match = self._diagnostic.match(line)
+            if match:
+                pending = match
+                # Summaries like "could not compile" carry no location.
+                if match.group("sev") == "error" and not match.group("code"):
+                    errors.append(f"error: {match.group('msg')}")
+                    pending = None
+                elif match.group("sev") == "warning" and " generated " in match.group("msg"):
+                    keep.append(line)
+                    pending = None
+                continue
+
+            arrow = self._arrow.match(line)
+            if arrow and pending is not None:
+                sev, code, msg = pending.group("sev"), pending.group("code") or "", pending.group("msg")
+                if sev == "error":
+                    errors.append(f"{arrow.group(1)}: error{code}: {msg}")
+                else:
+                    warnings.setdefault(_warning_key(msg), []).append(f"{arrow.group(1)}: {msg}")
+                pending = None
+            elif self._progress.match(line):
+                progress += 1
+            elif self._keep.match(line):
+                keep.append(line.strip())
+
+        if not errors and not warnings and not keep:
+            return None
+
+        out = []
+        if progress:
+            out.append(f"[{progress} progress lines omitted]")
+        if errors:
+            out.append("Errors:")
+            unique = list(dict.fromkeys(errors))
+            out.extend(unique[:MAX_ERRORS])
+            if len(unique) > MAX_ERRORS:
+                out.append(f"... {len(unique) - MAX_ERRORS} more errors")
+        if warnings:
+            out.append("Warnings:")
+            for first, *rest in list(warnings.values())[:MAX_WARNINGS]:
+                out.append(f"{first} (and {len(rest)} more like it)" if rest else first)
+            if len(warnings) > MAX_WARNINGS:
+                out.append(f"... {len(warnings) - MAX_WARNINGS} more distinct warnings")
+        out.extend(_grouped(keep, MAX_ERRORS))
+        return "\n".join(out)
+
+
+class NpmCondenser(Condenser):
+    name = "npm"
+    command_pattern = re.compile(
+        r"^\s*(npm|yarn|pnpm)(\s+(install|i|ci|add|update|upgrade|up|remove|rm|uninstall|audit)\b|\s*$)"
+    )
+
+    _error = re.compile(r"^(npm (ERR!|error)|error |ERR_PNPM|\s*ERR!)", re.I)
+    _warning = re.compile(r"^(npm WARN|npm warn|warning |WARN )")
+    _summary = re.compile(
+        r"^(added|removed|changed|up to date|audited|found \d+|\d+ (packages?|vulnerabilit)|"
+        r"Done in|Packages: |Progress: resolved .* done)"
+    )
+
+    def condense(self, lines: list[str]) -> str | None:
+        errors = [line for line in lines if self._error.match(line)]
+        warnings = [line for line in lines if self._warning.match(line)]
+        summary = [line for line in lines if self._summary.match(line)]
+        if not errors and not warnings and not summary:
+            return None
+
+        out = []
+        if errors:
+            out.extend(_grouped(errors, MAX_ERRORS))
+        if warnings:
+            out.append(f"{len(warnings)} warnings:")
+            out.extend(_grouped(warnings, MAX_WARNINGS))
+        out.extend(summary)
+        return "\n".join(out)
+
+
+class PipCondenser(Condenser):
+    name = "pip"
+    command_pattern = re.compile(r"\bpip3?\s+(install|download|wheel)\b|\bpip\.py\b")
+
+    _noise = re.compile(
+        r"^\s*(Collecting|Downloading|Using cached|Obtaining|Preparing metadata|"
+        r"Getting requirements|Installing build dependencies|Building wheels? for|"
+        r"Created wheel|Stored in directory|Installing collected packages|Attempting uninstall|"
+        r"Found existing installation|Successfully uninstalled|Requirement already satisfied|"
+        r"Resolved \d+|Prepared \d+|Downloaded \d+|Using Python|[━─╸\s\d./%a-zA-Z]*[━─╸]+)"
+    )
+    _keep = re.compile(r"^\s*(ERROR|error|WARNING|Successfully installed|Installed \d+|[+-] \S+==)")
+
+    def condense(self, lines: list[str]) -> str | None:
+        satisfied = sum(1 for line in lines if "Requirement already satisfied" in line)
+        noise = 0
+        kept = []
+        for line in lines:
+            if self._keep.match(line):
+                kept.append(line.rstrip())
+            elif self._noise.match(line):
+                noise += 1
+            elif kept and line.startswith(" ") and kept[-1].lstrip().startswith(("ERROR", "error")):
+                # Indented detail under an error
+                kept.append(line.rstrip())
+
+        if not kept and not noise:
+            return None
+
+        out = [f"[{noise} progress lines omitted, {satisfied} requirements already satisfied]"]
+        out.extend(_grouped(kept, MAX_ERRORS * 2))
+        return "\n".join(out)
+
+
+CONDENSERS: list[Condenser] = [
+    PytestCondenser(),
+    UnittestCondenser(),
+    CargoCondenser(),
+    TscCondenser(),
+    CompilerCondenser(),
+    NpmCondenser(),
+    PipCondenser(),
+]
+
+
+def condense_output(command: str, text: str) -> Condensed | None:
+    """
+    Condense `text`, the output of `command`, with the first condenser
+    that recognises it. Returns None for small outputs, unknown formats or
+    when condensing would not save much.
+    """
+    if text.count("\n") < MIN_CONDENSE_LINES:
+        return None
+
+    lines = clean_lines(text)
+    for condenser in CONDENSERS:
+        if not condenser.detect(command, text):
+            continue
+        try:
+            condensed = condenser.condense(lines)
+        except Exception:
+            logger.exception(f"{condenser.name} condenser failed")
+            continue
+        if condensed and len(condensed) <= MAX_CONDENSED_RATIO * len(text):
+            return Condensed(condenser.name, condensed, len(lines))
+
+    return None
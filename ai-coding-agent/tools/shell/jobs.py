@@ -0,0 +1,237 @@
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import shutil
+import signal
+import tempfile
+import time
+from typing import Callable
+
+from tools.shell.limits import Cgroup, ResourceLimiter, ResourceUsage
+
+MAX_RUNNING_JOBS = 8
+# Seconds between SIGTERM and SIGKILL when a job is stopped
+KILL_GRACE = 2.0
+
+
+class JobError(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class Job:
+    id: str
+    command: str
+    cwd: Path
+    log_path: Path
+    process: asyncio.subprocess.Process
+    started_at: float
+    finished_at: float | None = None
+    killed: bool = False
+    cgroup: Cgroup | None = None
+    # Measured once the job ends, when it ran in its own cgroup
+    usage: ResourceUsage | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.process.returncode is None
+
+    @property
+    def exit_code(self) -> int | None:
+        return self.process.returncode
+
+    @property
+    def status(self) -> str:
+        if self.running:
+            return "running"
+        return "killed" if self.killed else "exited"
+
+    @property
+    def output_bytes(self) -> int:
+        try:
+            return self.log_path.stat().st_size
+        except OSError:
+            return 0
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    def describe(self) -> str:
+        state = self.status
+        if not self.running:
+            state += f", exit code {self.exit_code}"
+        if self.usage is not None and self.usage.cpu_seconds is not None:
+            state += f", {self.usage.cpu_seconds:.1f}s CPU"
+        return (
+            f"Job {self.id} [{state}, {self.elapsed:.0f}s, "
+            f"{self.output_bytes} bytes of output]: {self.command}"
+        )
+
+
+@dataclass(slots=True)
+class JobOutput:
+    text: str
+    offset: int
+    next_offset: int
+    total_bytes: int
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_offset < self.total_bytes
+
+
+class JobManager:
+    """
+    Shell commands running in the background. Each job's stdout and stderr
+    go straight to a log file in a per-manager temp directory, so output
+    costs no memory however long the job runs; callers poll its status
+    and read the log by offset. `close` stops every job and removes the
+    logs.
+    """
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, Job] = {}
+        self._waiters: set[asyncio.Task] = set()
+        self._next_id = 1
+        self._dir: Path | None = None
+
+    @property
+    def jobs(self) -> list[Job]:
+        return list(self._jobs.values())
+
+    def get(self, job_id: str) -> Job:
+        job = self._jobs.get(job_id.strip())
+        if job is None:
+            raise JobError(f"No such job: {job_id}")
+        return job
+
+    async def start(
+        self,
+        command: str,
+        cwd: Path,
+        env: dict[str, str],
+        limiter: ResourceLimiter | None = None,
+    ) -> Job:
+        running = sum(1 for job in self._jobs.values() if job.running)
+        if running >= MAX_RUNNING_JOBS:
+            raise JobError(
+                f"{running} background jobs are already running; "
+                "wait for one to finish or stop one with job_kill"
+            )
+
+        if self._dir is None:
+            self._dir = Path(tempfile.mkdtemp(prefix="agent-jobs-"))
+
+        job_id = str(self._next_id)
+        self._next_id += 1
+        log_path = self._dir / f"job-{job_id}.log"
+
+        argv = ["/bin/bash", "-c", command]
+        cgroup = preexec = None
+        if limiter is not None:
+            cgroup = limiter.cgroup()
+            argv = limiter.wrap(argv)
+            preexec = limiter.preexec(cgroup)
+
+        with open(log_path, "wb") as log:
+            process = await asyncio.create_subprocess_exec(
+                *argv,
+                preexec_fn=preexec,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=log,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=cwd,
+                env=env,
+                start_new_session=True,
+            )
+
+        job = Job(
+            id=job_id,
+            command=command,
+            cwd=cwd,
+            log_path=log_path,
+            process=process,
+            started_at=time.time(),
+            cgroup=cgroup,
+        )
+        self._jobs[job_id] = job
+
+        # Other children are reaped while a job runs, so only a cgroup
+        # gives the job's own usage.
+        measure = limiter.start(cgroup) if limiter is not None and cgroup is not None else None
+        waiter = asyncio.create_task(self._wait(job, measure))
+        self._waiters.add(waiter)
+        waiter.add_done_callback(self._waiters.discard)
+        return job
+
+    async def _wait(self, job: Job, measure: Callable[[], ResourceUsage] | None) -> None:
+        await job.process.wait()
+        job.finished_at = time.time()
+        if measure is not None:
+            job.usage = measure()
+        if job.cgroup is not None:
+            job.cgroup.remove()
+            job.cgroup = None
+
+    def read(self, job_id: str, offset: int | None, limit: int) -> JobOutput:
+        """
+        Up to `limit` bytes of the job's output from `offset`, or the last
+        `limit` bytes when `offset` is None.
+        """
+        job = self.get(job_id)
+        total = job.output_bytes
+        if offset is None:
+            offset = max(0, total - limit)
+        offset = min(offset, total)
+
+        with open(job.log_path, "rb") as fp:
+            fp.seek(offset)
+            data = fp.read(limit)
+
+        return JobOutput(
+            text=data.decode("utf-8", errors="replace"),
+            offset=offset,
+            next_offset=offset + len(data),
+            total_bytes=total,
+        )
+
+    async def kill(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        if not job.running:
+            return job
+
+        job.killed = True
+        for sig, grace in ((signal.SIGTERM, KILL_GRACE), (signal.SIGKILL, None)):
+            try:
+                os.killpg(os.getpgid(job.process.pid), sig)
+            except ProcessLookupError:
+                break
+            try:
+                await asyncio.wait_for(job.process.wait(), timeout=grace)
+                break
+            except asyncio.TimeoutError:
+                continue
+
+        job.finished_at = job.finished_at or time.time()
+        return job
+
+    async def close(self) -> None:
+        for job in self._jobs.values():
+            if job.running:
+                job.killed = True
+                try:
+                    os.killpg(os.getpgid(job.process.pid), signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await job.process.wait()
+
+        # Let the waiters record the exits and remove the jobs' cgroups.
+        await asyncio.gather(*self._waiters, return_exceptions=True)
+        self._jobs.clear()
+
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
@@ -0,0 +1,358 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import logging
+import os
+from pathlib import Path
+import shutil
+import sys
+from typing import TYPE_CHECKING, Any, Callable
+import uuid
+
+if TYPE_CHECKING:
+    from config.config import ShellEnvironmentPolicy
+
+if sys.platform != "win32":
+    import resource
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+IO_CLASSES = {"best-effort": "2", "idle": "3"}
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+MAXRSS_PER_MB = 1024 * 1024 if sys.platform == "darwin" else 1024
+
+
+@dataclass(slots=True)
+class ResourceUsage:
+    cpu_seconds: float | None = None
+    peak_rss_mb: float | None = None
+    # "cgroup" or "rusage": how the numbers were measured
+    source: str | None = None
+
+    def to_metadata(self) -> dict[str, Any]:
+        metadata: dict[str, Any] = {}
+        if self.cpu_seconds is not None:
+            metadata["cpu_seconds"] = round(self.cpu_seconds, 3)
+        if self.peak_rss_mb is not None:
+            metadata["peak_rss_mb"] = round(self.peak_rss_mb, 1)
+        if metadata:
+            metadata["usage_source"] = self.source
+        return metadata
+
+
+class Cgroup:
+    """
+    A cgroup v2 group for one command or shell, created under the agent's
+    own group. Only usable when that group is delegated to us (writable).
+
+    A group with processes in it cannot enable controllers for children
+    (EBUSY), so `delegate` first moves the agent into a leaf group of its
+    own; command groups are then created next to that leaf.
+    """
+
+    CONTROLLERS = ("memory", "pids", "cpu")
+    # The agent's own leaf under its original group
+    LEAF = "agent"
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @classmethod
+    def create(
+        cls,
+        parent: Path,
+        memory_max: int | None,
+        pids_max: int | None,
+    ) -> Cgroup | None:
+        """A new group under `parent`, which `delegate` has prepared."""
+        try:
+            path = parent / f"agent-shell-{uuid.uuid4().hex[:12]}"
+            path.mkdir()
+        except OSError:
+            return None
+
+        group = cls(path)
+        try:
+            if pids_max is not None:
+                (path / "pids.max").write_text(str(pids_max))
+            if memory_max is not None:
+                (path / "memory.max").write_text(str(memory_max))
+        except OSError:
+            group.remove()
+            return None
+
+        if memory_max is not None:
+            try:
+                (path / "memory.swap.max").write_text("0")
+            except OSError:
+                # Absent without swap accounting.
+                pass
+        return group
+
+    @classmethod
+    def own_group(cls) -> Path | None:
+        if not (CGROUP_ROOT / "cgroup.controllers").exists():
+            return None
+
+        try:
+            for line in Path("/proc/self/cgroup").read_text().splitlines():
+                if line.startswith("0::"):
+                    group = CGROUP_ROOT / line[3:].lstrip("/")
+                    # Already moved to our leaf by an earlier delegate()
+                    if group.name == cls.LEAF:
+                        group = group.parent
+                    return group if os.access(group, os.W_OK) else None
+        except OSError:
+            pass
+        return None
+
+    @classmethod
+    def delegate(cls, parent: Path) -> bool:
+        """
+        Prepare `parent` (the agent's own group) for command groups: move
+        its processes into the `LEAF` child, then enable the controllers
+        for its children. False if either step is not permitted, with the
+        processes moved back.
+        """
+        control = parent / "cgroup.subtree_control"
+        try:
+            enabled = control.read_text().split()
+            missing = [c for c in cls.CONTROLLERS if c not in enabled]
+            if not missing:
+                return True
+
+            leaf = parent / cls.LEAF
+            leaf.mkdir(exist_ok=True)
+            pids = (parent / "cgroup.procs").read_text().split()
+        except OSError:
+            logger.debug(f"Could not delegate cgroup {parent}", exc_info=True)
+            return False
+
+        # Every process left in `parent` makes the write below fail; this
+        # includes the agent and anything started alongside it. One that
+        # cannot be moved (exited, another user's, a kernel thread) is
+        # skipped, and decides whether the write succeeds.
+        moved = [pid for pid in pids if cls._move(pid, leaf)]
+        try:
+            control.write_text(" ".join(f"+{c}" for c in missing))
+        except OSError:
+            logger.debug(f"Could not delegate cgroup {parent}", exc_info=True)
+            for pid in moved:
+                cls._move(pid, parent)
+            return False
+        return True
+
+    @staticmethod
+    def _move(pid: str, group: Path) -> bool:
+        try:
+            (group / "cgroup.procs").write_text(pid)
+        except OSError:
+            return False
+        return True
+
+    def attach_self(self) -> None:
+        """Move the calling process into the group; runs in the child before exec."""
+        with open(self.path / "cgroup.procs", "w") as fp:
+            fp.write("0")
+
+    def _stat(self, name: str, key: str | None = None) -> int | None:
+        try:
+            text = (self.path / name).read_text()
+        except OSError:
+            return None
+        if key is None:
+            return int(text.strip())
+        for line in text.splitlines():
+            field, _, value = line.partition(" ")
+            if field == key:
+                return int(value)
+        return None
+
+    def cpu_usec(self) -> int | None:
+        return self._stat("cpu.stat", "usage_usec")
+
+    def peak_bytes(self) -> int | None:
+        return self._stat("memory.peak")
+
+    def open_peak(self) -> int | None:
+        """
+        A descriptor on memory.peak reset to the current usage, so reads
+        through it give the peak from now on; None where the kernel cannot
+        reset it (before Linux 6.12). The caller closes it.
+        """
+        try:
+            fd = os.open(self.path / "memory.peak", os.O_RDWR)
+        except OSError:
+            return None
+        try:
+            os.write(fd, b"reset\n")
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    def remove(self) -> None:
+        try:
+            self.path.rmdir()
+        except OSError:
+            # Still has processes (e.g. an escaped daemon); leave it be.
+            logger.debug(f"Could not remove cgroup {self.path}")
+
+
+class ResourceLimiter:
+    """
+    Applies the shell policy's resource limits to the processes a shell
+    command starts, and measures what they used.
+
+    Limits are set with setrlimit in the child before exec, so they hold
+    for the command and everything it spawns: CPU seconds and open files
+    per process, address space per process (or total memory when a cgroup
+    is available), and the process count (a per-user limit for rlimits,
+    per command with a cgroup). Priority is lowered with nice and, when
+    the `ionice` tool exists, the I/O class.
+    """
+
+    def __init__(self, policy: ShellEnvironmentPolicy) -> None:
+        self.policy = policy
+        self._ionice = shutil.which("ionice") if policy.io_priority else None
+        # False once cgroups turned out not to be usable here. Only the
+        # memory and process limits need them, and setting them up
+        # rearranges the agent's group, so without those limits it stays
+        # untouched.
+        self._cgroups = (
+            policy.use_cgroups
+            and sys.platform != "win32"
+            and (policy.memory_limit_mb is not None or policy.max_processes is not None)
+        )
+        self._cgroup_parent: Path | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return sys.platform != "win32"
+
+    def cgroup(self) -> Cgroup | None:
+        """A fresh cgroup with the policy's limits, or None without cgroup v2."""
+        if not self._cgroups:
+            return None
+
+        if self._cgroup_parent is None:
+            parent = Cgroup.own_group()
+            if parent is not None and Cgroup.delegate(parent):
+                self._cgroup_parent = parent
+        memory = self.policy.memory_limit_mb
+        group = (
+            Cgroup.create(
+                self._cgroup_parent,
+                memory_max=memory * 1024 * 1024 if memory else None,
+                pids_max=self.policy.max_processes,
+            )
+            if self._cgroup_parent is not None
+            else None
+        )
+        if group is None:
+            logger.debug("cgroup v2 is not available; using rlimits only")
+            self._cgroups = False
+        return group
+
+    def wrap(self, argv: list[str]) -> list[str]:
+        if self._ionice is None:
+            return argv
+        return [self._ionice, "-c", IO_CLASSES[self.policy.io_priority], *argv]
+
+    def preexec(self, cgroup: Cgroup | None = None) -> Callable[[], None] | None:
+        if not self.enabled:
+            return None
+
+        policy = self.policy
+        limits: list[tuple[int, int]] = []
+        if policy.cpu_time_limit:
+            limits.append((resource.RLIMIT_CPU, policy.cpu_time_limit))
+        if policy.memory_limit_mb and cgroup is None:
+            limits.append((resource.RLIMIT_AS, policy.memory_limit_mb * 1024 * 1024))
+        if policy.max_open_files:
+            limits.append((resource.RLIMIT_NOFILE, policy.max_open_files))
+        if policy.max_processes and cgroup is None:
+            limits.append((resource.RLIMIT_NPROC, policy.max_processes))
+        nice = policy.nice
+
+        if not limits and not nice and cgroup is None:
+            return None
+
+        def apply() -> None:
+            if cgroup is not None:
+                cgroup.attach_self()
+            for limit, value in limits:
+                _, hard = resource.getrlimit(limit)
+                if hard != resource.RLIM_INFINITY:
+                    value = min(value, hard)
+                # A CPU hard limit one second past the soft one makes the
+                # kernel send SIGXCPU first, so the cause is recognizable.
+                new_hard = value + 1 if limit == resource.RLIMIT_CPU else value
+                if hard != resource.RLIM_INFINITY:
+                    new_hard = min(new_hard, hard)
+                resource.setrlimit(limit, (value, new_hard))
+            if nice:
+                os.nice(nice)
+
+        return apply
+
+    def start(
+        self,
+        cgroup: Cgroup | None = None,
+        shared: bool = False,
+    ) -> Callable[[], ResourceUsage]:
+        """
+        Begin measuring; the returned function gives the usage since, once
+        the command's processes have been reaped. A `shared` cgroup (the
+        persistent shell's) outlives the command, so its peak memory only
+        counts where the kernel can reset it; call the function even when
+        the result is not needed, to release it.
+        """
+        if not self.enabled:
+            return ResourceUsage
+
+        if cgroup is not None:
+            cpu_before = cgroup.cpu_usec()
+            peak_fd = cgroup.open_peak() if shared else None
+
+            def peak_bytes() -> int | None:
+                if not shared:
+                    return cgroup.peak_bytes()
+                if peak_fd is None:
+                    return None
+                try:
+                    return int(os.pread(peak_fd, 64, 0))
+                except (OSError, ValueError):
+                    return None
+                finally:
+                    os.close(peak_fd)
+
+            def from_cgroup() -> ResourceUsage:
+                cpu, peak = cgroup.cpu_usec(), peak_bytes()
+                return ResourceUsage(
+                    cpu_seconds=(
+                        (cpu - cpu_before) / 1e6
+                        if cpu is not None and cpu_before is not None
+                        else None
+                    ),
+                    peak_rss_mb=peak / (1024 * 1024) if peak is not None else None,
+                    source="cgroup",
+                )
+
+            return from_cgroup
+
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        def from_rusage() -> ResourceUsage:
+            # Children of this process reaped since `before`: exact for one
+            # command at a time, an over-estimate while background jobs end.
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            cpu = (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+            # ru_maxrss is the largest child ever; it only speaks for this
+            # command if the command raised it.
+            peak = (
+                after.ru_maxrss / MAXRSS_PER_MB if after.ru_maxrss > before.ru_maxrss else None
+            )
+            return ResourceUsage(cpu_seconds=cpu, peak_rss_mb=peak, source="rusage")
+
+        return from_rusage
@@ -0,0 +1,205 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import re
+import shlex
+import time
+from typing import TYPE_CHECKING, Any
+
+from safety.approval import is_safe_command
+from tools.base import ToolResult
+
+if TYPE_CHECKING:
+    from config.config import ShellEnvironmentPolicy
+
+MAX_ENTRIES = 256
+# Larger outputs are not worth keeping in memory
+MAX_ENTRY_CHARS = 256 * 1024
+# Paths named by a command that are checked for changes
+MAX_PATHS = 64
+
+# Redirection, pipes, command lists and substitutions can write or run
+# anything, whatever the first word is.
+_SHELL_SYNTAX = re.compile(r"[;&|<>`$(){}\n]")
+_GLOB = re.compile(r"[*?\[]")
+
+# Safe, but their output changes with time rather than with files
+VOLATILE = {"date", "cal", "uptime", "ps", "top", "htop", "pgrep", "less", "more"}
+FIND_ACTIONS = {"-delete", "-exec", "-execdir", "-ok", "-okdir", "-fls", "-fprint", "-fprint0", "-fprintf"}
+# The only arguments with which `git branch|tag|remote` just list
+GIT_LISTING_ARGS = {
+    "-a", "--all", "-r", "--remotes", "-v", "-vv", "--verbose",
+    "-l", "--list", "--show-current", "--merged", "--no-merged",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class CommandState:
+    """What a command's output depends on, as far as the cache can tell."""
+
+    generation: int
+    # (path, mtime_ns, size) of the paths the command names; -1 when missing
+    paths: tuple[tuple[str, int, int], ...]
+
+
+@dataclass(slots=True)
+class CachedCommand:
+    state: CommandState
+    result: ToolResult
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+def _writes(argv: list[str]) -> bool:
+    """Whether a SAFE_PATTERNS command uses one of its writing forms."""
+    name, args = argv[0], argv[1:]
+    short_flags = "".join(a[1:] for a in args if a.startswith("-") and not a.startswith("--"))
+
+    if name == "sed":
+        return "i" in short_flags or any(a.startswith("--in-place") for a in args)
+    if name == "sort":
+        return "o" in short_flags or any(a.startswith("--output") for a in args)
+    if name == "find":
+        return any(a in FIND_ACTIONS for a in args)
+    if name == "git" and args:
+        if args[0] in ("branch", "tag", "remote"):
+            return any(a not in GIT_LISTING_ARGS for a in args[1:])
+        return any(a.startswith("--output") for a in args)
+    return False
+
+
+def _stat(path: Path) -> tuple[str, int, int]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (str(path), -1, -1)
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+def _git_dir(cwd: Path) -> Path | None:
+    for directory in (cwd, *cwd.parents):
+        if (directory / ".git").exists():
+            return directory / ".git"
+    return None
+
+
+class CommandCache:
+    """
+    Results of read-only shell commands (those matching SAFE_PATTERNS,
+    without redirection or chaining, and not in a writing form such as
+    `sed -i`), so repeated inspection commands like `git status` or
+    `ls -la` return at once.
+
+    A result is reused only while nothing it may depend on has changed:
+    the same command in the same directory, no write since (any write
+    tool or non-safe shell command calls `invalidate`, which bumps the
+    generation), the same mtime and size for the directory and every path
+    the command names, within `cache_ttl` seconds. Changes made outside
+    the agent to files the command does not name are only caught by the
+    TTL.
+    """
+
+    def __init__(self, policy: ShellEnvironmentPolicy) -> None:
+        self.policy = policy
+        self._entries: OrderedDict[tuple[str, str], CachedCommand] = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        # In a persistent shell earlier commands change the directory and
+        # environment a command sees.
+        return self.policy.cache_safe_commands and not self.policy.persistent_session
+
+    def read_only(self, command: str) -> bool:
+        """Whether `command` cannot change files; others call `invalidate`."""
+        return self._argv(command) is not None
+
+    def cacheable(self, command: str) -> bool:
+        argv = self._argv(command)
+        if argv is None or argv[0] in VOLATILE:
+            return False
+        # `tail -f` never finishes on its own
+        return not (argv[0] == "tail" and any(a in ("-f", "-F", "--follow") for a in argv))
+
+    def _argv(self, command: str) -> list[str] | None:
+        command = command.strip()
+        if not is_safe_command(command) or _SHELL_SYNTAX.search(command):
+            return None
+        try:
+            argv = shlex.split(command)
+        except ValueError:
+            return None
+        if not argv or _writes(argv):
+            return None
+        return argv
+
+    def state(self, command: str, cwd: Path) -> CommandState:
+        argv = self._argv(command) or []
+        paths = [cwd]
+        for arg in argv[1:]:
+            if arg.startswith("-"):
+                continue
+            glob = _GLOB.search(arg)
+            if glob:
+                # A pattern's matches change with its directory's entries.
+                arg = arg[: glob.start()].rpartition("/")[0] or "."
+            paths.append(cwd / os.path.expanduser(arg))
+
+        if argv[:1] == ["git"]:
+            git_dir = _git_dir(cwd)
+            if git_dir is not None:
+                paths.extend((git_dir / "HEAD", git_dir / "index"))
+
+        unique = list(dict.fromkeys(paths))[:MAX_PATHS]
+        return CommandState(self.generation, tuple(_stat(path) for path in unique))
+
+    def get(self, command: str, cwd: Path, state: CommandState) -> CachedCommand | None:
+        key = (command.strip(), str(cwd))
+        entry = self._entries.get(key)
+        if entry is None or entry.state != state or entry.age > self.policy.cache_ttl:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, command: str, cwd: Path, state: CommandState, result: ToolResult) -> None:
+        # Something wrote while the command ran; its output may be stale.
+        if state.generation != self.generation:
+            return
+        if len(result.output) + len(result.error or "") > MAX_ENTRY_CHARS:
+            return
+
+        self._entries[(command.strip(), str(cwd))] = CachedCommand(
+            state=state,
+            result=result,
+            stored_at=time.monotonic(),
+        )
+        while len(self._entries) > MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self.invalidations += 1
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+        }
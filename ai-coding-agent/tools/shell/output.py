@@ -0,0 +1,192 @@
+from __future__ import annotations
+import asyncio
+import codecs
+import os
+from pathlib import Path
+import shutil
+import tempfile
+import time
+from typing import BinaryIO, Callable
+
+# Bytes kept from the start and from the end of each output stream
+HEAD_BYTES = 32 * 1024
+TAIL_BYTES = 32 * 1024
+READ_CHUNK = 64 * 1024
+
+# Progress is reported at most this often, with at most this much text
+PROGRESS_INTERVAL = 0.5
+PROGRESS_MAX_CHARS = 4096
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+class OutputBuffer:
+    """
+    The head and tail of a byte stream of any length. The first
+    `head_bytes` are kept as they arrive; after that only the most recent
+    `tail_bytes` are, so memory stays bounded however noisy the command.
+
+    With `spill`, a stream that outgrows the buffer is also written in
+    full to a temp file (`spill_path`) from the moment bytes would first
+    be dropped, so the complete output can still be kept on disk.
+    """
+
+    def __init__(
+        self,
+        head_bytes: int = HEAD_BYTES,
+        tail_bytes: int = TAIL_BYTES,
+        spill: bool = False,
+    ) -> None:
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill = spill
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._spill_file: BinaryIO | None = None
+        self.spill_path: Path | None = None
+        self.total = 0
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+
+        if self._spill_file is not None:
+            self._spill_file.write(data)
+
+        self._tail += data
+        # Trim lazily so each byte is moved O(1) times on average.
+        if len(self._tail) > 2 * self.tail_bytes:
+            if self.spill and self.spill_path is None:
+                self._start_spill()
+            del self._tail[: len(self._tail) - self.tail_bytes]
+
+    def _start_spill(self) -> None:
+        fd, path = tempfile.mkstemp(prefix="agent-shell-", suffix=".out")
+        self._spill_file = os.fdopen(fd, "wb")
+        self.spill_path = Path(path)
+        # Until now the tail held every byte after the head.
+        self._spill_file.write(self._head)
+        self._spill_file.write(self._tail)
+
+    def close(self) -> None:
+        """Finish the spill file, if any, so it can be read."""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def discard(self) -> None:
+        self.close()
+        if self.spill_path is not None:
+            try:
+                self.spill_path.unlink()
+            except OSError:
+                pass
+            self.spill_path = None
+
+    def copy_to(self, fp: BinaryIO) -> None:
+        """Write the whole stream if it was spilled, else the buffered text."""
+        if self.spill_path is not None:
+            self.close()
+            with open(self.spill_path, "rb") as src:
+                shutil.copyfileobj(src, fp)
+        else:
+            fp.write(self.text().encode("utf-8"))
+
+    @property
+    def omitted(self) -> int:
+        return max(0, self.total - len(self._head) - min(len(self._tail), self.tail_bytes))
+
+    @property
+    def truncated(self) -> bool:
+        return self.omitted > 0
+
+    def text(self) -> str:
+        head = _decode(bytes(self._head))
+        tail = bytes(self._tail[-self.tail_bytes :]) if self._tail else b""
+
+        if not self.truncated:
+            return head + _decode(tail)
+
+        # The tail may start inside a multi-byte character.
+        start = 0
+        while start < min(3, len(tail)) and tail[start] & 0xC0 == 0x80:
+            start += 1
+        return (
+            head
+            + f"\n... [{self.omitted} bytes of output omitted] ...\n"
+            + _decode(tail[start:])
+        )
+
+
+class ProgressReporter:
+    """
+    Decodes output chunks as they arrive and hands them to `callback` at
+    most every `interval` seconds, keeping only the latest
+    PROGRESS_MAX_CHARS between reports.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[str], None] | None,
+        interval: float = PROGRESS_INTERVAL,
+    ) -> None:
+        self.callback = callback
+        self.interval = interval
+        self._pending: list[str] = []
+        self._pending_chars = 0
+        self._last = 0.0
+
+    def decoder(self) -> codecs.IncrementalDecoder:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, text: str) -> None:
+        if self.callback is None or not text:
+            return
+
+        self._pending.append(text)
+        self._pending_chars += len(text)
+        if self._pending_chars > 2 * PROGRESS_MAX_CHARS:
+            joined = "".join(self._pending)[-PROGRESS_MAX_CHARS:]
+            self._pending = [joined]
+            self._pending_chars = len(joined)
+
+        if time.monotonic() - self._last >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.callback is None or not self._pending:
+            return
+
+        text = "".join(self._pending)[-PROGRESS_MAX_CHARS:]
+        self._pending.clear()
+        self._pending_chars = 0
+        self._last = time.monotonic()
+        self.callback(text)
+
+
+async def pump(
+    stream: asyncio.StreamReader,
+    buffer: OutputBuffer,
+    progress: ProgressReporter | None = None,
+) -> None:
+    """Copy `stream` into `buffer` until EOF, reporting progress on the way."""
+    decoder = progress.decoder() if progress else None
+
+    while True:
+        data = await stream.read(READ_CHUNK)
+        if not data:
+            break
+        buffer.write(data)
+        if progress is not None:
+            progress.feed(decoder.decode(data))
+
+    if progress is not None:
+        progress.feed(decoder.decode(b"", final=True))
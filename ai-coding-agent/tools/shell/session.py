@@ -0,0 +1,220 @@
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import shlex
+import signal
+import uuid
+
+from tools.shell.limits import Cgroup, ResourceLimiter, ResourceUsage
+from tools.shell.output import READ_CHUNK, OutputBuffer, ProgressReporter
+
+
+@dataclass(slots=True)
+class CommandResult:
+    stdout: OutputBuffer
+    stderr: OutputBuffer
+    # None when the command timed out
+    exit_code: int | None
+    timed_out: bool = False
+    # True when the shell had to be (or will be) started afresh
+    restarted: bool = False
+    usage: ResourceUsage | None = None
+
+
+class ShellSession:
+    """
+    A long-lived bash process that runs commands one at a time, so `cd`,
+    `export`, functions and activated virtualenvs carry over between
+    calls (a command given its own `cwd` runs there without moving the
+    shell). Each command is sent as an `eval` with stdin from /dev/null,
+    followed by a random marker printed to stdout (with the exit status)
+    and to stderr; output up to the markers belongs to the command.
+
+    A command that times out kills the whole process group; the next
+    command starts a fresh shell. The same happens if the shell exits.
+    """
+
+    def __init__(
+        self,
+        cwd: Path,
+        env: dict[str, str],
+        limiter: ResourceLimiter | None = None,
+    ) -> None:
+        self.cwd = cwd
+        self.env = env
+        self.limiter = limiter
+        self._process: asyncio.subprocess.Process | None = None
+        # The shell and all its commands share one cgroup, when available
+        self._cgroup: Cgroup | None = None
+        self._marker = f"__agent_done_{uuid.uuid4().hex}__".encode()
+        self._lock = asyncio.Lock()
+        self.started = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def _start(self) -> asyncio.subprocess.Process:
+        argv = ["/bin/bash", "--noprofile", "--norc"]
+        preexec = None
+        if self.limiter is not None:
+            self._cgroup = self.limiter.cgroup()
+            argv = self.limiter.wrap(argv)
+            preexec = self.limiter.preexec(self._cgroup)
+
+        self._process = await asyncio.create_subprocess_exec(
+            *argv,
+            preexec_fn=preexec,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            env=self.env,
+            start_new_session=True,
+        )
+        self.started += 1
+        return self._process
+
+    def _script(self, command: str, cwd: Path | None) -> bytes:
+        marker = self._marker.decode()
+        lines = []
+        if cwd is None:
+            lines.append(f"eval {shlex.quote(command)} < /dev/null")
+            lines.append("__agent_status=$?")
+        else:
+            # A per-call cwd applies to this command only; the session's own
+            # directory is restored afterwards, even if the command cd'd.
+            lines.append("__agent_prev=$PWD")
+            lines.append(f"builtin cd -- {shlex.quote(str(cwd))} &&")
+            lines.append(f"eval {shlex.quote(command)} < /dev/null")
+            lines.append("__agent_status=$?")
+            lines.append('builtin cd -- "$__agent_prev" 2>/dev/null')
+        lines.append(f"printf '%s%d\\n' '{marker}' \"$__agent_status\"")
+        lines.append(f"printf '%s\\n' '{marker}' >&2")
+        return ("\n".join(lines) + "\n").encode()
+
+    async def run(
+        self,
+        command: str,
+        timeout: float,
+        cwd: Path | None = None,
+        progress: ProgressReporter | None = None,
+        spill: bool = False,
+    ) -> CommandResult:
+        async with self._lock:
+            restarted = not self.alive and self.started > 0
+            process = self._process if self.alive else await self._start()
+
+            # Per-command usage needs the cgroup: the shell's children are
+            # reaped by the shell, not by us.
+            measure = (
+                self.limiter.start(self._cgroup, shared=True)
+                if self.limiter is not None and self._cgroup is not None
+                else None
+            )
+
+            stdout = OutputBuffer(spill=spill)
+            stderr = OutputBuffer(spill=spill)
+            out_reader = asyncio.ensure_future(
+                self._read_until_marker(process.stdout, stdout, progress)
+            )
+            err_reader = asyncio.ensure_future(
+                self._read_until_marker(process.stderr, stderr, progress)
+            )
+            readers = asyncio.gather(out_reader, err_reader)
+
+            try:
+                process.stdin.write(self._script(command, cwd))
+                await process.stdin.drain()
+                status, _ = await asyncio.wait_for(asyncio.shield(readers), timeout=timeout)
+            except asyncio.TimeoutError:
+                usage = measure() if measure else None
+                await self._kill()
+                try:
+                    await asyncio.wait_for(readers, timeout=1)
+                except asyncio.TimeoutError:
+                    readers.cancel()
+                return CommandResult(
+                    stdout, stderr, None, timed_out=True, restarted=True, usage=usage
+                )
+            except (BrokenPipeError, ConnectionResetError):
+                # The shell died between commands; report what it printed.
+                await readers
+                status = None
+            except BaseException:
+                if measure:
+                    measure()
+                await self._kill()
+                readers.cancel()
+                raise
+
+            usage = measure() if measure else None
+            if status is None:
+                # The command ended the shell itself (e.g. `exit 3`).
+                exit_code = await process.wait()
+                await self._kill()
+                return CommandResult(stdout, stderr, exit_code, restarted=True, usage=usage)
+
+            return CommandResult(stdout, stderr, status, restarted=restarted, usage=usage)
+
+    async def _read_until_marker(
+        self,
+        stream: asyncio.StreamReader,
+        buffer: OutputBuffer,
+        progress: ProgressReporter | None,
+    ) -> int | None:
+        """
+        Copy `stream` into `buffer` up to the marker and return the exit
+        status printed after it (None on stderr, or if the stream ended).
+        """
+        marker = self._marker
+        decoder = progress.decoder() if progress else None
+        pending = bytearray()
+
+        def emit(data: bytes) -> None:
+            buffer.write(data)
+            if progress is not None:
+                progress.feed(decoder.decode(data))
+
+        while True:
+            index = pending.find(marker)
+            if index != -1:
+                end = pending.find(b"\n", index)
+                if end != -1:
+                    emit(bytes(pending[:index]))
+                    status = pending[index + len(marker) : end]
+                    return int(status) if status else None
+            else:
+                # Hold back what could be the start of a split marker.
+                keep = len(marker) - 1
+                if len(pending) > keep:
+                    emit(bytes(pending[:-keep]))
+                    del pending[:-keep]
+
+            data = await stream.read(READ_CHUNK)
+            if not data:
+                emit(bytes(pending))
+                if progress is not None:
+                    progress.feed(decoder.decode(b"", final=True))
+                return None
+            pending += data
+
+    async def _kill(self) -> None:
+        process = self._process
+        self._process = None
+        if process is not None and process.returncode is None:
+            try:
+                os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+        if self._cgroup is not None:
+            self._cgroup.remove()
+            self._cgroup = None
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._kill()
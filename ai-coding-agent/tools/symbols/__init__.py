@@ -0,0 +1,20 @@
+from tools.symbols.index import SymbolIndex, SymbolLocation
+from tools.symbols.outline import (
+    SUPPORTED_EXTENSIONS,
+    Symbol,
+    extract_symbols,
+    format_outline,
+    language_for,
+)
+from tools.symbols.repomap import RepoMap
+
+__all__ = [
+    "RepoMap",
+    "SymbolIndex",
+    "SymbolLocation",
+    "SUPPORTED_EXTENSIONS",
+    "Symbol",
+    "extract_symbols",
+    "format_outline",
+    "language_for",
+]
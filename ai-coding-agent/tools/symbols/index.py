@@ -0,0 +1,248 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import hashlib
+import os
+from pathlib import Path
+import sqlite3
+import time
+
+from config.config import Config
+from config.loader import get_data_dir
+from tools.files import FileInfoCache
+from tools.search import WorkspaceTree
+from tools.symbols.outline import SUPPORTED_EXTENSIONS, Symbol, extract_symbols
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    file_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    end_line INTEGER,
+    signature TEXT NOT NULL,
+    parent TEXT
+);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS symbols_file ON symbols (file_id);
+"""
+
+
+@dataclass
+class SymbolLocation:
+    path: str
+    symbol: Symbol
+
+
+class SymbolIndex:
+    """
+    Persistent index of definitions across the workspace, stored in SQLite
+    under the data dir. Each refresh stats the tree and re-parses only files
+    whose size or mtime changed, so lookups never scan file contents.
+    """
+
+    MAX_FILE_BYTES = 1024 * 1024
+
+    def __init__(self, root: Path, db_path: Path) -> None:
+        self.root = root.resolve()
+        self.db_path = db_path
+        # False when the last refresh stopped at its deadline
+        self.complete = True
+
+    @classmethod
+    def for_workspace(cls, config: Config) -> SymbolIndex:
+        root = config.cwd.resolve()
+        key = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+        return cls(root, get_data_dir() / "symbol-index" / f"{key}.sqlite")
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def refresh(
+        self,
+        workspace: WorkspaceTree | None = None,
+        file_info: FileInfoCache | None = None,
+        deadline: float | None = None,
+    ) -> int:
+        """
+        Bring the index up to date; returns the number of files re-parsed.
+        Past `deadline` (a time.monotonic() value) the refresh stops and
+        keeps what it has parsed so far, leaving `complete` False.
+        """
+        workspace = workspace or WorkspaceTree()
+        file_info = file_info or FileInfoCache()
+
+        conn = self._connect()
+        try:
+            known = {
+                path: (file_id, size, mtime_ns)
+                for file_id, path, size, mtime_ns in conn.execute(
+                    "SELECT id, path, size, mtime_ns FROM files"
+                )
+            }
+            seen: set[str] = set()
+            parsed = 0
+            self.complete = True
+
+            for path in workspace.iter_files(self.root):
+                if deadline is not None and time.monotonic() > deadline:
+                    self.complete = False
+                    break
+
+                key = str(path)
+                if os.path.splitext(key)[1].lower() not in SUPPORTED_EXTENSIONS:
+                    continue
+
+                try:
+                    st = os.stat(key)
+                except OSError:
+                    continue
+
+                seen.add(key)
+                previous = known.get(key)
+                if previous and previous[1:] == (st.st_size, st.st_mtime_ns):
+                    continue
+
+                if previous:
+                    self._delete(conn, previous[0])
+
+                symbols: list[Symbol] = []
+                if st.st_size <= self.MAX_FILE_BYTES:
+                    try:
+                        info, text = file_info.read_text(path)
+                    except OSError:
+                        continue
+                    if text is not None:
+                        if info.symbols is None:
+                            info.symbols = extract_symbols(key, text)
+                        symbols = info.symbols
+
+                cursor = conn.execute(
+                    "INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                    (key, st.st_size, st.st_mtime_ns),
+                )
+                conn.executemany(
+                    "INSERT INTO symbols (file_id, name, kind, line, end_line, signature, parent) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            cursor.lastrowid,
+                            s.name,
+                            s.kind,
+                            s.line,
+                            s.end_line,
+                            s.signature,
+                            s.parent,
+                        )
+                        for s in symbols
+                    ],
+                )
+                parsed += 1
+
+            # Unvisited files of an interrupted walk are not known to be gone.
+            if self.complete:
+                for path in known.keys() - seen:
+                    self._delete(conn, known[path][0])
+
+            conn.commit()
+        finally:
+            conn.close()
+
+        return parsed
+
+    def _delete(self, conn: sqlite3.Connection, file_id: int) -> None:
+        conn.execute("DELETE FROM symbols WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def find(
+        self,
+        name: str,
+        kind: str | None = None,
+        exact: bool = False,
+        limit: int = 50,
+    ) -> list[SymbolLocation]:
+        """
+        Look up definitions by name. Exact matches rank first, then prefix
+        and substring matches (case-insensitive) unless `exact` is set.
+        """
+        escaped = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        if exact:
+            where = "s.name = ?"
+            args: list = [name]
+        else:
+            where = "s.name LIKE ? ESCAPE '\\'"
+            args = [f"%{escaped}%"]
+
+        if kind:
+            where += " AND s.kind = ?"
+            args.append(kind)
+
+        query = (
+            "SELECT f.path, s.name, s.kind, s.line, s.end_line, s.signature, s.parent "
+            "FROM symbols s JOIN files f ON f.id = s.file_id "
+            f"WHERE {where} "
+            "ORDER BY s.name = ? DESC, s.name LIKE ? ESCAPE '\\' DESC, "
+            "length(s.name), f.path, s.line LIMIT ?"
+        )
+        args += [name, f"{escaped}%", limit]
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, args).fetchall()
+        finally:
+            conn.close()
+
+        return [
+            SymbolLocation(
+                path=path,
+                symbol=Symbol(
+                    name=sym_name,
+                    kind=sym_kind,
+                    line=line,
+                    end_line=end_line,
+                    signature=signature,
+                    parent=parent,
+                ),
+            )
+            for path, sym_name, sym_kind, line, end_line, signature, parent in rows
+        ]
+
+    def top_level(self) -> dict[str, list[tuple[str, str]]]:
+        """Top-level (name, kind) pairs per file path, in source order."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT f.path, s.name, s.kind FROM symbols s "
+                "JOIN files f ON f.id = s.file_id "
+                "WHERE s.parent IS NULL ORDER BY f.path, s.line"
+            ).fetchall()
+        finally:
+            conn.close()
+
+        by_path: dict[str, list[tuple[str, str]]] = {}
+        for path, name, kind in rows:
+            by_path.setdefault(path, []).append((name, kind))
+        return by_path
+
+    def version(self) -> tuple[int, int]:
+        """
+        Changes whenever a file is added, re-parsed or dropped: re-parsed
+        files are re-inserted under a fresh id.
+        """
+        conn = self._connect()
+        try:
+            count, last_id = conn.execute(
+                "SELECT count(*), coalesce(max(id), 0) FROM files"
+            ).fetchone()
+        finally:
+            conn.close()
+        return count, last_id
@@ -0,0 +1,272 @@
+from __future__ import annotations
+import ast
+from dataclasses import dataclass
+import os
+import re
+
+
+@dataclass(slots=True)
+class Symbol:
+    name: str
+    kind: str
+    line: int
+    signature: str
+    end_line: int | None = None
+    parent: str | None = None
+    depth: int = 0
+
+
+_MAX_SIGNATURE = 160
+
+_KEYWORDS = frozenset(
+    {"if", "for", "while", "switch", "catch", "return", "function", "else", "do", "new"}
+)
+
+# Per-language line patterns. Each has a `name` group and optionally a
+# `kind` group; otherwise the kind given alongside the pattern is used.
+_JS = [
+    (r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(?P<name>[A-Za-z_$][\w$]*)", "function"),
+    (r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(?P<name>[A-Za-z_$][\w$]*)", "class"),
+    (r"^\s*(?:export\s+)?(?:const|let|var)\s+(?P<name>[A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|[A-Za-z_$][\w$]*\s*=>)", "function"),
+    (r"^\s*(?:export\s+)?(?:declare\s+)?(?P<kind>interface|type|enum)\s+(?P<name>[A-Za-z_$][\w$]*)", "type"),
+    (r"^\s+(?:(?:public|private|protected|static|async|readonly|override|get|set)\s+)*(?P<name>[A-Za-z_$][\w$]*)\s*\([^)]*\)\s*(?::\s*[^{=]+)?\{\s*$", "method"),
+]
+
+_LANGUAGE_PATTERNS: dict[str, list[tuple[str, str]]] = {
+    "javascript": _JS,
+    "go": [
+        (r"^func\s+\([^)]*\)\s*(?P<name>[A-Za-z_]\w*)\s*\(", "method"),
+        (r"^func\s+(?P<name>[A-Za-z_]\w*)\s*[\[(]", "function"),
+        (r"^type\s+(?P<name>[A-Za-z_]\w*)\s+(?P<kind>struct|interface)\b", "type"),
+        (r"^type\s+(?P<name>[A-Za-z_]\w*)\s", "type"),
+    ],
+    "rust": [
+        (r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?(?:extern\s+\"[^\"]*\"\s+)?fn\s+(?P<name>[A-Za-z_]\w*)", "function"),
+        (r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?P<kind>struct|enum|trait|mod|union)\s+(?P<name>[A-Za-z_]\w*)", "type"),
+        (r"^\s*impl(?:<[^>]*>)?\s+(?:[\w:<>, ]+\s+for\s+)?(?P<name>[A-Za-z_][\w:]*)", "impl"),
+    ],
+    "java": [
+        (r"^\s*(?:@\w+\s+)*(?:(?:public|private|protected|internal|static|final|abstract|sealed|data|open|partial)\s+)*(?P<kind>class|interface|enum|record|object)\s+(?P<name>[A-Za-z_]\w*)", "class"),
+        (r"^\s*(?:(?:public|private|protected|internal|static|final|abstract|synchronized|override|suspend|async|virtual)\s+)+(?:fun\s+)?(?:[\w<>\[\],.?]+\s+)?(?P<name>[A-Za-z_]\w*)\s*\(", "method"),
+        (r"^\s*fun\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?(?P<name>[A-Za-z_]\w*)\s*\(", "function"),
+    ],
+    "c": [
+        (r"^\s*(?:typedef\s+)?(?P<kind>struct|class|enum|union|namespace)\s+(?P<name>[A-Za-z_]\w*)\s*(?:[:{]|$)", "type"),
+        (r"^(?!\s)(?!return\b)(?:[\w*&:<>,]+\s+)+[*&]*(?P<name>[A-Za-z_~][\w:~]*)\s*\([^;]*$", "function"),
+    ],
+    "ruby": [
+        (r"^\s*(?P<kind>class|module)\s+(?P<name>[A-Z]\w*(?:::\w+)*)", "class"),
+        (r"^\s*def\s+(?:self\.)?(?P<name>[A-Za-z_]\w*[?!=]?)", "method"),
+    ],
+    "php": [
+        (r"^\s*(?:abstract\s+|final\s+)?(?P<kind>class|interface|trait|enum)\s+(?P<name>[A-Za-z_]\w*)", "class"),
+        (r"^\s*(?:(?:public|private|protected|static|abstract|final)\s+)*function\s+(?P<name>[A-Za-z_]\w*)", "function"),
+    ],
+    "shell": [
+        (r"^\s*(?:function\s+)?(?P<name>[A-Za-z_][\w-]*)\s*\(\)\s*\{?", "function"),
+    ],
+}
+
+_COMPILED = {
+    language: [(re.compile(pattern), kind) for pattern, kind in patterns]
+    for language, patterns in _LANGUAGE_PATTERNS.items()
+}
+
+_EXTENSIONS = {
+    ".py": "python",
+    ".pyi": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".ts": "javascript",
+    ".tsx": "javascript",
+    ".go": "go",
+    ".rs": "rust",
+    ".java": "java",
+    ".kt": "java",
+    ".kts": "java",
+    ".cs": "java",
+    ".scala": "java",
+    ".c": "c",
+    ".h": "c",
+    ".cc": "c",
+    ".cpp": "c",
+    ".cxx": "c",
+    ".hpp": "c",
+    ".rb": "ruby",
+    ".php": "php",
+    ".sh": "shell",
+    ".bash": "shell",
+    ".md": "markdown",
+}
+
+SUPPORTED_EXTENSIONS = frozenset(_EXTENSIONS)
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+
+
+def language_for(path: str) -> str | None:
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def extract_symbols(path: str, text: str) -> list[Symbol]:
+    """Return the definitions in `text`, or [] for unsupported files."""
+    language = language_for(path)
+
+    if language == "python":
+        try:
+            return _python_symbols(text)
+        except (SyntaxError, ValueError, RecursionError):
+            return _pattern_symbols(
+                text,
+                [
+                    (re.compile(r"^\s*class\s+(?P<name>[A-Za-z_]\w*)"), "class"),
+                    (re.compile(r"^\s*(?:async\s+)?def\s+(?P<name>[A-Za-z_]\w*)"), "function"),
+                ],
+            )
+    if language == "markdown":
+        return _markdown_symbols(text)
+    if language in _COMPILED:
+        return _pattern_symbols(text, _COMPILED[language])
+
+    return []
+
+
+def _clip(signature: str) -> str:
+    signature = " ".join(signature.split())
+    if len(signature) > _MAX_SIGNATURE:
+        return signature[: _MAX_SIGNATURE - 3] + "..."
+    return signature
+
+
+def _python_symbols(text: str) -> list[Symbol]:
+    tree = ast.parse(text)
+    symbols: list[Symbol] = []
+
+    def visit(body: list[ast.stmt], parent: str | None, depth: int) -> None:
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                bases = ", ".join(ast.unparse(b) for b in node.bases + node.keywords)
+                signature = f"class {node.name}({bases})" if bases else f"class {node.name}"
+                symbols.append(
+                    Symbol(
+                        name=node.name,
+                        kind="class",
+                        line=node.lineno,
+                        end_line=node.end_lineno,
+                        signature=_clip(signature),
+                        parent=parent,
+                        depth=depth,
+                    )
+                )
+                visit(node.body, node.name, depth + 1)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+                signature = f"{prefix} {node.name}({ast.unparse(node.args)})"
+                if node.returns is not None:
+                    signature += f" -> {ast.unparse(node.returns)}"
+                symbols.append(
+                    Symbol(
+                        name=node.name,
+                        kind="method" if parent else "function",
+                        line=node.lineno,
+                        end_line=node.end_lineno,
+                        signature=_clip(signature),
+                        parent=parent,
+                        depth=depth,
+                    )
+                )
+            elif depth == 0 and isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        symbols.append(
+                            Symbol(
+                                name=target.id,
+                                kind="variable",
+                                line=node.lineno,
+                                signature=_clip(ast.get_source_segment(text, node) or target.id),
+                            )
+                        )
+
+    visit(tree.body, None, 0)
+    return symbols
+
+
+def _pattern_symbols(text: str, patterns) -> list[Symbol]:
+    symbols: list[Symbol] = []
+    # (indent, symbol) of enclosing definitions, for nesting by indentation
+    stack: list[tuple[int, Symbol]] = []
+
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+
+        for regex, default_kind in patterns:
+            match = regex.match(line)
+            if not match:
+                continue
+
+            name = match.group("name")
+            if name in _KEYWORDS:
+                break
+
+            indent = len(line) - len(line.lstrip())
+            while stack and stack[-1][0] >= indent:
+                stack.pop()
+            parent = stack[-1][1] if stack else None
+
+            groups = match.groupdict()
+            symbol = Symbol(
+                name=name,
+                kind=groups.get("kind") or default_kind,
+                line=lineno,
+                signature=_clip(line.strip().rstrip("{").rstrip()),
+                parent=parent.name if parent else None,
+                depth=len(stack),
+            )
+            symbols.append(symbol)
+            stack.append((indent, symbol))
+            break
+
+    return symbols
+
+
+def _markdown_symbols(text: str) -> list[Symbol]:
+    symbols: list[Symbol] = []
+    in_fence = False
+
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+
+        match = _HEADING.match(line)
+        if match:
+            level = len(match.group(1))
+            symbols.append(
+                Symbol(
+                    name=match.group(2),
+                    kind="heading",
+                    line=lineno,
+                    signature=line.strip(),
+                    depth=level - 1,
+                )
+            )
+
+    return symbols
+
+
+def format_outline(symbols: list[Symbol]) -> str:
+    lines = []
+
+    for symbol in symbols:
+        span = ""
+        if symbol.end_line and symbol.end_line > symbol.line:
+            span = f"  [{symbol.line}-{symbol.end_line}]"
+        lines.append(f"{symbol.line:6}|{'  ' * symbol.depth}{symbol.signature}{span}")
+
+    return "\n".join(lines)
@@ -0,0 +1,229 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from pathlib import Path
+import time
+
+from config.config import Config, RepoMapConfig
+from config.loader import get_data_dir
+from tools.files import FileInfoCache
+from tools.search import WorkspaceTree
+from tools.symbols.index import SymbolIndex
+from utils.text import count_tokens
+
+KEY_FILE_NAMES = frozenset(
+    {
+        "README.md",
+        "README.rst",
+        "README.txt",
+        "README",
+        "AGENTS.md",
+        "CONTRIBUTING.md",
+        "pyproject.toml",
+        "setup.py",
+        "setup.cfg",
+        "requirements.txt",
+        "package.json",
+        "tsconfig.json",
+        "Cargo.toml",
+        "go.mod",
+        "pom.xml",
+        "build.gradle",
+        "Gemfile",
+        "Makefile",
+        "Dockerfile",
+        "docker-compose.yml",
+    }
+)
+
+_ENTRY_POINTS = frozenset(
+    {"main", "__main__", "app", "cli", "server", "index", "manage", "lib", "mod"}
+)
+_MAP_KINDS = frozenset(
+    {"class", "function", "type", "interface", "struct", "enum", "trait", "record", "object"}
+)
+_TEST_MARKERS = ("test", "spec", "fixture", "example", "bench")
+
+
+class RepoMap:
+    """
+    Token-budgeted summary of the workspace layout: directories with file
+    counts, key project files and the top-level definitions of the most
+    relevant source files. Built on the persistent SymbolIndex so only
+    changed files are re-parsed, and the rendered map is cached on disk
+    until the index or the directory layout changes.
+
+    Rendering stops walking after `max_files` files and indexing after
+    `time_budget` seconds; the map is then marked partial and not cached,
+    and the next render picks up the indexing where this one stopped.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        index: SymbolIndex,
+        cache_path: Path,
+        config: RepoMapConfig,
+        model: str = "",
+    ) -> None:
+        self.root = root.resolve()
+        self.index = index
+        self.cache_path = cache_path
+        self.config = config
+        self.model = model
+
+    @classmethod
+    def for_workspace(cls, config: Config) -> RepoMap:
+        root = config.cwd.resolve()
+        key = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+        return cls(
+            root,
+            SymbolIndex.for_workspace(config),
+            get_data_dir() / "repo-map" / f"{key}.json",
+            config.repo_map,
+            config.model_name,
+        )
+
+    def render(
+        self,
+        workspace: WorkspaceTree | None = None,
+        file_info: FileInfoCache | None = None,
+    ) -> str:
+        workspace = workspace or WorkspaceTree()
+        deadline = time.monotonic() + self.config.time_budget
+        self.index.refresh(workspace, file_info, deadline)
+
+        dir_counts: dict[str, int] = {}
+        key_files: list[str] = []
+        partial = not self.index.complete
+        for walked, path in enumerate(workspace.iter_files(self.root), start=1):
+            if walked > self.config.max_files or time.monotonic() > deadline:
+                partial = True
+                break
+            rel = path.relative_to(self.root)
+            if any(part.startswith(".") for part in rel.parts):
+                continue
+
+            if len(rel.parts) == 1:
+                if rel.name in KEY_FILE_NAMES:
+                    key_files.append(rel.name)
+                continue
+
+            for depth in range(1, min(len(rel.parts), self.config.max_depth + 1)):
+                directory = "/".join(rel.parts[:depth])
+                dir_counts[directory] = dir_counts.get(directory, 0) + 1
+
+        key_files.sort()
+        if partial:
+            text = self._build(dir_counts, key_files)
+            return (
+                text + "\n(Partial map: the workspace is too large to map at "
+                "session start; use glob, grep and find_symbol to explore.)"
+            )
+
+        signature = hashlib.sha1(
+            json.dumps(
+                [
+                    self.index.version(),
+                    sorted(dir_counts.items()),
+                    key_files,
+                    self.config.max_tokens,
+                    self.config.max_depth,
+                    self.config.max_dirs,
+                    self.model,
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+
+        cached = self._load(signature)
+        if cached is not None:
+            return cached
+
+        text = self._build(dir_counts, key_files)
+        self._store(signature, text)
+        return text
+
+    def _build(self, dir_counts: dict[str, int], key_files: list[str]) -> str:
+        lines = []
+        if dir_counts:
+            lines.append("Directories:")
+            for directory in sorted(dir_counts)[: self.config.max_dirs]:
+                indent = "  " * directory.count("/")
+                lines.append(f"  {indent}{directory}/ ({dir_counts[directory]} files)")
+        if key_files:
+            lines.append(f"Key files: {', '.join(key_files)}")
+
+        budget = self.config.max_tokens - count_tokens("\n".join(lines), self.model)
+        entries = self._ranked_entries()
+        if entries:
+            lines.append("")
+            lines.append("Definitions:")
+
+        shown = 0
+        for entry in entries:
+            cost = count_tokens(entry, self.model) + 1
+            if cost > budget:
+                break
+            lines.append(entry)
+            budget -= cost
+            shown += 1
+
+        if shown < len(entries):
+            lines.append(f"... {len(entries) - shown} more files with definitions")
+
+        return "\n".join(lines)
+
+    def _ranked_entries(self) -> list[str]:
+        scored = []
+        for path, symbols in self.index.top_level().items():
+            try:
+                rel = Path(path).relative_to(self.root)
+            except ValueError:
+                continue
+            if any(part.startswith(".") for part in rel.parts):
+                continue
+
+            names = [
+                f"{name}()" if kind == "function" else name
+                for name, kind in symbols
+                if kind in _MAP_KINDS and not name.startswith("_")
+            ]
+            if not names:
+                continue
+
+            rel_str = rel.as_posix()
+            score = min(len(names), 12) + 2 * sum(
+                1 for _, kind in symbols if kind == "class"
+            )
+            score -= 1.5 * (len(rel.parts) - 1)
+            if rel.stem in _ENTRY_POINTS:
+                score += 5
+            if any(marker in rel_str.lower() for marker in _TEST_MARKERS):
+                score -= 8
+
+            scored.append((-score, rel_str, f"{rel_str}: {', '.join(names)}"))
+
+        scored.sort()
+        return [entry for _, _, entry in scored]
+
+    def _load(self, signature: str) -> str | None:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("signature") != signature:
+            return None
+        return data.get("text")
+
+    def _store(self, signature: str, text: str) -> None:
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(".tmp")
+            tmp.write_text(
+                json.dumps({"signature": signature, "text": text}),
+                encoding="utf-8",
+            )
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass
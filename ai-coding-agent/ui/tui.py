@@ -87,7 +87,7 @@ class TUI:
             "read_file": ["path", "offset", "limit"],
             "write_file": ["path", "create_directories", "content"],
             "edit": ["path", "replace_all", "old_string", "new_string"],
-            "shell": ["command", "timeout", "cwd"],
+            "shell": ["command", "timeout", "cwd", "background"],
             "list_dir": ["path", "include_hidden"],
             "grep": ["path", "case_insensitive", "pattern"],
             "glob": ["path", "pattern"],
@@ -170,6 +170,11 @@ class TUI:
         self.console.print()
         self.console.print(panel)
 
+    def tool_call_progress(self, call_id: str, name: str, output: str) -> None:
+        # Live output is shown as it arrives; the final panel repeats the
+        # (possibly truncated) result.
+        self.console.print(Text(output, style="muted"), end="")
+
     def _extract_read_file_code(self, text: str) -> tuple[int, str] | None:
         body = text
         header_match = re.match(r"^Showing lines (\d+)-(\d+) of (\d+)\n\n", text)
@@ -603,6 +608,7 @@ class TUI:
 - `/stats` - Show session statistics
 - `/tools` - List available tools
 - `/mcp` - Show MCP server status
+- `/index [build|refresh|status]` - Manage the on-disk search index used by grep
 - `/save` - Save current session
 - `/checkpoint [name]` - Create a checkpoint
 - `/checkpoints` - List available checkpoints
@@ -0,0 +1,260 @@
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass
+import time
+
+# Past any of these limits a diff is summarized as "+N/-M lines".
+MAX_DIFF_BYTES = 8 * 1024 * 1024
+MAX_EDIT_DISTANCE = 1000
+MAX_OUTPUT_LINES = 20_000
+TIME_BUDGET = 0.25
+
+
+@dataclass(slots=True)
+class DiffResult:
+    text: str
+    added: int
+    removed: int
+    # False when `text` is only a summary because a limit was hit
+    complete: bool = True
+
+
+def _lines(text: str) -> list[str]:
+    lines = text.splitlines(keepends=True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    return lines
+
+
+def _summary(fromfile: str, tofile: str, added: int, removed: int, reason: str) -> DiffResult:
+    return DiffResult(
+        text=(
+            f"--- {fromfile}\n+++ {tofile}\n"
+            f"[diff not shown ({reason}): +{added}/-{removed} lines]\n"
+        ),
+        added=added,
+        removed=removed,
+        complete=False,
+    )
+
+
+def unified_diff(
+    old: str,
+    new: str,
+    fromfile: str = "",
+    tofile: str = "",
+    context: int = 3,
+) -> DiffResult:
+    """
+    Unified diff of two texts, formatted like `difflib.unified_diff`.
+
+    Lines are interned to integers and the common prefix and suffix are
+    skipped before a Myers diff runs on the rest, bounded by edit distance
+    and TIME_BUDGET. Inputs or outputs past the limits produce a
+    "+N/-M lines" summary instead.
+    """
+    if old == new:
+        return DiffResult(text="", added=0, removed=0)
+
+    a = _lines(old)
+    b = _lines(new)
+
+    prefix = 0
+    limit = min(len(a), len(b))
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+
+    if prefix == len(a) == len(b):
+        # Only a missing final newline differs, which the format ignores.
+        return DiffResult(text="", added=0, removed=0)
+
+    # Only the region between the common prefix and suffix is compared,
+    # with each distinct line interned to an integer.
+    ids: dict[str, int] = {}
+    a_mid = [ids.setdefault(line, len(ids)) for line in a[prefix : len(a) - suffix]]
+    b_mid = [ids.setdefault(line, len(ids)) for line in b[prefix : len(b) - suffix]]
+
+    if len(old) + len(new) - 2 * sum(map(len, a[:prefix])) > MAX_DIFF_BYTES:
+        added, removed = _count_changes(a_mid, b_mid)
+        return _summary(fromfile, tofile, added, removed, "files too large")
+
+    if not a_mid or not b_mid:
+        # Pure insertion or deletion: nothing to search for.
+        ops = [("equal", 0, prefix, 0, prefix)] if prefix else []
+        ops.append(
+            ("insert" if not a_mid else "delete",
+             prefix, len(a) - suffix, prefix, len(b) - suffix)
+        )
+        if suffix:
+            ops.append(("equal", len(a) - suffix, len(a), len(b) - suffix, len(b)))
+    else:
+        script = _myers(a_mid, b_mid, time.perf_counter() + TIME_BUDGET)
+        if script is None:
+            added, removed = _count_changes(a_mid, b_mid)
+            return _summary(fromfile, tofile, added, removed, "too many changes")
+        ops = _opcodes(script, prefix, len(a), len(b), suffix)
+
+    added = sum(j2 - j1 for tag, _, _, j1, j2 in ops if tag in ("insert", "replace"))
+    removed = sum(i2 - i1 for tag, i1, i2, _, _ in ops if tag in ("delete", "replace"))
+
+    out = [f"--- {fromfile}\n", f"+++ {tofile}\n"]
+    for group in _grouped(ops, context):
+        first, last = group[0], group[-1]
+        out.append(
+            f"@@ -{_range(first[1], last[2])} +{_range(first[3], last[4])} @@\n"
+        )
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                out.extend(" " + line for line in a[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                out.extend("-" + line for line in a[i1:i2])
+            if tag in ("replace", "insert"):
+                out.extend("+" + line for line in b[j1:j2])
+
+        if len(out) > MAX_OUTPUT_LINES:
+            return _summary(fromfile, tofile, added, removed, "diff too long")
+
+    return DiffResult(text="".join(out), added=added, removed=removed)
+
+
+def _count_changes(a: list[int], b: list[int]) -> tuple[int, int]:
+    ca, cb = Counter(a), Counter(b)
+    added, removed = sum((cb - ca).values()), sum((ca - cb).values())
+    if not added and not removed:
+        # Same lines, reordered: every line in the changed region moved.
+        return len(b), len(a)
+    return added, removed
+
+
+def _myers(a: list[int], b: list[int], deadline: float) -> list[tuple[int, int]] | None:
+    """
+    Shortest edit script between `a` and `b` as the (x, y) points of its
+    path, or None past MAX_EDIT_DISTANCE or the deadline.
+    """
+    n, m = len(a), len(b)
+    max_d = min(n + m, MAX_EDIT_DISTANCE)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    trace: list[list[int]] = []
+
+    for d in range(max_d + 1):
+        if d % 64 == 0 and time.perf_counter() > deadline:
+            return None
+
+        trace.append(v[offset - d - 1 : offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+
+    return None
+
+
+def _backtrack(trace: list[list[int]], n: int, m: int) -> list[tuple[int, int]]:
+    x, y = n, m
+    path = [(x, y)]
+
+    for d in range(len(trace) - 1, -1, -1):
+        window = trace[d]
+        k = x - y
+        if k == -d or (k != d and window[k - 1 + d + 1] < window[k + 1 + d + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = window[prev_k + d + 1]
+        prev_y = prev_x - prev_k
+
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            path.append((x, y))
+
+        if d > 0:
+            x, y = prev_x, prev_y
+            path.append((x, y))
+
+    path.reverse()
+    return path
+
+
+def _opcodes(
+    path: list[tuple[int, int]],
+    prefix: int,
+    a_len: int,
+    b_len: int,
+    suffix: int,
+) -> list[tuple[str, int, int, int, int]]:
+    ops: list[tuple[str, int, int, int, int]] = []
+
+    def add(tag: str, i1: int, i2: int, j1: int, j2: int) -> None:
+        if i1 == i2 and j1 == j2:
+            return
+        if ops and ops[-1][0] == tag:
+            _, pi1, _, pj1, _ = ops[-1]
+            ops[-1] = (tag, pi1, i2, pj1, j2)
+        elif tag != "equal" and ops and ops[-1][0] != "equal":
+            _, pi1, _, pj1, _ = ops[-1]
+            ops[-1] = ("replace", pi1, i2, pj1, j2)
+        else:
+            ops.append((tag, i1, i2, j1, j2))
+
+    add("equal", 0, prefix, 0, prefix)
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        i0, i1, j0, j1 = x0 + prefix, x1 + prefix, y0 + prefix, y1 + prefix
+        if x1 - x0 == 1 and y1 - y0 == 1:
+            add("equal", i0, i1, j0, j1)
+        elif x1 > x0:
+            add("delete", i0, i1, j0, j1)
+        else:
+            add("insert", i0, i1, j0, j1)
+    add("equal", a_len - suffix, a_len, b_len - suffix, b_len)
+
+    return ops
+
+
+def _grouped(ops: list[tuple[str, int, int, int, int]], n: int):
+    """Same hunk grouping as `difflib.SequenceMatcher.get_grouped_opcodes`."""
+    codes = list(ops) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > n + n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _range(start: int, stop: int) -> str:
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return str(beginning)
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"